@@ -63,6 +63,21 @@ class Backend(object):
     #: List of URI prefixes this backend can handle.
     uri_handlers = []
 
+    def notify_subsystem_changed(self, subsystem):
+        """
+        Notify frontends that the state of a subsystem has changed.
+
+        :param subsystem: ``database``, ``update``, ``playlist``, ``player``,
+            ``mixer``, ``options``, or ``stored_playlist``
+        :type subsystem: string
+        """
+        if self.core_queue is not None:
+            self.core_queue.put({
+                'to': 'frontend',
+                'command': 'subsystem_changed',
+                'subsystem': subsystem,
+            })
+
     def destroy(self):
         """
         Call destroy on all sub-components in backend so that they can cleanup
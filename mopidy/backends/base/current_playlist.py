@@ -1,4 +1,4 @@
-from copy import copy
+import collections
 import logging
 import random
 
@@ -12,10 +12,20 @@ class CurrentPlaylistController(object):
     :type backend: :class:`mopidy.backends.base.Backend`
     """
 
+    #: The number of changes to remember for :meth:`changed_positions`.
+    CHANGE_LOG_SIZE = 1000
+
     def __init__(self, backend):
         self.backend = backend
         self._cp_tracks = []
+        self._cp_tracks_snapshot = None
+        self._tracks_snapshot = None
+        self._cp_tracks_by_cpid = {}
+        self._positions = {}
+        self._positions_valid_until = 0
+        self._next_cpid = 0
         self._version = 0
+        self._changes = collections.deque(maxlen=self.CHANGE_LOG_SIZE)
 
     def destroy(self):
         """Cleanup after component."""
@@ -24,20 +34,26 @@ class CurrentPlaylistController(object):
     @property
     def cp_tracks(self):
         """
-        List of two-tuples of (CPID integer, :class:`mopidy.models.Track`).
+        Tuple of two-tuples of (CPID integer, :class:`mopidy.models.Track`).
 
-        Read-only.
+        Read-only. The same tuple is returned until the current playlist is
+        changed.
         """
-        return [copy(ct) for ct in self._cp_tracks]
+        if self._cp_tracks_snapshot is None:
+            self._cp_tracks_snapshot = tuple(self._cp_tracks)
+        return self._cp_tracks_snapshot
 
     @property
     def tracks(self):
         """
-        List of :class:`mopidy.models.Track` in the current playlist.
+        Tuple of :class:`mopidy.models.Track` in the current playlist.
 
-        Read-only.
+        Read-only. The same tuple is returned until the current playlist is
+        changed.
         """
-        return [ct[1] for ct in self._cp_tracks]
+        if self._tracks_snapshot is None:
+            self._tracks_snapshot = tuple(ct[1] for ct in self._cp_tracks)
+        return self._tracks_snapshot
 
     @property
     def version(self):
@@ -51,6 +67,7 @@ class CurrentPlaylistController(object):
     def version(self, version):
         self._version = version
         self.backend.playback.on_current_playlist_change()
+        self.backend.notify_subsystem_changed('playlist')
 
     def add(self, track, at_position=None):
         """
@@ -64,30 +81,43 @@ class CurrentPlaylistController(object):
         :rtype: two-tuple of (CPID integer, :class:`mopidy.models.Track`) that
             was added to the current playlist playlist
         """
-        assert at_position <= len(self._cp_tracks), \
-            u'at_position can not be greater than playlist length'
-        cp_track = (self.version, track)
-        if at_position is not None:
-            self._cp_tracks.insert(at_position, cp_track)
-        else:
-            self._cp_tracks.append(cp_track)
-        self.version += 1
-        return cp_track
+        return self.append([track], at_position)[0]
 
-    def append(self, tracks):
+    def append(self, tracks, at_position=None):
         """
-        Append the given tracks to the current playlist.
+        Append the given tracks to the end of, or insert them at the given
+        position in the current playlist.
+
+        The playlist is changed in one go, so the version is only increased
+        once, no matter how many tracks are added.
 
         :param tracks: tracks to append
         :type tracks: list of :class:`mopidy.models.Track`
+        :param at_position: position in current playlist to add tracks
+        :type at_position: int or :class:`None`
+        :rtype: list of two-tuples of (CPID integer,
+            :class:`mopidy.models.Track`) that were added to the current
+            playlist
         """
-        for track in tracks:
-            self.add(track)
+        assert at_position <= len(self._cp_tracks), \
+            u'at_position can not be greater than playlist length'
+        cp_tracks = [(self._new_cpid(), track) for track in tracks]
+        if cp_tracks:
+            self._cp_tracks_by_cpid.update(
+                (cp_track[0], cp_track) for cp_track in cp_tracks)
+            if at_position is None:
+                at_position = len(self._cp_tracks)
+            self._cp_tracks[at_position:at_position] = cp_tracks
+            self._increase_version(at_position, added=cp_tracks)
+        return cp_tracks
 
     def clear(self):
         """Clear the current playlist."""
+        cp_tracks = self._cp_tracks
         self._cp_tracks = []
-        self.version += 1
+        self._cp_tracks_by_cpid = {}
+        self._positions = {}
+        self._increase_version(0, removed=cp_tracks)
 
     def get(self, **criteria):
         """
@@ -107,11 +137,13 @@ class CurrentPlaylistController(object):
         :type criteria: dict
         :rtype: two-tuple (CPID integer, :class:`mopidy.models.Track`)
         """
-        matches = self._cp_tracks
+        if 'cpid' in criteria:
+            cp_track = self._cp_tracks_by_cpid.get(criteria['cpid'])
+            matches = cp_track is not None and [cp_track] or []
+        else:
+            matches = self._cp_tracks
         for (key, value) in criteria.iteritems():
-            if key == 'cpid':
-                matches = filter(lambda ct: ct[0] == value, matches)
-            else:
+            if key != 'cpid':
                 matches = filter(lambda ct: getattr(ct[1], key) == value,
                     matches)
         if len(matches) == 1:
@@ -123,6 +155,22 @@ class CurrentPlaylistController(object):
         else:
             raise LookupError(u'"%s" match multiple tracks' % criteria_string)
 
+    def index(self, cp_track):
+        """
+        Get the position of the given track in the current playlist.
+
+        Raises :exc:`ValueError` if the track is not in the current playlist.
+
+        :param cp_track: the track to find
+        :type cp_track: two-tuple (CPID integer, :class:`mopidy.models.Track`)
+        :rtype: int
+        """
+        position = self._position(cp_track[0])
+        if position is None or self._cp_tracks[position] != cp_track:
+            raise ValueError(u'%s is not in the current playlist' % (
+                cp_track,))
+        return position
+
     def move(self, start, end, to_position):
         """
         Move the tracks in the slice ``[start:end]`` to ``to_position``.
@@ -148,11 +196,13 @@ class CurrentPlaylistController(object):
             'to_position can not be larger than playlist length'
 
         new_cp_tracks = cp_tracks[:start] + cp_tracks[end:]
+        changed_start = min(start, to_position)
+        changed_end = max(end, to_position + end - start)
         for cp_track in cp_tracks[start:end]:
             new_cp_tracks.insert(to_position, cp_track)
             to_position += 1
         self._cp_tracks = new_cp_tracks
-        self.version += 1
+        self._increase_version(changed_start, changed_end)
 
     def remove(self, **criteria):
         """
@@ -165,9 +215,34 @@ class CurrentPlaylistController(object):
         :type track: :class:`mopidy.models.Track`
         """
         cp_track = self.get(**criteria)
-        position = self._cp_tracks.index(cp_track)
+        position = self.index(cp_track)
         del self._cp_tracks[position]
-        self.version += 1
+        self._forget(cp_track)
+        self._increase_version(position, removed=[cp_track])
+
+    def remove_slice(self, start, end=None):
+        """
+        Remove the tracks in the slice ``[start:end]`` from the current
+        playlist.
+
+        The playlist is changed in one go, so the version is only increased
+        once, no matter how many tracks are removed.
+
+        :param start: position of first track to remove
+        :type start: int
+        :param end: position after last track to remove
+        :type end: int or :class:`None` for end of playlist
+        :rtype: list of two-tuples of (CPID integer,
+            :class:`mopidy.models.Track`) that were removed
+        """
+        (start, end, _) = slice(start, end).indices(len(self._cp_tracks))
+        cp_tracks = self._cp_tracks[start:end]
+        if cp_tracks:
+            del self._cp_tracks[start:end]
+            for cp_track in cp_tracks:
+                self._forget(cp_track)
+            self._increase_version(start, removed=cp_tracks)
+        return cp_tracks
 
     def shuffle(self, start=None, end=None):
         """
@@ -196,7 +271,89 @@ class CurrentPlaylistController(object):
         after = cp_tracks[end or len(cp_tracks):]
         random.shuffle(shuffled)
         self._cp_tracks = before + shuffled + after
-        self.version += 1
+        self._increase_version(start or 0, end)
+
+    def changed_positions(self, version):
+        """
+        Get the positions in the current playlist which have changed since the
+        given version, either because a new track is at the position or
+        because the track at the position was moved there.
+
+        Only the last :attr:`CHANGE_LOG_SIZE` changes are remembered.
+
+        :param version: the current playlist version to compare with
+        :type version: int
+        :rtype: sorted list of positions, or :class:`None` if the changes since
+            ``version`` are no longer known
+        """
+        if version >= self.version:
+            return []
+        length = len(self._cp_tracks)
+        ranges = []
+        expected_version = self.version
+        for (change_version, start, end) in reversed(self._changes):
+            if change_version <= version:
+                break
+            if change_version != expected_version:
+                return None
+            if end is None or end > length:
+                end = length
+            ranges.append((start, end))
+            expected_version -= 1
+        if expected_version != version:
+            return None
+        positions = []
+        next_position = 0
+        for (start, end) in sorted(ranges):
+            positions.extend(range(max(start, next_position), end))
+            next_position = max(next_position, end)
+        return positions
+
+    def _new_cpid(self):
+        cpid = self._next_cpid
+        self._next_cpid += 1
+        return cpid
+
+    def _forget(self, cp_track):
+        del self._cp_tracks_by_cpid[cp_track[0]]
+        self._positions.pop(cp_track[0], None)
+
+    def _position(self, cpid):
+        """
+        Returns the position of the track with the given CPID, or
+        :class:`None` if there is no such track.
+
+        The positions of the tracks before :attr:`_positions_valid_until` are
+        known to be correct, since the playlist is only changed from there and
+        out. The remaining positions are updated when needed.
+        """
+        position = self._positions.get(cpid)
+        if position is not None and position < self._positions_valid_until:
+            return position
+        if cpid not in self._cp_tracks_by_cpid:
+            return None
+        for position in xrange(self._positions_valid_until,
+                len(self._cp_tracks)):
+            self._positions[self._cp_tracks[position][0]] = position
+        self._positions_valid_until = len(self._cp_tracks)
+        return self._positions[cpid]
+
+    def _increase_version(self, start, end=None, added=(), removed=()):
+        """
+        Increase the version and remember that the positions in the slice
+        ``[start:end]`` changed, where ``end`` is :class:`None` if all
+        positions from ``start`` and out changed.
+
+        The tracks in ``added`` and ``removed`` are passed on to
+        :meth:`mopidy.backends.base.PlaybackController.on_current_playlist_change`.
+        """
+        self._positions_valid_until = min(self._positions_valid_until, start)
+        self._cp_tracks_snapshot = None
+        self._tracks_snapshot = None
+        self._changes.append((self.version + 1, start, end))
+        self._version += 1
+        self.backend.playback.on_current_playlist_change(added, removed)
+        self.backend.notify_subsystem_changed('playlist')
 
     def mpd_format(self, *args, **kwargs):
         """Not a part of the generic backend API."""
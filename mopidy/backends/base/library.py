@@ -13,11 +13,48 @@ class LibraryController(object):
     def __init__(self, backend, provider):
         self.backend = backend
         self.provider = provider
+        self._update_job_id = 0
 
     def destroy(self):
         """Cleanup after component."""
         self.provider.destroy()
 
+    def browse(self, path):
+        """
+        List the contents of the directory ``path`` in the library. Raises
+        :exc:`LookupError` if there is no such directory.
+
+        Examples::
+
+            # Returns the directories and tracks in the root directory
+            browse('')
+            # Returns the directories and tracks in the directory 'a/b'
+            browse('a/b')
+
+        :param path: directory path, with ``''`` or ``'/'`` being the root
+        :type path: string
+        :rtype: two-tuple of a list of directory paths and a list of
+            :class:`mopidy.models.Track`
+        """
+        return self.provider.browse(path)
+
+    def count(self, **query):
+        """
+        Count the tracks in the library where ``field`` is ``values``, and
+        their total length. Takes the same queries as :meth:`find_exact`.
+
+        Examples::
+
+            # Returns the number and length of the tracks by artist 'xyz'
+            count(artist=['xyz'])
+
+        :param query: one or more queries to search for
+        :type query: dict
+        :rtype: dict with the keys ``songs``, the number of tracks, and
+            ``playtime``, their total length in milliseconds
+        """
+        return self.provider.count(**query)
+
     def find_exact(self, **query):
         """
         Search the library for tracks where ``field`` is ``values``.
@@ -37,6 +74,40 @@ class LibraryController(object):
         """
         return self.provider.find_exact(**query)
 
+    def iter_find_exact(self, **query):
+        """
+        Like :meth:`find_exact`, but returns an iterator over the matching
+        tracks. Backends which support it find the tracks as they are
+        iterated over, so that e.g. only the first tracks of a large result
+        may be looked at.
+
+        :param query: one or more queries to search for
+        :type query: dict
+        :rtype: iterator over :class:`mopidy.models.Track`
+        """
+        return self.provider.iter_find_exact(**query)
+
+    def list_values(self, field, **query):
+        """
+        List the distinct values of ``field`` of the tracks in the library
+        where ``field`` is ``values``. Takes the same queries as
+        :meth:`find_exact`.
+
+        Examples::
+
+            # Returns all artist names
+            list_values('artist')
+            # Returns the names of the albums by artist 'xyz'
+            list_values('album', artist=['xyz'])
+
+        :param field: ``artist``, ``album``, ``date``, or ``genre``
+        :type field: string
+        :param query: one or more queries to search for
+        :type query: dict
+        :rtype: sorted list of strings, with dates formatted as ``YYYY-MM-DD``
+        """
+        return self.provider.list_values(field, **query)
+
     def lookup(self, uri):
         """
         Lookup track with given URI. Returns :class:`None` if not found.
@@ -54,7 +125,42 @@ class LibraryController(object):
         :param uri: directory or track URI
         :type uri: string
         """
-        return self.provider.refresh(uri)
+        result = self.provider.refresh(uri)
+        self.backend.notify_subsystem_changed('database')
+        return result
+
+    def stats(self):
+        """
+        Statistics about the library.
+
+        :rtype: dict with the keys ``artists``, ``albums``, and ``songs``, the
+            number of distinct artists, albums, and tracks, ``playtime``, the
+            total length of the tracks in milliseconds, and ``updated``, the
+            UNIX time of the last refresh or :class:`None`
+        """
+        return self.provider.stats()
+
+    def update(self, uri=None, rescan=False):
+        """
+        Update the library from its source, e.g. by scanning the music folder
+        for new, modified, and removed files. The update may continue in the
+        background after this method returns.
+
+        Raises :exc:`LookupError` if ``uri`` is not found. No update job is
+        started then, and none is started while another one is running, in
+        which case the ID of the running job is returned.
+
+        :param uri: directory or track URI
+        :type uri: string
+        :param rescan: if files which have not been modified should be
+            scanned again
+        :type rescan: boolean
+        :rtype: int identifying the update job
+        """
+        if self.provider.update(uri, rescan):
+            self._update_job_id += 1
+            self.backend.notify_subsystem_changed('update')
+        return self._update_job_id
 
     def search(self, **query):
         """
@@ -75,6 +181,17 @@ class LibraryController(object):
         """
         return self.provider.search(**query)
 
+    def iter_search(self, **query):
+        """
+        Like :meth:`search`, but returns an iterator over the matching tracks,
+        as :meth:`iter_find_exact`.
+
+        :param query: one or more queries to search for
+        :type query: dict
+        :rtype: iterator over :class:`mopidy.models.Track`
+        """
+        return self.provider.iter_search(**query)
+
 
 class BaseLibraryProvider(object):
     """
@@ -93,6 +210,29 @@ class BaseLibraryProvider(object):
         """
         pass
 
+    def browse(self, path):
+        """
+        See :meth:`mopidy.backends.base.LibraryController.browse`.
+
+        *MAY be implemented by subclass.* Defaults to an empty root directory.
+        """
+        if path.strip(u'/'):
+            raise LookupError('%s not found.' % path)
+        return ([], [])
+
+    def count(self, **query):
+        """
+        See :meth:`mopidy.backends.base.LibraryController.count`.
+
+        *MAY be implemented by subclass.* Defaults to counting the tracks
+        returned by :meth:`find_exact`.
+        """
+        tracks = self.find_exact(**query).tracks
+        return {
+            'songs': len(tracks),
+            'playtime': sum(track.length or 0 for track in tracks),
+        }
+
     def find_exact(self, **query):
         """
         See :meth:`mopidy.backends.base.LibraryController.find_exact`.
@@ -101,6 +241,35 @@ class BaseLibraryProvider(object):
         """
         raise NotImplementedError
 
+    def iter_find_exact(self, **query):
+        """
+        See :meth:`mopidy.backends.base.LibraryController.iter_find_exact`.
+
+        *MAY be implemented by subclass.* Defaults to iterating over the
+        tracks returned by :meth:`find_exact`.
+        """
+        return iter(self.find_exact(**query).tracks)
+
+    def list_values(self, field, **query):
+        """
+        See :meth:`mopidy.backends.base.LibraryController.list_values`.
+
+        *MAY be implemented by subclass.* Defaults to collecting the values
+        from the tracks returned by :meth:`find_exact`.
+        """
+        values = set()
+        for track in self.find_exact(**query).tracks:
+            if field == 'artist':
+                values.update(artist.name for artist in track.artists)
+            elif field == 'album' and track.album is not None:
+                values.add(track.album.name)
+            elif field == 'date' and track.date is not None:
+                values.add(track.date.isoformat())
+            elif field == 'genre':
+                values.add(track.genre)
+        values.discard(None)
+        return sorted(values)
+
     def lookup(self, uri):
         """
         See :meth:`mopidy.backends.base.LibraryController.lookup`.
@@ -117,6 +286,32 @@ class BaseLibraryProvider(object):
         """
         raise NotImplementedError
 
+    def stats(self):
+        """
+        See :meth:`mopidy.backends.base.LibraryController.stats`.
+
+        *MAY be implemented by subclass.* Defaults to an empty library.
+        """
+        return {
+            'artists': 0,
+            'albums': 0,
+            'songs': 0,
+            'playtime': 0,
+            'updated': None,
+        }
+
+    def update(self, uri=None, rescan=False):
+        """
+        See :meth:`mopidy.backends.base.LibraryController.update`.
+
+        Returns :class:`True` if an update job was started, or
+        :class:`False` if an update is already running.
+
+        *MAY be implemented by subclass.* Defaults to :meth:`refresh`.
+        """
+        self.refresh(uri)
+        return True
+
     def search(self, **query):
         """
         See :meth:`mopidy.backends.base.LibraryController.search`.
@@ -124,3 +319,12 @@ class BaseLibraryProvider(object):
         *MUST be implemented by subclass.*
         """
         raise NotImplementedError
+
+    def iter_search(self, **query):
+        """
+        See :meth:`mopidy.backends.base.LibraryController.iter_search`.
+
+        *MAY be implemented by subclass.* Defaults to iterating over the
+        tracks returned by :meth:`search`.
+        """
+        return iter(self.search(**query).tracks)
@@ -1,7 +1,8 @@
 import logging
-import random
 import time
 
+from .shuffle import ShuffleOrder
+
 logger = logging.getLogger('mopidy.backends.base')
 
 class PlaybackController(object):
@@ -24,46 +25,26 @@ class PlaybackController(object):
     #: Constant representing the stopped state.
     STOPPED = u'stopped'
 
-    #: :class:`True`
-    #:     Tracks are removed from the playlist when they have been played.
-    #: :class:`False`
-    #:     Tracks are not removed from the playlist.
-    consume = False
-
     #: The currently playing or selected track.
     #:
     #: A two-tuple of (CPID integer, :class:`mopidy.models.Track`) or
     #: :class:`None`.
     current_cp_track = None
 
-    #: :class:`True`
-    #:     Tracks are selected at random from the playlist.
-    #: :class:`False`
-    #:     Tracks are played in the order of the playlist.
-    random = False
-
-    #: :class:`True`
-    #:     The current playlist is played repeatedly. To repeat a single track,
-    #:     select both :attr:`repeat` and :attr:`single`.
-    #: :class:`False`
-    #:     The current playlist is played once.
-    repeat = False
-
-    #: :class:`True`
-    #:     Playback is stopped after current song, unless in :attr:`repeat`
-    #:     mode.
-    #: :class:`False`
-    #:     Playback continues after current song.
-    single = False
-
     def __init__(self, backend, provider):
         self.backend = backend
         self.provider = provider
+        self._consume = False
+        self._random = False
+        self._repeat = False
+        self._single = False
         self._state = self.STOPPED
-        self._shuffled = []
-        self._first_shuffle = True
+        self._shuffle_order = None
+        self._next_cp_track = None
         self._play_time_accumulated = 0
         self._play_time_started = None
+        self._total_play_time_accumulated = 0
+        self._total_play_time_started = None
 
     def destroy(self):
         """
@@ -71,6 +52,71 @@ class PlaybackController(object):
         """
         self.provider.destroy()
 
+    @property
+    def consume(self):
+        """
+        :class:`True`
+            Tracks are removed from the playlist when they have been played.
+        :class:`False`
+            Tracks are not removed from the playlist.
+        """
+        return self._consume
+
+    @consume.setter
+    def consume(self, value):
+        self._consume = value
+        self.backend.notify_subsystem_changed('options')
+
+    @property
+    def random(self):
+        """
+        :class:`True`
+            Tracks are selected at random from the playlist.
+        :class:`False`
+            Tracks are played in the order of the playlist.
+        """
+        return self._random
+
+    @random.setter
+    def random(self, value):
+        self._random = value
+        self._set_next_track()
+        self.backend.notify_subsystem_changed('options')
+
+    @property
+    def repeat(self):
+        """
+        :class:`True`
+            The current playlist is played repeatedly. To repeat a single
+            track, select both :attr:`repeat` and :attr:`single`.
+        :class:`False`
+            The current playlist is played once.
+        """
+        return self._repeat
+
+    @repeat.setter
+    def repeat(self, value):
+        self._repeat = value
+        self._set_next_track()
+        self.backend.notify_subsystem_changed('options')
+
+    @property
+    def single(self):
+        """
+        :class:`True`
+            Playback is stopped after current song, unless in :attr:`repeat`
+            mode.
+        :class:`False`
+            Playback continues after current song.
+        """
+        return self._single
+
+    @single.setter
+    def single(self, value):
+        self._single = value
+        self._set_next_track()
+        self.backend.notify_subsystem_changed('options')
+
     def _get_cpid(self, cp_track):
         if cp_track is None:
             return None
@@ -81,6 +127,15 @@ class PlaybackController(object):
             return None
         return cp_track[1]
 
+    def _is_in_current_playlist(self, cp_track):
+        if cp_track is None:
+            return False
+        try:
+            return (self.backend.current_playlist.get(cpid=cp_track[0])
+                == cp_track)
+        except LookupError:
+            return False
+
     @property
     def current_cpid(self):
         """
@@ -110,8 +165,7 @@ class PlaybackController(object):
         if self.current_cp_track is None:
             return None
         try:
-            return self.backend.current_playlist.cp_tracks.index(
-                self.current_cp_track)
+            return self.backend.current_playlist.index(self.current_cp_track)
         except ValueError:
             return None
 
@@ -137,21 +191,14 @@ class PlaybackController(object):
         # pylint: disable = R0911
         # Too many return statements
 
+        if self.random:
+            return self._shuffled_cp_track
+
         cp_tracks = self.backend.current_playlist.cp_tracks
 
         if not cp_tracks:
             return None
 
-        if self.random and not self._shuffled:
-            if self.repeat or self._first_shuffle:
-                logger.debug('Shuffling tracks')
-                self._shuffled = cp_tracks
-                random.shuffle(self._shuffled)
-                self._first_shuffle = False
-
-        if self.random and self._shuffled:
-            return self._shuffled[0]
-
         if self.current_cp_track is None:
             return cp_tracks[0]
 
@@ -167,6 +214,22 @@ class PlaybackController(object):
         except IndexError:
             return None
 
+    @property
+    def _shuffled_cp_track(self):
+        """
+        The next track in the shuffle order, which is created on first use,
+        and created again when all tracks have been played if repeat is
+        enabled. Changes to the current playlist are applied to the existing
+        shuffle order, so that every track is played once before the order
+        repeats.
+        """
+        if self._shuffle_order is None or (
+                self.repeat and not self._shuffle_order):
+            logger.debug('Shuffling tracks')
+            self._shuffle_order = ShuffleOrder(
+                self.backend.current_playlist.cp_tracks)
+        return self._shuffle_order.next
+
     @property
     def track_at_next(self):
         """
@@ -189,21 +252,14 @@ class PlaybackController(object):
         enabled this should be a random track, all tracks should be played once
         before the list repeats.
         """
+        if self.random:
+            return self._shuffled_cp_track
+
         cp_tracks = self.backend.current_playlist.cp_tracks
 
         if not cp_tracks:
             return None
 
-        if self.random and not self._shuffled:
-            if self.repeat or self._first_shuffle:
-                logger.debug('Shuffling tracks')
-                self._shuffled = cp_tracks
-                random.shuffle(self._shuffled)
-                self._first_shuffle = False
-
-        if self.random and self._shuffled:
-            return self._shuffled[0]
-
         if self.current_cp_track is None:
             return cp_tracks[0]
 
@@ -278,6 +334,13 @@ class PlaybackController(object):
             self._play_time_pause()
         elif old_state == self.PAUSED and new_state == self.PLAYING:
             self._play_time_resume()
+        if old_state == self.PLAYING:
+            self._total_play_time_accumulated += (self._current_wall_time -
+                self._total_play_time_started)
+        if new_state == self.PLAYING:
+            self._total_play_time_started = self._current_wall_time
+        if old_state != new_state:
+            self.backend.notify_subsystem_changed('player')
 
     @property
     def time_position(self):
@@ -291,6 +354,17 @@ class PlaybackController(object):
         elif self.state == self.STOPPED:
             return 0
 
+    @property
+    def total_play_time(self):
+        """
+        Total time in milliseconds that music has been played since the
+        backend was started.
+        """
+        if self.state == self.PLAYING:
+            return self._total_play_time_accumulated + (
+                self._current_wall_time - self._total_play_time_started)
+        return self._total_play_time_accumulated
+
     def _play_time_start(self):
         self._play_time_accumulated = 0
         self._play_time_started = self._current_wall_time
@@ -306,19 +380,40 @@ class PlaybackController(object):
     def _current_wall_time(self):
         return int(time.time() * 1000)
 
-    def on_end_of_track(self):
+    def on_end_of_track(self, next_uri=None):
         """
         Tell the playback controller that end of track is reached.
 
         Typically called by :class:`mopidy.process.CoreProcess` after a message
         from a library thread is received.
+
+        If the provider has already started playing the track given to
+        :meth:`BasePlaybackProvider.set_next`, the URI it started playing is
+        given as ``next_uri``. The next track may have changed since, so the
+        controller only continues with it if the URIs match, and otherwise
+        plays the next track from the start.
+
+        :param next_uri: URI the provider started playing by itself, if any
+        :type next_uri: string or :class:`None`
         """
         if self.state == self.STOPPED:
             return
 
         original_cp_track = self.current_cp_track
 
-        if self.cp_track_at_eot:
+        if (next_uri is not None and self._next_cp_track is not None
+                and self._next_cp_track[1].uri == next_uri
+                and self._is_in_current_playlist(self._next_cp_track)):
+            self._trigger_stopped_playing_event()
+            # The provider has used up the next track, so it must be given a
+            # new one, even if it is the same track again.
+            (cp_track, self._next_cp_track) = (self._next_cp_track, None)
+            self._change_track(cp_track)
+            if self.random and self._shuffle_order is not None:
+                self._shuffle_order.discard(self.current_cp_track)
+            self._trigger_started_playing_event()
+            self._set_next_track()
+        elif self.cp_track_at_eot:
             self._trigger_stopped_playing_event()
             self.play(self.cp_track_at_eot)
         else:
@@ -327,19 +422,63 @@ class PlaybackController(object):
         if self.consume:
             self.backend.current_playlist.remove(cpid=original_cp_track[0])
 
-    def on_current_playlist_change(self):
+    def on_time_position(self, time_position, wall_time, serial=None):
+        """
+        Tell the playback controller the time position reported by the
+        output, so that :attr:`time_position` follows the output without
+        asking it.
+
+        Typically called by :class:`mopidy.process.CoreProcess` after a message
+        from the output is received. Positions read before the last change of
+        track, state, or position are ignored. If the output gives the
+        :attr:`mopidy.outputs.base.BaseOutput.position_serial` the position
+        was read under, positions read before the output last changed track
+        or position are ignored too, even if the core changed them earlier.
+
+        :param time_position: time position in milliseconds
+        :type time_position: int
+        :param wall_time: when the position was read, in milliseconds since
+            the epoch
+        :type wall_time: int
+        :param serial: the output's position serial, if known
+        :type serial: int or :class:`None`
+        """
+        if self.state != self.PLAYING or wall_time < self._play_time_started:
+            return
+        output = self.backend.output
+        if (serial is not None and output is not None
+                and serial != output.position_serial):
+            return
+        self._play_time_accumulated = time_position
+        self._play_time_started = wall_time
+
+    def on_current_playlist_change(self, added=None, removed=None):
         """
         Tell the playback controller that the current playlist has changed.
 
         Used by :class:`mopidy.backends.base.CurrentPlaylistController`.
-        """
-        self._first_shuffle = True
-        self._shuffled = []
 
-        if (not self.backend.current_playlist.cp_tracks or
-                self.current_cp_track not in
-                self.backend.current_playlist.cp_tracks):
+        :param added: tracks added to the current playlist, or :class:`None`
+            if not known
+        :type added: list of two-tuples of (CPID integer,
+            :class:`mopidy.models.Track`) or :class:`None`
+        :param removed: tracks removed from the current playlist, or
+            :class:`None` if not known
+        :type removed: list of two-tuples of (CPID integer,
+            :class:`mopidy.models.Track`) or :class:`None`
+        """
+        if added is None or removed is None:
+            self._shuffle_order = None
+        elif self._shuffle_order is not None:
+            for cp_track in removed:
+                self._shuffle_order.discard(cp_track)
+            for cp_track in added:
+                self._shuffle_order.add(cp_track)
+
+        if not self._is_in_current_playlist(self.current_cp_track):
             self.stop(clear_current_track=True)
+        else:
+            self._set_next_track()
 
     def next(self):
         """Play the next track."""
@@ -371,7 +510,7 @@ class PlaybackController(object):
         """
 
         if cp_track is not None:
-            assert cp_track in self.backend.current_playlist.cp_tracks
+            assert self._is_in_current_playlist(cp_track)
 
         if cp_track is None and self.current_cp_track is None:
             cp_track = self.cp_track_at_next
@@ -380,22 +519,21 @@ class PlaybackController(object):
             self.resume()
 
         if cp_track is not None:
-            self.state = self.STOPPED
-            self.current_cp_track = cp_track
-            self.state = self.PLAYING
+            self._change_track(cp_track)
             if not self.provider.play(cp_track[1]):
                 # Track is not playable
-                if self.random and self._shuffled:
-                    self._shuffled.remove(cp_track)
+                if self._shuffle_order is not None:
+                    self._shuffle_order.discard(cp_track)
                 if on_error_step == 1:
                     self.next()
                 elif on_error_step == -1:
                     self.previous()
 
-        if self.random and self.current_cp_track in self._shuffled:
-            self._shuffled.remove(self.current_cp_track)
+        if self.random and self._shuffle_order is not None:
+            self._shuffle_order.discard(self.current_cp_track)
 
         self._trigger_started_playing_event()
+        self._set_next_track()
 
     def previous(self):
         """Play the previous track."""
@@ -436,6 +574,7 @@ class PlaybackController(object):
         self._play_time_started = self._current_wall_time
         self._play_time_accumulated = time_position
 
+        self.backend.notify_subsystem_changed('player')
         return self.provider.seek(time_position)
 
     def stop(self, clear_current_track=False):
@@ -453,6 +592,25 @@ class PlaybackController(object):
             self.state = self.STOPPED
         if clear_current_track:
             self.current_cp_track = None
+        self._set_next_track()
+
+    def _change_track(self, cp_track):
+        self.state = self.STOPPED
+        self.current_cp_track = cp_track
+        self.state = self.PLAYING
+
+    def _set_next_track(self):
+        """
+        Give the provider the track to play at the end of the current track,
+        if it has changed since last time.
+        """
+        if self.state == self.STOPPED:
+            cp_track = None
+        else:
+            cp_track = self.cp_track_at_eot
+        if cp_track != self._next_cp_track:
+            self._next_cp_track = cp_track
+            self.provider.set_next(self._get_track(cp_track))
 
     def _trigger_started_playing_event(self):
         """
@@ -546,6 +704,20 @@ class BasePlaybackProvider(object):
         """
         raise NotImplementedError
 
+    def set_next(self, track):
+        """
+        Prepare the track to play at the end of the current track, so that
+        the change of tracks can be gapless. If the provider starts playing
+        the track by itself, it should give its URI to
+        :meth:`PlaybackController.on_end_of_track`.
+
+        *MAY be implemented by subclass.*
+
+        :param track: the track to play next, or :class:`None` for no track
+        :type track: :class:`mopidy.models.Track` or :class:`None`
+        """
+        pass
+
     def stop(self):
         """
         Stop playback.
@@ -0,0 +1,71 @@
+import random
+
+class ShuffleOrder(object):
+    """
+    Random order of a set of items, where items may be added and removed
+    without reshuffling the items already in the order.
+
+    The items are kept in a list, with the next item last, and a hash map from
+    item to position in the list. New items are swapped into a random position
+    before the next item, and removed items are replaced by the item before the
+    next item, so both take constant time. The next item is not changed by
+    adding or removing other items.
+
+    :param items: the items to shuffle
+    :type items: iterable of hashable objects
+    """
+
+    def __init__(self, items=()):
+        self._items = list(items)
+        random.shuffle(self._items)
+        # Reversed, so that the items are given in the same order as
+        # random.shuffle() put them.
+        self._items.reverse()
+        self._positions = dict(
+            (item, position) for (position, item) in enumerate(self._items))
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def next(self):
+        """The next item in the order, or :class:`None` if it is empty."""
+        if self._items:
+            return self._items[-1]
+
+    def add(self, item):
+        """Add ``item`` at a random position after the next item."""
+        if item in self._positions:
+            return
+        self._items.append(item)
+        self._positions[item] = len(self._items) - 1
+        if len(self._items) > 1:
+            last = len(self._items) - 1
+            self._swap(last - 1, last)
+            self._swap(random.randint(0, last - 1), last - 1)
+
+    def discard(self, item):
+        """Remove ``item`` from the order, if it is in it."""
+        position = self._positions.pop(item, None)
+        if position is None:
+            return
+        last = len(self._items) - 1
+        if position < last:
+            if position < last - 1:
+                self._move(last - 1, position)
+            self._move(last, last - 1)
+        self._items.pop()
+
+    def _move(self, source, target):
+        item = self._items[source]
+        self._items[target] = item
+        self._positions[item] = target
+
+    def _swap(self, first, second):
+        items = self._items
+        (items[first], items[second]) = (items[second], items[first])
+        self._positions[items[first]] = first
+        self._positions[items[second]] = second
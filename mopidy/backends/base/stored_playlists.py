@@ -31,6 +31,7 @@ class StoredPlaylistsController(object):
     @playlists.setter
     def playlists(self, playlists):
         self.provider.playlists = playlists
+        self.backend.notify_subsystem_changed('stored_playlist')
 
     def create(self, name):
         """
@@ -40,7 +41,9 @@ class StoredPlaylistsController(object):
         :type name: string
         :rtype: :class:`mopidy.models.Playlist`
         """
-        return self.provider.create(name)
+        playlist = self.provider.create(name)
+        self.backend.notify_subsystem_changed('stored_playlist')
+        return playlist
 
     def delete(self, playlist):
         """
@@ -49,7 +52,9 @@ class StoredPlaylistsController(object):
         :param playlist: the playlist to delete
         :type playlist: :class:`mopidy.models.Playlist`
         """
-        return self.provider.delete(playlist)
+        result = self.provider.delete(playlist)
+        self.backend.notify_subsystem_changed('stored_playlist')
+        return result
 
     def get(self, **criteria):
         """
@@ -96,7 +101,9 @@ class StoredPlaylistsController(object):
         Refresh the stored playlists in
         :attr:`mopidy.backends.base.StoredPlaylistsController.playlists`.
         """
-        return self.provider.refresh()
+        result = self.provider.refresh()
+        self.backend.notify_subsystem_changed('stored_playlist')
+        return result
 
     def rename(self, playlist, new_name):
         """
@@ -107,7 +114,9 @@ class StoredPlaylistsController(object):
         :param new_name: the new name
         :type new_name: string
         """
-        return self.provider.rename(playlist, new_name)
+        result = self.provider.rename(playlist, new_name)
+        self.backend.notify_subsystem_changed('stored_playlist')
+        return result
 
     def save(self, playlist):
         """
@@ -116,7 +125,9 @@ class StoredPlaylistsController(object):
         :param playlist: the playlist
         :type playlist: :class:`mopidy.models.Playlist`
         """
-        return self.provider.save(playlist)
+        result = self.provider.save(playlist)
+        self.backend.notify_subsystem_changed('stored_playlist')
+        return result
 
 
 class BaseStoredPlaylistsProvider(object):
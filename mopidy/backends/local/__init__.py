@@ -3,16 +3,22 @@ import logging
 import multiprocessing
 import os
 import shutil
+import subprocess
+import sys
+import tempfile
+import time
 
+import mopidy
 from mopidy import settings
 from mopidy.backends.base import (Backend, CurrentPlaylistController,
     LibraryController, BaseLibraryProvider, PlaybackController,
     BasePlaybackProvider, StoredPlaylistsController,
     BaseStoredPlaylistsProvider)
-from mopidy.models import Playlist, Track, Album
-from mopidy.utils.process import pickle_connection
+from mopidy.models import Playlist, Track
+from mopidy.utils.process import BaseThread, pickle_connection
 
-from .translator import parse_m3u, parse_mpd_tag_cache
+from .index import DirectoryTree, LibraryIndex
+from .translator import parse_m3u, iter_mpd_tag_cache
 
 logger = logging.getLogger(u'mopidy.backends.local')
 
@@ -56,10 +62,6 @@ class LocalPlaybackController(PlaybackController):
         # XXX Why do we call stop()? Is it to set GStreamer state to 'READY'?
         self.stop()
 
-    @property
-    def time_position(self):
-        return self.backend.output.get_position()
-
 
 class LocalPlaybackProvider(BasePlaybackProvider):
     def pause(self):
@@ -74,6 +76,9 @@ class LocalPlaybackProvider(BasePlaybackProvider):
     def seek(self, time_position):
         return self.backend.output.set_position(time_position)
 
+    def set_next(self, track):
+        self.backend.output.set_next_uri(track and track.uri)
+
     def stop(self):
         return self.backend.output.set_state('READY')
 
@@ -155,18 +160,59 @@ class LocalLibraryProvider(BaseLibraryProvider):
     def __init__(self, *args, **kwargs):
         super(LocalLibraryProvider, self).__init__(*args, **kwargs)
         self._uri_mapping = {}
+        self._index = LibraryIndex()
+        self._tree = DirectoryTree()
+        self._updated = None
+        self._updater = None
         self.refresh()
 
     def refresh(self, uri=None):
         tag_cache = settings.LOCAL_TAG_CACHE_FILE
         music_folder = settings.LOCAL_MUSIC_PATH
 
-        tracks = parse_mpd_tag_cache(tag_cache, music_folder)
-
         logger.info('Loading songs in %s from %s', music_folder, tag_cache)
 
-        for track in tracks:
-            self._uri_mapping[track.uri] = track
+        uri_mapping = {}
+        for track in iter_mpd_tag_cache(tag_cache, music_folder):
+            uri_mapping[track.uri] = track
+
+        if self._tree.music_folder != music_folder:
+            self._tree = DirectoryTree(music_folder)
+            self._uri_mapping = {}
+        for (uri, track) in self._uri_mapping.iteritems():
+            if uri_mapping.get(uri) != track:
+                self._tree.remove(track)
+        for (uri, track) in uri_mapping.iteritems():
+            if self._uri_mapping.get(uri) != track:
+                self._tree.add(track)
+
+        self._uri_mapping = uri_mapping
+        self._index = LibraryIndex(uri_mapping.itervalues())
+        self._updated = int(time.time())
+
+    def browse(self, path):
+        return self._tree.browse(path)
+
+    def update(self, uri=None, rescan=False):
+        path = uri and uri.strip(u'/') or None
+        if path:
+            music_folder = os.path.abspath(settings.LOCAL_MUSIC_PATH)
+            full_path = os.path.abspath(os.path.join(music_folder, path))
+            if (not full_path.startswith(music_folder.rstrip(os.sep) + os.sep)
+                    or not os.path.exists(full_path)):
+                raise LookupError('%s not found.' % uri)
+        if self._updater is not None and self._updater.is_alive():
+            logger.info(u'Library update already in progress')
+            return False
+        self._updater = LocalLibraryUpdater(
+            self.backend.core_queue, rescan, path)
+        self._updater.start()
+        return True
+
+    def list_values(self, field, **query):
+        self._validate_query(query)
+        return self._index.values(field, self._find_ids(
+            self._index.find_exact, query))
 
     def lookup(self, uri):
         try:
@@ -174,72 +220,73 @@ class LocalLibraryProvider(BaseLibraryProvider):
         except KeyError:
             raise LookupError('%s not found.' % uri)
 
-    def find_exact(self, **query):
+    def count(self, **query):
         self._validate_query(query)
-        result_tracks = self._uri_mapping.values()
-
-        for (field, values) in query.iteritems():
+        if len(query) == 1 and 'any' not in query:
+            (field, values) = query.items()[0]
             if not hasattr(values, '__iter__'):
                 values = [values]
-            # FIXME this is bound to be slow for large libraries
-            for value in values:
-                q = value.strip()
-
-                track_filter = lambda t: q == t.name
-                album_filter = lambda t: q == getattr(t, 'album', Album()).name
-                artist_filter = lambda t: filter(
-                    lambda a: q == a.name, t.artists)
-                uri_filter = lambda t: q == t.uri
-                any_filter = lambda t: (track_filter(t) or album_filter(t) or
-                    artist_filter(t) or uri_filter(t))
-
-                if field == 'track':
-                    result_tracks = filter(track_filter, result_tracks)
-                elif field == 'album':
-                    result_tracks = filter(album_filter, result_tracks)
-                elif field == 'artist':
-                    result_tracks = filter(artist_filter, result_tracks)
-                elif field == 'uri':
-                    result_tracks = filter(uri_filter, result_tracks)
-                elif field == 'any':
-                    result_tracks = filter(any_filter, result_tracks)
-                else:
-                    raise LookupError('Invalid lookup field: %s' % field)
-        return Playlist(tracks=result_tracks)
+            if len(values) == 1:
+                (songs, playtime) = self._index.count(field, values[0].strip())
+                return {'songs': songs, 'playtime': playtime}
+        tracks = self._find(self._index.find_exact, query).tracks
+        return {
+            'songs': len(tracks),
+            'playtime': sum(track.length or 0 for track in tracks),
+        }
+
+    def stats(self):
+        return {
+            'artists': self._index.count_values('artist'),
+            'albums': self._index.count_values('album'),
+            'songs': len(self._index),
+            'playtime': self._index.playtime,
+            'updated': self._updated,
+        }
+
+    def find_exact(self, **query):
+        self._validate_query(query)
+        return self._find(self._index.find_exact, query)
+
+    def iter_find_exact(self, **query):
+        self._validate_query(query)
+        return self._iter_find(self._index.find_exact, query)
 
     def search(self, **query):
         self._validate_query(query)
-        result_tracks = self._uri_mapping.values()
+        return self._find(self._index.search, query)
 
+    def iter_search(self, **query):
+        self._validate_query(query)
+        return self._iter_find(self._index.search, query)
+
+    def _find(self, lookup, query):
+        return Playlist(tracks=list(self._iter_find(lookup, query)))
+
+    def _iter_find(self, lookup, query):
+        track_ids = self._find_ids(lookup, query)
+        if track_ids is None:
+            track_ids = self._index.all()
+        return self._index.iter_tracks(track_ids)
+
+    def _find_ids(self, lookup, query):
+        """
+        Returns the IDs of the tracks matching all of the query, or
+        :class:`None` if the query is empty.
+        """
+        track_ids = None
         for (field, values) in query.iteritems():
             if not hasattr(values, '__iter__'):
                 values = [values]
-            # FIXME this is bound to be slow for large libraries
             for value in values:
-                q = value.strip().lower()
-
-                track_filter  = lambda t: q in t.name.lower()
-                album_filter = lambda t: q in getattr(
-                    t, 'album', Album()).name.lower()
-                artist_filter = lambda t: filter(
-                    lambda a: q in a.name.lower(), t.artists)
-                uri_filter = lambda t: q in t.uri.lower()
-                any_filter = lambda t: track_filter(t) or album_filter(t) or \
-                    artist_filter(t) or uri_filter(t)
-
-                if field == 'track':
-                    result_tracks = filter(track_filter, result_tracks)
-                elif field == 'album':
-                    result_tracks = filter(album_filter, result_tracks)
-                elif field == 'artist':
-                    result_tracks = filter(artist_filter, result_tracks)
-                elif field == 'uri':
-                    result_tracks = filter(uri_filter, result_tracks)
-                elif field == 'any':
-                    result_tracks = filter(any_filter, result_tracks)
+                matches = lookup(field, value.strip())
+                if track_ids is None:
+                    track_ids = matches
                 else:
-                    raise LookupError('Invalid lookup field: %s' % field)
-        return Playlist(tracks=result_tracks)
+                    track_ids &= matches
+                if not track_ids:
+                    return set()
+        return track_ids
 
     def _validate_query(self, query):
         for (_, values) in query.iteritems():
@@ -248,3 +295,69 @@ class LocalLibraryProvider(BaseLibraryProvider):
             for value in values:
                 if not value:
                     raise LookupError('Missing query')
+
+
+class LocalLibraryUpdater(BaseThread):
+    """
+    Updates the tag cache by running :command:`mopidy-scan` in a separate
+    process, and asks the core to refresh the library when done.
+
+    Unless ``rescan`` is set, only new and modified files are scanned. If
+    ``path`` is given, only the files below that path relative to the music
+    folder are scanned, and the rest of the tag cache is kept.
+    """
+
+    #: Number of lines of scanner output to log if the update fails.
+    ERROR_OUTPUT_LINES = 20
+
+    def __init__(self, core_queue, rescan=False, path=None):
+        super(LocalLibraryUpdater, self).__init__(core_queue)
+        self.name = u'LocalLibraryUpdater'
+        self.rescan = rescan
+        self.path = path
+
+    def get_command(self):
+        command = [sys.executable, '-m', 'mopidy.scanner']
+        if not self.rescan:
+            command.append('--update')
+        if self.path:
+            command.extend(['--path', self.path.encode('utf-8')])
+        return command
+
+    def get_env(self):
+        # Make sure the scanner is imported from the same Mopidy as ours
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [
+            os.path.dirname(os.path.dirname(mopidy.__file__)),
+            env.get('PYTHONPATH')]))
+        return env
+
+    def run_inside_try(self):
+        tag_cache = settings.LOCAL_TAG_CACHE_FILE
+        temp_tag_cache = tag_cache + '.tmp'
+        logger.info(u'Updating tag cache %s', tag_cache)
+        try:
+            with open(temp_tag_cache, 'w') as output:
+                errors = tempfile.TemporaryFile()
+                try:
+                    status = subprocess.call(self.get_command(),
+                        stdout=output, stderr=errors, env=self.get_env())
+                    if status != 0:
+                        errors.seek(0)
+                        error_lines = errors.read().splitlines()
+                finally:
+                    errors.close()
+            if status != 0:
+                logger.error(u'Library update failed: mopidy-scan exited '
+                    'with status %d:\n%s', status, '\n'.join(
+                        error_lines[-self.ERROR_OUTPUT_LINES:]).decode(
+                            'utf-8', 'replace'))
+                os.remove(temp_tag_cache)
+                return
+            os.rename(temp_tag_cache, tag_cache)
+        except (IOError, OSError), e:
+            logger.error(u'Library update failed: %s', e)
+            return
+        logger.info(u'Updated tag cache %s', tag_cache)
+        if self.core_queue is not None:
+            self.core_queue.put({'command': 'refresh_library'})
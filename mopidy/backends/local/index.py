@@ -0,0 +1,298 @@
+from collections import defaultdict
+import os
+
+from mopidy.utils.path import split_path, uri_to_path
+
+class LibraryIndex(object):
+    """
+    In-memory index of the tracks in a local library.
+
+    For each of the fields ``track``, ``album``, ``artist``, and ``uri`` the
+    index keeps a hash map from exact value to the tracks with that value, and
+    a trigram index over the lowercased values, used for substring searches.
+    Queries return sets of track IDs, so that multi-field queries can be
+    answered by intersecting sets. Use :meth:`tracks` or :meth:`iter_tracks`
+    to get the tracks back, in the order they were added.
+
+    The index also keeps the total playtime of the tracks, both in all and per
+    exact value, so that :meth:`count` does not have to look at the tracks.
+    The ``date`` and ``genre`` fields are only kept in the exact value maps.
+    They have few distinct values, so :meth:`search` looks through all of
+    them.
+    """
+
+    #: The fields which may be queried, in addition to ``any``.
+    FIELDS = ('track', 'album', 'artist', 'uri')
+
+    #: The fields which may only be queried by exact value.
+    EXACT_FIELDS = ('date', 'genre')
+
+    def __init__(self, tracks=None):
+        self._tracks = []
+        exact_fields = self.FIELDS + self.EXACT_FIELDS
+        self._exact = dict((f, defaultdict(set)) for f in exact_fields)
+        self._lower = dict((f, {}) for f in self.FIELDS)
+        self._trigrams = dict((f, defaultdict(set)) for f in self.FIELDS)
+        self._playtime = dict((f, defaultdict(int)) for f in exact_fields)
+        self._sorted_values = {}
+
+        #: Total length of the indexed tracks in milliseconds.
+        self.playtime = 0
+
+        for track in tracks or []:
+            self.add(track)
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def add(self, track):
+        """Add a :class:`mopidy.models.Track` to the index."""
+        track_id = len(self._tracks)
+        self._tracks.append(track)
+        length = track.length or 0
+        self.playtime += length
+        self._sorted_values.clear()
+        for field in self.EXACT_FIELDS:
+            for value in set(_field_values(track, field)):
+                self._exact[field][value].add(track_id)
+                self._playtime[field][value] += length
+        for field in self.FIELDS:
+            exact = self._exact[field]
+            lower = self._lower[field]
+            trigrams = self._trigrams[field]
+            playtime = self._playtime[field]
+            for value in set(_field_values(track, field)):
+                exact[value].add(track_id)
+                playtime[value] += length
+                lowered = value.lower()
+                if lowered not in lower:
+                    lower[lowered] = set()
+                    for trigram in _trigrams(lowered):
+                        trigrams[trigram].add(lowered)
+                lower[lowered].add(track_id)
+
+    def all(self):
+        """Return the IDs of all indexed tracks."""
+        return set(xrange(len(self._tracks)))
+
+    def count(self, field, value):
+        """
+        Return the number of tracks where ``field`` equals ``value``, and
+        their total length in milliseconds.
+
+        :param field: one of :attr:`FIELDS` or :attr:`EXACT_FIELDS`
+        :type field: string
+        :param value: the value to look for
+        :type value: string
+        :rtype: two-tuple of integers
+        """
+        self._validate_field(field, self.FIELDS + self.EXACT_FIELDS)
+        return (len(self._exact[field].get(value, ())),
+            self._playtime[field].get(value, 0))
+
+    def count_values(self, field):
+        """
+        Return the number of distinct values of ``field``.
+
+        :param field: one of :attr:`FIELDS` or :attr:`EXACT_FIELDS`
+        :type field: string
+        :rtype: integer
+        """
+        self._validate_field(field, self.FIELDS + self.EXACT_FIELDS)
+        return len(self._exact[field])
+
+    def find_exact(self, field, value):
+        """
+        Return the IDs of the tracks where ``field`` equals ``value``.
+
+        :param field: one of :attr:`FIELDS`, :attr:`EXACT_FIELDS`, or ``any``
+        :type field: string
+        :param value: the value to look for
+        :type value: string
+        :rtype: set of track IDs
+        """
+        if field == 'any':
+            return _union(self.find_exact(f, value) for f in self.FIELDS)
+        self._validate_field(field, self.FIELDS + self.EXACT_FIELDS)
+        return set(self._exact[field].get(value, ()))
+
+    def search(self, field, value):
+        """
+        Return the IDs of the tracks where ``field`` contains ``value``,
+        ignoring case.
+
+        :param field: one of :attr:`FIELDS`, :attr:`EXACT_FIELDS`, or ``any``
+        :type field: string
+        :param value: the value to look for
+        :type value: string
+        :rtype: set of track IDs
+        """
+        if field == 'any':
+            return _union(self.search(f, value) for f in self.FIELDS)
+        self._validate_field(field, self.FIELDS + self.EXACT_FIELDS)
+        query = value.lower()
+        if field in self.EXACT_FIELDS:
+            exact = self._exact[field]
+            return _union(exact[v] for v in exact if query in v.lower())
+        lower = self._lower[field]
+        if len(query) < 3:
+            candidates = lower.iterkeys()
+        else:
+            candidates = None
+            for trigram in _trigrams(query):
+                values = self._trigrams[field].get(trigram)
+                if not values:
+                    return set()
+                if candidates is None:
+                    candidates = set(values)
+                else:
+                    candidates &= values
+        return _union(lower[v] for v in candidates if query in v)
+
+    def values(self, field, track_ids=None):
+        """
+        Return the sorted distinct values of ``field``, either of all tracks,
+        or only of the tracks with the given IDs.
+
+        :param field: one of :attr:`FIELDS` or :attr:`EXACT_FIELDS`
+        :type field: string
+        :param track_ids: the tracks to get values from, or :class:`None` for
+            all tracks
+        :type track_ids: set of track IDs or :class:`None`
+        :rtype: list of strings
+        """
+        self._validate_field(field, self.FIELDS + self.EXACT_FIELDS)
+        if track_ids is None:
+            if field not in self._sorted_values:
+                self._sorted_values[field] = sorted(self._exact[field])
+            return self._sorted_values[field][:]
+        values = set()
+        for track_id in track_ids:
+            values.update(_field_values(self._tracks[track_id], field))
+        return sorted(values)
+
+    def tracks(self, track_ids):
+        """Return the tracks with the given IDs, in the order they were added."""
+        return list(self.iter_tracks(track_ids))
+
+    def iter_tracks(self, track_ids):
+        """
+        Iterate over the tracks with the given IDs, in the order they were
+        added, without building a list of the tracks.
+        """
+        for track_id in sorted(track_ids):
+            yield self._tracks[track_id]
+
+    def _validate_field(self, field, fields=FIELDS):
+        if field not in fields:
+            raise LookupError('Invalid lookup field: %s' % field)
+
+
+class DirectoryTree(object):
+    """
+    Tree of the directories in a local library, and the tracks in them.
+
+    Each directory keeps its subdirectories and tracks in hash maps, so that
+    tracks can be added and removed one at a time, and listing a directory
+    only takes time proportional to the number of entries in it.
+
+    Directories are identified by their path relative to ``music_folder``,
+    with ``''`` being the root directory.
+    """
+
+    def __init__(self, music_folder=u'', tracks=None):
+        self.music_folder = music_folder
+        self._root = _Directory(u'')
+        for track in tracks or []:
+            self.add(track)
+
+    def add(self, track):
+        """Add a :class:`mopidy.models.Track` to the tree."""
+        directory = self._root
+        for name in self._track_directory_names(track):
+            if name not in directory.directories:
+                directory.directories[name] = _Directory(
+                    directory.path and u'/'.join((directory.path, name)) or name)
+            directory = directory.directories[name]
+        directory.tracks[track.uri] = track
+
+    def remove(self, track):
+        """
+        Remove a :class:`mopidy.models.Track` from the tree, along with the
+        directories left empty.
+        """
+        parents = []
+        directory = self._root
+        for name in self._track_directory_names(track):
+            if name not in directory.directories:
+                return
+            parents.append((directory, name))
+            directory = directory.directories[name]
+        directory.tracks.pop(track.uri, None)
+        for (parent, name) in reversed(parents):
+            if parent.directories[name]:
+                break
+            del parent.directories[name]
+
+    def browse(self, path):
+        """
+        Return the subdirectories and tracks of the directory ``path``.
+
+        :param path: directory path relative to the music folder
+        :type path: string
+        :rtype: two-tuple of a sorted list of directory paths, and a list of
+            :class:`mopidy.models.Track` sorted by URI
+        """
+        directory = self._root
+        for name in split_path(path.strip(u'/')):
+            try:
+                directory = directory.directories[name]
+            except KeyError:
+                raise LookupError('%s not found.' % path)
+        return (
+            sorted(d.path for d in directory.directories.itervalues()),
+            [directory.tracks[uri] for uri in sorted(directory.tracks)])
+
+    def _track_directory_names(self, track):
+        track_path = uri_to_path(track.uri)
+        prefix = self.music_folder.rstrip(os.sep) + os.sep
+        if track_path.startswith(prefix):
+            track_path = track_path[len(prefix):]
+        return split_path(os.path.dirname(track_path))
+
+
+class _Directory(object):
+    __slots__ = ('path', 'directories', 'tracks')
+
+    def __init__(self, path):
+        self.path = path
+        self.directories = {}
+        self.tracks = {}
+
+    def __nonzero__(self):
+        return bool(self.directories or self.tracks)
+
+
+def _field_values(track, field):
+    if field == 'track':
+        values = [track.name]
+    elif field == 'album':
+        values = [track.album and track.album.name]
+    elif field == 'artist':
+        values = [artist.name for artist in track.artists]
+    elif field == 'uri':
+        values = [track.uri]
+    elif field == 'date':
+        values = [track.date and track.date.isoformat()]
+    elif field == 'genre':
+        values = [track.genre]
+    return [value for value in values if value is not None]
+
+def _trigrams(value):
+    return set(value[i:i + 3] for i in xrange(len(value) - 2))
+
+def _union(sets):
+    result = set()
+    for s in sets:
+        result |= s
+    return result
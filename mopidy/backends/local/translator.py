@@ -1,3 +1,4 @@
+import datetime
 import logging
 import os
 
@@ -54,46 +55,81 @@ def parse_m3u(file_path):
 
 def parse_mpd_tag_cache(tag_cache, music_dir=''):
     """
-    Converts a MPD tag_cache into a lists of tracks, artists and albums.
+    Converts a MPD tag_cache into a set of tracks.
+
+    The entire tag cache is kept in memory. Use :func:`iter_mpd_tag_cache` to
+    process the tracks one at a time.
+    """
+    return set(iter_mpd_tag_cache(tag_cache, music_dir))
+
+def iter_mpd_tag_cache(tag_cache, music_dir='', mtimes=None):
     """
-    tracks = set()
+    Generates the tracks of a MPD tag_cache, reading one line at a time.
+
+    Artists and albums which are equal are only created once, and shared by
+    all tracks of the tag cache.
 
+    If ``mtimes`` is a dict, the modification time of each track's file, as
+    recorded in the tag cache, is stored in it with the track URI as key.
+    """
     try:
-        with open(tag_cache) as library:
-            contents = library.read()
+        library = open(tag_cache)
     except IOError, e:
         logger.error('Could not open tag cache: %s', e)
-        return tracks
+        return
 
     current = {}
     state = None
+    cache = {}
 
-    for line in contents.split('\n'):
-        if line == 'songList begin':
-            state = 'songs'
-            continue
-        elif line == 'songList end':
-            state = None
-            continue
-        elif not state:
-            continue
+    with library:
+        for line in library:
+            if line.endswith('\n'):
+                line = line[:-1]
 
-        key, value = line.split(': ', 1)
+            if line == 'songList begin':
+                state = 'songs'
+                continue
+            elif line == 'songList end':
+                state = None
+                continue
+            elif not state:
+                continue
 
-        if key == 'key':
-            _convert_mpd_data(current, tracks, music_dir)
-            current.clear()
+            key, value = line.split(': ', 1)
 
-        current[key.lower()] = value.decode('utf-8')
+            if key == 'key' and current:
+                yield _convert_mpd_data(current, music_dir, cache, mtimes)
+                current.clear()
 
-    _convert_mpd_data(current, tracks, music_dir)
+            current[key.lower()] = value.decode('utf-8')
 
-    return tracks
+    if current:
+        yield _convert_mpd_data(current, music_dir, cache, mtimes)
 
-def _convert_mpd_data(data, tracks, music_dir):
-    if not data:
-        return
+def _intern(cache, model, **kwargs):
+    key = (model,) + tuple(sorted(kwargs.iteritems()))
+    try:
+        return cache[key]
+    except KeyError:
+        instance = cache[key] = model(**kwargs)
+        return instance
+
+def _intern_artists(cache, artists):
+    # Models keep their artists in a frozenset, which is not copied when the
+    # model is created from an existing frozenset.
+    artists = frozenset(artists)
+    return cache.setdefault(artists, artists)
+
+def _parse_date(value):
+    # MPD dates are YYYY, YYYY-MM, or YYYY-MM-DD. Missing parts default to 1.
+    try:
+        parts = [int(part) for part in value.split('-')[:3]]
+        return datetime.date(*(parts + [1] * (3 - len(parts))))
+    except (TypeError, ValueError):
+        return None
 
+def _convert_mpd_data(data, music_dir, cache, mtimes=None):
     track_kwargs = {}
     album_kwargs = {}
     artist_kwargs = {}
@@ -119,6 +155,14 @@ def _convert_mpd_data(data, tracks, music_dir):
     if 'title' in data:
         track_kwargs['name'] = data['title']
 
+    if 'genre' in data:
+        track_kwargs['genre'] = cache.setdefault(data['genre'], data['genre'])
+
+    if 'date' in data:
+        date = _parse_date(data['date'])
+        if date is not None:
+            track_kwargs['date'] = date
+
     if 'musicbrainz_trackid' in data:
         track_kwargs['musicbrainz_id'] = data['musicbrainz_trackid']
 
@@ -137,19 +181,21 @@ def _convert_mpd_data(data, tracks, music_dir):
         path = data['file']
 
     if artist_kwargs:
-        artist = Artist(**artist_kwargs)
-        track_kwargs['artists'] = [artist]
+        artist = _intern(cache, Artist, **artist_kwargs)
+        track_kwargs['artists'] = _intern_artists(cache, [artist])
 
     if albumartist_kwargs:
-        albumartist = Artist(**albumartist_kwargs)
-        album_kwargs['artists'] = [albumartist]
-    
+        albumartist = _intern(cache, Artist, **albumartist_kwargs)
+        album_kwargs['artists'] = _intern_artists(cache, [albumartist])
+
     if album_kwargs:
-        album = Album(**album_kwargs)
+        album = _intern(cache, Album, **album_kwargs)
         track_kwargs['album'] = album
 
     track_kwargs['uri'] = path_to_uri(music_dir, path)
     track_kwargs['length'] = int(data.get('time', 0)) * 1000
 
-    track = Track(**track_kwargs)
-    tracks.add(track)
+    if mtimes is not None and 'mtime' in data:
+        mtimes[track_kwargs['uri']] = int(data['mtime'])
+
+    return Track(**track_kwargs)
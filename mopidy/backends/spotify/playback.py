@@ -11,7 +11,7 @@ class SpotifyPlaybackProvider(BasePlaybackProvider):
         return self.backend.output.set_state('PAUSED')
 
     def play(self, track):
-        self.backend.output.set_state('READY')
+        self._set_state_async('READY')
         if self.backend.playback.state == self.backend.playback.PLAYING:
             self.backend.spotify.session.play(0)
         if track.uri is None:
@@ -20,8 +20,7 @@ class SpotifyPlaybackProvider(BasePlaybackProvider):
             self.backend.spotify.session.load(
                 Link.from_string(track.uri).as_track())
             self.backend.spotify.session.play(1)
-            self.backend.output.set_state('PLAYING')
-            return True
+            return self.backend.output.set_state('PLAYING')
         except SpotifyError as e:
             logger.warning('Play %s failed: %s', track.uri, e)
             return False
@@ -30,12 +29,20 @@ class SpotifyPlaybackProvider(BasePlaybackProvider):
         return self.seek(self.backend.playback.time_position)
 
     def seek(self, time_position):
-        self.backend.output.set_state('READY')
+        self._set_state_async('READY')
         self.backend.spotify.session.seek(time_position)
-        self.backend.output.set_state('PLAYING')
-        return True
+        return self.backend.output.set_state('PLAYING')
 
     def stop(self):
         result = self.backend.output.set_state('READY')
         self.backend.spotify.session.play(0)
         return result
+
+    def _set_state_async(self, state):
+        # The audio data from libspotify is sent through the same output
+        # queue, so it is handled after the state change without waiting. The
+        # state change can not be batched with the following PLAYING, as it
+        # must flush the output before libspotify starts delivering data for
+        # the new track or position.
+        self.backend.output.send_commands(
+            [{'command': 'set_state', 'state': state}])
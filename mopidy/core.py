@@ -96,11 +96,16 @@ class CoreProcess(BaseThread):
             for frontend in self.frontends:
                 frontend.process_message(message)
         elif message['command'] == 'end_of_track':
-            self.backend.playback.on_end_of_track()
+            self.backend.playback.on_end_of_track(message.get('next_uri'))
+        elif message['command'] == 'time_position':
+            self.backend.playback.on_time_position(
+                message['position'], message['time'], message.get('serial'))
         elif message['command'] == 'stop_playback':
             self.backend.playback.stop()
         elif message['command'] == 'set_stored_playlists':
             self.backend.stored_playlists.playlists = message['playlists']
+        elif message['command'] == 'refresh_library':
+            self.backend.library.refresh()
         else:
             logger.warning(u'Cannot handle message: %s', message)
 
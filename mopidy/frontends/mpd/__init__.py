@@ -3,7 +3,7 @@ import logging
 from mopidy.frontends.base import BaseFrontend
 from mopidy.frontends.mpd.dispatcher import MpdDispatcher
 from mopidy.frontends.mpd.thread import MpdThread
-from mopidy.utils.process import unpickle_connection
+from mopidy.utils.process import get_reply_channel
 
 logger = logging.getLogger('mopidy.frontends.mpd')
 
@@ -43,7 +43,15 @@ class MpdFrontend(BaseFrontend):
             u'Message recipient must be "frontend".'
         if message['command'] == 'mpd_request':
             response = self.dispatcher.handle_request(message['request'])
-            connection = unpickle_connection(message['reply_to'])
-            connection.send(response)
+            try:
+                reply_channel = get_reply_channel(message['reply_to'])
+            except KeyError:
+                logger.debug(u'Client disconnected before MPD request '
+                    'was handled: %s', message['request'])
+                return
+            reply_channel.send(response)
+        elif message['command'] == 'subsystem_changed':
+            if self.thread is not None and self.thread.server is not None:
+                self.thread.server.subsystem_changed(message['subsystem'])
         else:
             pass # Ignore messages for other frontends
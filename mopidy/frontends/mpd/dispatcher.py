@@ -1,4 +1,5 @@
 import re
+import time
 
 from mopidy.frontends.mpd.exceptions import (MpdAckError, MpdArgError,
     MpdUnknownCommand)
@@ -12,6 +13,10 @@ from mopidy.frontends.mpd.protocol import (audio_output, command_list,
 # pylint: enable = W0611
 from mopidy.utils import flatten
 
+#: Matches the command word of a handler pattern, if the pattern can only match
+#: requests whose first space separated word is exactly that command word.
+COMMAND_WORD_PATTERN = re.compile(r'^\^?(?P<command>[a-z_]*)(?:\$| |\( )')
+
 class MpdDispatcher(object):
     """
     Dispatches MPD requests to the correct handler.
@@ -19,6 +24,7 @@ class MpdDispatcher(object):
 
     def __init__(self, backend=None):
         self.backend = backend
+        self.start_time = time.time()
         self.command_list = False
         self.command_list_ok = False
 
@@ -42,11 +48,11 @@ class MpdDispatcher(object):
 
     def find_handler(self, request):
         """Find the correct handler for a request."""
-        for pattern in request_handlers:
-            matches = re.match(pattern, request)
+        command = request.split(' ')[0]
+        for (regexp, pattern) in _pattern_table.candidates(command):
+            matches = regexp.match(request)
             if matches is not None:
                 return (request_handlers[pattern], matches.groupdict())
-        command = request.split(' ')[0]
         if command in mpd_commands:
             raise MpdArgError(u'incorrect arguments', command=command)
         raise MpdUnknownCommand(command=command)
@@ -61,7 +67,9 @@ class MpdDispatcher(object):
         elif not isinstance(result, list):
             result = [result]
         for line in flatten(result):
-            if isinstance(line, dict):
+            if isinstance(line, basestring):
+                response.append(line)
+            elif isinstance(line, dict):
                 for (key, value) in line.items():
                     response.append(u'%s: %s' % (key, value))
             elif isinstance(line, tuple):
@@ -72,3 +80,57 @@ class MpdDispatcher(object):
         if add_ok and (not response or not response[-1].startswith(u'ACK')):
             response.append(u'OK')
         return response
+
+
+class PatternTable(object):
+    """
+    Precompiled request handler patterns, grouped by command word.
+
+    Only the patterns registered for a request's command word, and the few
+    patterns we cannot tell the command word of, need to be tried for each
+    request. Within a group the patterns keep the order of
+    :attr:`mopidy.frontends.mpd.protocol.request_handlers`, so the first
+    matching pattern is the same as with a linear scan over all patterns.
+
+    The table is rebuilt if handlers are added to ``request_handlers`` after
+    it was built.
+    """
+
+    def __init__(self):
+        self._size = None
+        self._by_command = {}
+        self._fallback = []
+
+    def candidates(self, command):
+        """
+        Get the patterns which may match a request starting with ``command``.
+
+        :param command: the first word of the request
+        :type command: string
+        :rtype: list of two-tuples of (compiled pattern, pattern string)
+        """
+        if self._size != len(request_handlers):
+            self.build()
+        return self._by_command.get(command, self._fallback)
+
+    def build(self):
+        """Build the table from the currently registered handlers."""
+        entries = []
+        for pattern in request_handlers:
+            match = COMMAND_WORD_PATTERN.match(pattern)
+            if match is not None:
+                command = match.group('command')
+            else:
+                command = None
+            entries.append((command, re.compile(pattern), pattern))
+        self._by_command = {}
+        for command in set([e[0] for e in entries if e[0] is not None]):
+            self._by_command[command] = [(regexp, pattern)
+                for (key, regexp, pattern) in entries
+                if key == command or key is None]
+        self._fallback = [(regexp, pattern)
+            for (key, regexp, pattern) in entries if key is None]
+        self._size = len(request_handlers)
+
+_pattern_table = PatternTable()
+_pattern_table.build()
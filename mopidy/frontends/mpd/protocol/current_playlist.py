@@ -71,13 +71,8 @@ def delete_range(frontend, start, end=None):
     start = int(start)
     if end is not None:
         end = int(end)
-    else:
-        end = len(frontend.backend.current_playlist.tracks)
-    cp_tracks = frontend.backend.current_playlist.cp_tracks[start:end]
-    if not cp_tracks:
+    if not frontend.backend.current_playlist.remove_slice(start, end):
         raise MpdArgError(u'Bad song index', command=u'delete')
-    for (cpid, _) in cp_tracks:
-        frontend.backend.current_playlist.remove(cpid=cpid)
 
 @handle_pattern(r'^delete "(?P<songpos>\d+)"$')
 def delete_songpos(frontend, songpos):
@@ -155,7 +150,7 @@ def moveid(frontend, cpid, to):
     cpid = int(cpid)
     to = int(to)
     cp_track = frontend.backend.current_playlist.get(cpid=cpid)
-    position = frontend.backend.current_playlist.cp_tracks.index(cp_track)
+    position = frontend.backend.current_playlist.index(cp_track)
     frontend.backend.current_playlist.move(position, position + 1, to)
 
 @handle_pattern(r'^playlist$')
@@ -191,8 +186,7 @@ def playlistfind(frontend, tag, needle):
         try:
             cp_track = frontend.backend.current_playlist.get(uri=needle)
             (cpid, track) = cp_track
-            position = frontend.backend.current_playlist.cp_tracks.index(
-                cp_track)
+            position = frontend.backend.current_playlist.index(cp_track)
             return track.mpd_format(cpid=cpid, position=position)
         except LookupError:
             return None
@@ -212,8 +206,7 @@ def playlistid(frontend, cpid=None):
         try:
             cpid = int(cpid)
             cp_track = frontend.backend.current_playlist.get(cpid=cpid)
-            position = frontend.backend.current_playlist.cp_tracks.index(
-                cp_track)
+            position = frontend.backend.current_playlist.index(cp_track)
             return cp_track[1].mpd_format(position=position, cpid=cpid)
         except LookupError:
             raise MpdNoExistError(u'No such song', command=u'playlistid')
@@ -296,9 +289,14 @@ def plchanges(frontend, version):
 
     - Calls ``plchanges "-1"`` two times per second to get the entire playlist.
     """
-    # XXX Naive implementation that returns all tracks as changed
-    if int(version) < frontend.backend.current_playlist.version:
+    positions = frontend.backend.current_playlist.changed_positions(
+        int(version))
+    if positions is None:
         return frontend.backend.current_playlist.mpd_format()
+    cp_tracks = frontend.backend.current_playlist.cp_tracks
+    return [cp_tracks[position][1].mpd_format(
+            position=position, cpid=cp_tracks[position][0])
+        for position in positions]
 
 @handle_pattern(r'^plchangesposid "(?P<version>\d+)"$')
 def plchangesposid(frontend, version):
@@ -314,14 +312,16 @@ def plchangesposid(frontend, version):
         To detect songs that were deleted at the end of the playlist, use
         ``playlistlength`` returned by status command.
     """
-    # XXX Naive implementation that returns all tracks as changed
-    if int(version) != frontend.backend.current_playlist.version:
-        result = []
-        for (position, (cpid, _)) in enumerate(
-                frontend.backend.current_playlist.cp_tracks):
-            result.append((u'cpos', position))
-            result.append((u'Id', cpid))
-        return result
+    positions = frontend.backend.current_playlist.changed_positions(
+        int(version))
+    cp_tracks = frontend.backend.current_playlist.cp_tracks
+    if positions is None:
+        positions = range(len(cp_tracks))
+    result = []
+    for position in positions:
+        result.append((u'cpos', position))
+        result.append((u'Id', cp_tracks[position][0]))
+    return result
 
 @handle_pattern(r'^shuffle$')
 @handle_pattern(r'^shuffle "(?P<start>\d+):(?P<end>\d+)*"$')
@@ -351,7 +351,7 @@ def swap(frontend, songpos1, songpos2):
     """
     songpos1 = int(songpos1)
     songpos2 = int(songpos2)
-    tracks = frontend.backend.current_playlist.tracks
+    tracks = list(frontend.backend.current_playlist.tracks)
     song1 = tracks[songpos1]
     song2 = tracks[songpos2]
     del tracks[songpos1]
@@ -374,6 +374,6 @@ def swapid(frontend, cpid1, cpid2):
     cpid2 = int(cpid2)
     cp_track1 = frontend.backend.current_playlist.get(cpid=cpid1)
     cp_track2 = frontend.backend.current_playlist.get(cpid=cpid2)
-    position1 = frontend.backend.current_playlist.cp_tracks.index(cp_track1)
-    position2 = frontend.backend.current_playlist.cp_tracks.index(cp_track2)
+    position1 = frontend.backend.current_playlist.index(cp_track1)
+    position2 = frontend.backend.current_playlist.index(cp_track2)
     swap(frontend, position1, position2)
@@ -2,25 +2,37 @@ import re
 import shlex
 
 from mopidy.frontends.mpd.protocol import handle_pattern, stored_playlists
-from mopidy.frontends.mpd.exceptions import MpdArgError, MpdNotImplemented
+from mopidy.frontends.mpd.exceptions import MpdArgError, MpdNoExistError
+from mopidy.frontends.mpd.translator import (track_iter_to_mpd_format,
+    track_to_mpd_lines)
+
+def _query_field(tag):
+    """
+    Converts a MPD tag name to the matching Mopidy query field.
+    """
+    field = tag.lower()
+    if field == u'title':
+        field = u'track'
+    elif field == u'filename':
+        field = u'uri'
+    return str(field) # Needed for kwargs keys on OS X and Windows
 
 def _build_query(mpd_query):
     """
     Parses a MPD query string and converts it to the Mopidy query format.
     """
     query_pattern = (
-        r'"?(?:[Aa]lbum|[Aa]rtist|[Ff]ilename|[Tt]itle|[Aa]ny)"? "[^"]+"')
+        r'"?(?:[Aa]lbum|[Aa]rtist|[Dd]ate|[Ff]ilename|[Tt]itle|[Aa]ny)"? '
+        r'"[^"]+"')
     query_parts = re.findall(query_pattern, mpd_query)
     query_part_pattern = (
-        r'"?(?P<field>([Aa]lbum|[Aa]rtist|[Ff]ilename|[Tt]itle|[Aa]ny))"? '
+        r'"?(?P<field>([Aa]lbum|[Aa]rtist|[Dd]ate|[Ff]ilename|[Tt]itle|'
+        r'[Aa]ny))"? '
         r'"(?P<what>[^"]+)"')
     query = {}
     for query_part in query_parts:
         m = re.match(query_part_pattern, query_part)
-        field = m.groupdict()['field'].lower()
-        if field == u'title':
-            field = u'track'
-        field = str(field) # Needed for kwargs keys on OS X and Windows
+        field = _query_field(m.groupdict()['field'])
         what = m.groupdict()['what'].lower()
         if field in query:
             query[field].append(what)
@@ -28,6 +40,42 @@ def _build_query(mpd_query):
             query[field] = [what]
     return query
 
+def _browse(frontend, uri, command):
+    """
+    Lists the directory ``uri`` of the library, as
+    :meth:`mopidy.backends.base.LibraryController.browse`.
+    """
+    try:
+        return frontend.backend.library.browse(uri or u'')
+    except LookupError:
+        raise MpdNoExistError(u'directory or file not found', command=command)
+
+def _listall(frontend, path, info, result):
+    """
+    Adds the contents of the directory ``path`` and all its subdirectories to
+    ``result``. Only the file names are added, unless ``info`` is set.
+    """
+    (directories, tracks) = frontend.backend.library.browse(path)
+    for directory in directories:
+        result.append((u'directory', directory))
+        _listall(frontend, directory, info, result)
+    for track in tracks:
+        if info:
+            result.append(track_to_mpd_lines(track))
+        else:
+            result.append((u'file', track.uri))
+    return result
+
+def _window_to_range(window_start, window_end):
+    """
+    Converts the ``START:END`` of a ``window`` argument to the ``start`` and
+    ``end`` arguments of :func:`mopidy.frontends.mpd.translator.
+    track_iter_to_mpd_format`.
+    """
+    start = int(window_start) if window_start is not None else 0
+    end = int(window_end) if window_end is not None else None
+    return (start, end)
+
 @handle_pattern(r'^count "(?P<tag>[^"]+)" "(?P<needle>[^"]*)"$')
 def count(frontend, tag, needle):
     """
@@ -38,12 +86,19 @@ def count(frontend, tag, needle):
         Counts the number of songs and their total playtime in the db
         matching ``TAG`` exactly.
     """
-    return [('songs', 0), ('playtime', 0)] # TODO
+    try:
+        result = frontend.backend.library.count(
+            **{_query_field(tag): [needle]})
+    except LookupError:
+        raise MpdArgError(u'incorrect arguments', command=u'count')
+    return [('songs', result['songs']),
+        ('playtime', result['playtime'] // 1000)]
 
 @handle_pattern(r'^find '
      r'(?P<mpd_query>("?([Aa]lbum|[Aa]rtist|[Dd]ate|[Ff]ilename|'
-     r'[Tt]itle|[Aa]ny)"? "[^"]+"\s?)+)$')
-def find(frontend, mpd_query):
+     r'[Tt]itle|[Aa]ny)"? "[^"]+"\s?)+)'
+     r'(window "?(?P<window_start>\d+):(?P<window_end>\d+)?"?)?$')
+def find(frontend, mpd_query, window_start=None, window_end=None):
     """
     *musicpd.org, music database section:*
 
@@ -66,14 +121,24 @@ def find(frontend, mpd_query):
     *ncmpcpp:*
 
     - also uses the search type "date".
+
+    *Clarifications:*
+
+    - ``window START:END`` at the end of the query, as supported by newer
+      versions of MPD, limits the response to the given range of the
+      results. The results are iterated over lazily, so that only the tracks
+      up to the end of the window are looked at, and only the tracks in the
+      window are formatted.
     """
     query = _build_query(mpd_query)
-    return frontend.backend.library.find_exact(**query).mpd_format()
+    (start, end) = _window_to_range(window_start, window_end)
+    return track_iter_to_mpd_format(
+        frontend.backend.library.iter_find_exact(**query), start, end)
 
 @handle_pattern(r'^findadd '
-     r'(?P<query>("?([Aa]lbum|[Aa]rtist|[Ff]ilename|[Tt]itle|[Aa]ny)"? '
-     '"[^"]+"\s?)+)$')
-def findadd(frontend, query):
+     r'(?P<mpd_query>("?([Aa]lbum|[Aa]rtist|[Dd]ate|[Ff]ilename|'
+     r'[Tt]itle|[Aa]ny)"? "[^"]+"\s?)+)$')
+def findadd(frontend, mpd_query):
     """
     *musicpd.org, music database section:*
 
@@ -83,8 +148,9 @@ def findadd(frontend, query):
         current playlist. ``TYPE`` can be any tag supported by MPD.
         ``WHAT`` is what to find.
     """
-    # TODO Add result to current playlist
-    #result = frontend.find(query)
+    query = _build_query(mpd_query)
+    playlist = frontend.backend.library.find_exact(**query)
+    frontend.backend.current_playlist.append(playlist.tracks)
 
 @handle_pattern(r'^list "?(?P<field>([Aa]rtist|[Aa]lbum|[Dd]ate|[Gg]enre))"?'
     '( (?P<mpd_query>.*))?$')
@@ -174,14 +240,9 @@ def list_(frontend, field, mpd_query=None):
     """
     field = field.lower()
     query = _list_build_query(field, mpd_query)
-    if field == u'artist':
-        return _list_artist(frontend, query)
-    elif field == u'album':
-        return _list_album(frontend, query)
-    elif field == u'date':
-        return _list_date(frontend, query)
-    elif field == u'genre':
-        pass # TODO We don't have genre in our internal data structures yet
+    tag = field.capitalize()
+    return [(tag, value)
+        for value in frontend.backend.library.list_values(field, **query)]
 
 def _list_build_query(field, mpd_query):
     """Converts a ``list`` query to a Mopidy query."""
@@ -213,32 +274,9 @@ def _list_build_query(field, mpd_query):
     else:
         raise MpdArgError(u'not able to parse args', command=u'list')
 
-def _list_artist(frontend, query):
-    artists = set()
-    playlist = frontend.backend.library.find_exact(**query)
-    for track in playlist.tracks:
-        for artist in track.artists:
-            artists.add((u'Artist', artist.name))
-    return artists
-
-def _list_album(frontend, query):
-    albums = set()
-    playlist = frontend.backend.library.find_exact(**query)
-    for track in playlist.tracks:
-        if track.album is not None:
-            albums.add((u'Album', track.album.name))
-    return albums
-
-def _list_date(frontend, query):
-    dates = set()
-    playlist = frontend.backend.library.find_exact(**query)
-    for track in playlist.tracks:
-        if track.date is not None:
-            dates.add((u'Date', track.date.strftime('%Y-%m-%d')))
-    return dates
-
-@handle_pattern(r'^listall "(?P<uri>[^"]+)"')
-def listall(frontend, uri):
+@handle_pattern(r'^listall$')
+@handle_pattern(r'^listall "(?P<uri>[^"]*)"$')
+def listall(frontend, uri=None):
     """
     *musicpd.org, music database section:*
 
@@ -246,10 +284,12 @@ def listall(frontend, uri):
 
         Lists all songs and directories in ``URI``.
     """
-    raise MpdNotImplemented # TODO
+    _browse(frontend, uri, u'listall')
+    return _listall(frontend, uri or u'', False, [])
 
-@handle_pattern(r'^listallinfo "(?P<uri>[^"]+)"')
-def listallinfo(frontend, uri):
+@handle_pattern(r'^listallinfo$')
+@handle_pattern(r'^listallinfo "(?P<uri>[^"]*)"$')
+def listallinfo(frontend, uri=None):
     """
     *musicpd.org, music database section:*
 
@@ -258,7 +298,8 @@ def listallinfo(frontend, uri):
         Same as ``listall``, except it also returns metadata info in the
         same format as ``lsinfo``.
     """
-    raise MpdNotImplemented # TODO
+    _browse(frontend, uri, u'listallinfo')
+    return _listall(frontend, uri or u'', True, [])
 
 @handle_pattern(r'^lsinfo$')
 @handle_pattern(r'^lsinfo "(?P<uri>[^"]*)"$')
@@ -278,9 +319,12 @@ def lsinfo(frontend, uri=None):
     directories located at the root level, for both ``lsinfo``, ``lsinfo
     ""``, and ``lsinfo "/"``.
     """
+    (directories, tracks) = _browse(frontend, uri, u'lsinfo')
+    result = [(u'directory', directory) for directory in directories]
+    result.extend(track_to_mpd_lines(track) for track in tracks)
     if uri is None or uri == u'/' or uri == u'':
-        return stored_playlists.listplaylists(frontend)
-    raise MpdNotImplemented # TODO
+        result.extend(stored_playlists.listplaylists(frontend))
+    return result
 
 @handle_pattern(r'^rescan( "(?P<uri>[^"]+)")*$')
 def rescan(frontend, uri=None):
@@ -295,8 +339,9 @@ def rescan(frontend, uri=None):
 
 @handle_pattern(r'^search '
      r'(?P<mpd_query>("?([Aa]lbum|[Aa]rtist|[Dd]ate|[Ff]ilename|'
-     r'[Tt]itle|[Aa]ny)"? "[^"]+"\s?)+)$')
-def search(frontend, mpd_query):
+     r'[Tt]itle|[Aa]ny)"? "[^"]+"\s?)+)'
+     r'(window "?(?P<window_start>\d+):(?P<window_end>\d+)?"?)?$')
+def search(frontend, mpd_query, window_start=None, window_end=None):
     """
     *musicpd.org, music database section:*
 
@@ -322,9 +367,34 @@ def search(frontend, mpd_query):
     *ncmpcpp:*
 
     - also uses the search type "date".
+
+    *Clarifications:*
+
+    - ``window START:END`` works like for :func:`find`.
+    """
+    query = _build_query(mpd_query)
+    (start, end) = _window_to_range(window_start, window_end)
+    return track_iter_to_mpd_format(
+        frontend.backend.library.iter_search(**query), start, end)
+
+@handle_pattern(r'^searchadd '
+     r'(?P<mpd_query>("?([Aa]lbum|[Aa]rtist|[Dd]ate|[Ff]ilename|'
+     r'[Tt]itle|[Aa]ny)"? "[^"]+"\s?)+)$')
+def searchadd(frontend, mpd_query):
+    """
+    *musicpd.org, music database section:*
+
+        ``searchadd {TYPE} {WHAT} [...]``
+
+        Searches for any song that contains ``WHAT`` in tag ``TYPE`` and adds
+        them to current playlist.
+
+        Parameters have the same meaning as for ``find``, except that search
+        is not case sensitive.
     """
     query = _build_query(mpd_query)
-    return frontend.backend.library.search(**query).mpd_format()
+    playlist = frontend.backend.library.search(**query)
+    frontend.backend.current_playlist.append(playlist.tracks)
 
 @handle_pattern(r'^update( "(?P<uri>[^"]+)")*$')
 def update(frontend, uri=None, rescan_unmodified_files=False):
@@ -342,5 +412,15 @@ def update(frontend, uri=None, rescan_unmodified_files=False):
         Prints ``updating_db: JOBID`` where ``JOBID`` is a positive number
         identifying the update job. You can read the current job id in the
         ``status`` response.
+
+    *Clarifications:*
+
+    - Unmodified files are only scanned again by ``rescan``.
     """
-    return {'updating_db': 0} # TODO
+    command = rescan_unmodified_files and u'rescan' or u'update'
+    try:
+        job_id = frontend.backend.library.update(uri,
+            rescan=rescan_unmodified_files)
+    except LookupError:
+        raise MpdNoExistError(u'directory or file not found', command=command)
+    return {'updating_db': job_id}
@@ -1,6 +1,13 @@
+import time
+
 from mopidy.frontends.mpd.protocol import handle_pattern
 from mopidy.frontends.mpd.exceptions import MpdNotImplemented
 
+#: The subsystems clients can wait for changes in using ``idle``, in the order
+#: the original MPD server reports changes.
+SUBSYSTEMS = [u'database', u'update', u'stored_playlist', u'playlist',
+    u'player', u'mixer', u'output', u'options']
+
 @handle_pattern(r'^clearerror$')
 def clearerror(frontend):
     """
@@ -62,13 +69,17 @@ def idle(frontend, subsystems=None):
         If the optional ``SUBSYSTEMS`` argument is used, MPD will only send
         notifications when something changed in one of the specified
         subsystems.
+
+    As ``idle`` holds the connection open until something changes, it is
+    handled by :class:`mopidy.frontends.mpd.session.MpdSession` and never
+    reaches the dispatcher when used through the MPD server.
     """
-    pass # TODO
+    pass
 
 @handle_pattern(r'^noidle$')
 def noidle(frontend):
-    """See :meth:`_status_idle`."""
-    pass # TODO
+    """See :meth:`idle`."""
+    pass
 
 @handle_pattern(r'^stats$')
 def stats(frontend):
@@ -86,15 +97,15 @@ def stats(frontend):
         - ``db_update``: last db update in UNIX time
         - ``playtime``: time length of music played
     """
+    library_stats = frontend.backend.library.stats()
     return {
-        'artists': 0, # TODO
-        'albums': 0, # TODO
-        'songs': 0, # TODO
-        # TODO Does not work after multiprocessing branch merge
-        'uptime': 0, # frontend.session.stats_uptime(),
-        'db_playtime': 0, # TODO
-        'db_update': 0, # TODO
-        'playtime': 0, # TODO
+        'artists': library_stats['artists'],
+        'albums': library_stats['albums'],
+        'songs': library_stats['songs'],
+        'uptime': int(time.time() - frontend.start_time),
+        'db_playtime': library_stats['playtime'] // 1000,
+        'db_update': library_stats['updated'] or 0,
+        'playtime': frontend.backend.playback.total_play_time // 1000,
     }
 
 @handle_pattern(r'^status$')
@@ -1,4 +1,5 @@
 import asyncore
+import collections
 import logging
 import re
 import socket
@@ -13,11 +14,18 @@ class MpdServer(asyncore.dispatcher):
     """
     The MPD server. Creates a :class:`mopidy.frontends.mpd.session.MpdSession`
     for each client connection.
+
+    **Settings:**
+
+    - :attr:`mopidy.settings.MPD_SERVER_HOSTNAME`
+    - :attr:`mopidy.settings.MPD_SERVER_LISTEN_BACKLOG`
+    - :attr:`mopidy.settings.MPD_SERVER_PORT`
     """
 
     def __init__(self, core_queue):
         asyncore.dispatcher.__init__(self)
         self.core_queue = core_queue
+        self.waker = None
 
     def start(self):
         """Start MPD server."""
@@ -34,7 +42,8 @@ class MpdServer(asyncore.dispatcher):
             port = settings.MPD_SERVER_PORT
             logger.debug(u'MPD server is binding to [%s]:%s', hostname, port)
             self.bind((hostname, port))
-            self.listen(1)
+            self.listen(settings.MPD_SERVER_LISTEN_BACKLOG)
+            self.waker = MpdWaker()
             logger.info(u'MPD server running at [%s]:%s',
                 self._format_hostname(settings.MPD_SERVER_HOSTNAME),
                 settings.MPD_SERVER_PORT)
@@ -54,8 +63,82 @@ class MpdServer(asyncore.dispatcher):
         """Handle end of client connection."""
         self.close()
 
+    def subsystem_changed(self, subsystem):
+        """
+        Notify all client sessions that a subsystem has changed. May be called
+        from any thread.
+
+        :param subsystem: the name of the changed MPD subsystem
+        :type subsystem: string
+        """
+        self.wake_up(lambda: self._notify_sessions(subsystem))
+
+    def _notify_sessions(self, subsystem):
+        for channel in asyncore.socket_map.values():
+            if isinstance(channel, MpdSession):
+                channel.on_subsystem_changed(subsystem)
+
+    def wake_up(self, callback):
+        """
+        Wake up the server's event loop and call the callback from it. May be
+        called from any thread.
+
+        :param callback: called without arguments in the event loop thread
+        :type callback: callable
+        """
+        self.waker.wake_up(callback)
+
     def _format_hostname(self, hostname):
         if (socket.has_ipv6
             and re.match('\d+.\d+.\d+.\d+', hostname) is not None):
             hostname = '::ffff:%s' % hostname
         return hostname
+
+
+class MpdWaker(asyncore.dispatcher):
+    """
+    Wakes up the event loop when other threads need to hand over work to it,
+    e.g. when the core has replied to a session's request. Thus, sessions
+    never block the event loop while waiting for replies.
+
+    :meth:`wake_up` writes a byte to one end of a socket pair, and the event
+    loop calls :meth:`handle_read` when the other end becomes readable.
+    """
+
+    def __init__(self):
+        (reader, self._writer) = _create_socket_pair()
+        self._writer.setblocking(0)
+        asyncore.dispatcher.__init__(self, sock=reader)
+        self._callbacks = collections.deque()
+
+    def wake_up(self, callback):
+        """Wake up the event loop and call the callback from it."""
+        self._callbacks.append(callback)
+        try:
+            self._writer.send('x')
+        except socket.error:
+            pass # The socket buffer is full, so the loop will wake up anyway
+
+    def handle_read(self):
+        """Call the callbacks of all wake ups since the last read."""
+        try:
+            self.recv(4096)
+        except socket.error:
+            pass
+        while self._callbacks:
+            self._callbacks.popleft()()
+
+    def writable(self):
+        return False
+
+def _create_socket_pair():
+    if hasattr(socket, 'socketpair'):
+        return socket.socketpair()
+    # Windows does not have socket.socketpair()
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    writer = socket.create_connection(listener.getsockname())
+    (reader, _) = listener.accept()
+    listener.close()
+    return (reader, writer)
@@ -1,20 +1,59 @@
 import asynchat
+import collections
 import logging
-import multiprocessing
 
 from mopidy import settings
+from mopidy.frontends.mpd.exceptions import MpdArgError
 from mopidy.frontends.mpd.protocol import ENCODING, LINE_TERMINATOR, VERSION
+from mopidy.frontends.mpd.protocol.status import SUBSYSTEMS
 from mopidy.utils.log import indent
-from mopidy.utils.process import pickle_connection
+from mopidy.utils.process import ReplyChannel
 
 logger = logging.getLogger('mopidy.frontends.mpd.session')
 
+class ResponseProducer(object):
+    """
+    Producer for :meth:`asynchat.async_chat.push_with_producer`, which encodes
+    the lines of a response a chunk at a time, as the client receives them.
+
+    Thus, large responses are not joined and encoded into one big string, and
+    sending can start before the entire response is encoded.
+    """
+
+    #: Number of lines encoded for each call to :meth:`more`.
+    lines_per_chunk = 512
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.position = 0
+
+    def more(self):
+        """Get the next chunk of the response, or an empty string when done."""
+        lines = self.lines[self.position:self.position + self.lines_per_chunk]
+        if not lines:
+            return ''
+        self.position += len(lines)
+        lines.append(u'')
+        return LINE_TERMINATOR.join(lines).encode(ENCODING)
+
+
 class MpdSession(asynchat.async_chat):
     """
     The MPD client session. Keeps track of a single client and passes its
     MPD requests to the dispatcher.
+
+    Requests are passed on one at a time, in the order they were received.
+    While waiting for the core to reply, the session does not block the event
+    loop, so other sessions are served in the meantime.
+
+    The session also implements ``idle`` and ``noidle``, as it keeps track of
+    which subsystems have changed since the client last was notified.
     """
 
+    #: Bytes to send to the client at a time. Chunks from the
+    #: :class:`ResponseProducer` should usually fit.
+    ac_out_buffer_size = 32 * 1024
+
     def __init__(self, server, client_socket, client_socket_address,
             core_queue):
         asynchat.async_chat.__init__(self, sock=client_socket)
@@ -24,6 +63,11 @@ class MpdSession(asynchat.async_chat):
         self.core_queue = core_queue
         self.input_buffer = []
         self.authenticated = False
+        self.reply_channel = ReplyChannel(on_send=self.on_reply)
+        self.pending_requests = collections.deque()
+        self.waiting_for_reply = False
+        self.changed_subsystems = set()
+        self.idle_subsystems = None
         self.set_terminator(LINE_TERMINATOR.encode(ENCODING))
 
     def start(self):
@@ -47,35 +91,115 @@ class MpdSession(asynchat.async_chat):
             logger.warning(u'Received invalid data: %s', e)
 
     def handle_request(self, request):
-        """Handle request by sending it to the MPD frontend."""
-        if not self.authenticated:
-            (self.authenticated, response) = self.check_password(request)
-            if response is not None:
-                self.send_response(response)
+        """Handle request by queueing it for the MPD frontend."""
+        self.pending_requests.append(request)
+        self.process_pending_requests()
+
+    def process_pending_requests(self):
+        """Send pending requests to the MPD frontend, one at a time."""
+        while self.pending_requests and not self.waiting_for_reply:
+            request = self.pending_requests.popleft()
+            if not self.authenticated:
+                (self.authenticated, response) = self.check_password(request)
+                if response is not None:
+                    self.send_response(response)
+                    continue
+            if self.idle_subsystems is not None:
+                if request != u'noidle':
+                    logger.warning(u'Client [%s]:%s sent "%s" while idle, '
+                        'closing connection', self.client_address,
+                        self.client_port, request)
+                    self.close()
+                    return
+                self.send_idle_response()
+                continue
+            if request == u'idle' or request.startswith(u'idle '):
+                self.start_idle(request)
+                continue
+            if request == u'noidle':
+                continue # Ignored when not idle, like the original MPD server
+            self.waiting_for_reply = True
+            self.core_queue.put({
+                'to': 'frontend',
+                'command': 'mpd_request',
+                'request': request,
+                'reply_to': self.reply_channel.id,
+            })
+
+    def start_idle(self, request):
+        """Start waiting for changes in the subsystems given in the request."""
+        subsystems = [s.strip('"') for s in request.split(' ')[1:] if s]
+        for subsystem in subsystems:
+            if subsystem not in SUBSYSTEMS:
+                self.send_response(MpdArgError(
+                    u'Unrecognized idle event: %s' % subsystem,
+                    command=u'idle').get_mpd_ack())
                 return
-        my_end, other_end = multiprocessing.Pipe()
-        self.core_queue.put({
-            'to': 'frontend',
-            'command': 'mpd_request',
-            'request': request,
-            'reply_to': pickle_connection(other_end),
-        })
-        my_end.poll(None)
-        response = my_end.recv()
-        if response is not None:
-            self.handle_response(response)
+        self.idle_subsystems = set(subsystems or SUBSYSTEMS)
+        if self.changed_subsystems & self.idle_subsystems:
+            self.send_idle_response()
+
+    def send_idle_response(self):
+        """
+        Report the changed subsystems the client is waiting for and leave
+        idle mode. Changes in other subsystems are forgotten.
+        """
+        response = [u'changed: %s' % subsystem for subsystem in SUBSYSTEMS
+            if subsystem in self.changed_subsystems & self.idle_subsystems]
+        response.append(u'OK')
+        self.changed_subsystems = set()
+        self.idle_subsystems = None
+        self.send_response(LINE_TERMINATOR.join(response))
+
+    def on_subsystem_changed(self, subsystem):
+        """
+        Called in the event loop thread when a subsystem has changed. If the
+        client is waiting for changes in the subsystem, it is notified.
+        """
+        self.changed_subsystems.add(subsystem)
+        if (self.idle_subsystems is not None
+                and subsystem in self.idle_subsystems):
+            self.send_idle_response()
+            self.process_pending_requests()
+
+    def on_reply(self):
+        """
+        Called by the core thread when it has replied to a request. Wakes up
+        the event loop, which then calls :meth:`handle_replies`.
+        """
+        self.server.wake_up(self.handle_replies)
+
+    def handle_replies(self):
+        """Handle replies from the MPD frontend and resume processing."""
+        if not self.connected:
+            return
+        while self.reply_channel.poll():
+            response = self.reply_channel.recv()
+            self.waiting_for_reply = False
+            if response is not None:
+                self.handle_response(response)
+        self.process_pending_requests()
+
+    def handle_close(self):
+        """Handle end of client connection."""
+        self.reply_channel.close()
+        self.close()
 
     def handle_response(self, response):
         """Handle response from the MPD frontend."""
-        self.send_response(LINE_TERMINATOR.join(response))
+        if logger.isEnabledFor(logging.DEBUG):
+            self.log_response(LINE_TERMINATOR.join(response))
+        self.push_with_producer(ResponseProducer(response))
 
     def send_response(self, output):
         """Send a response to the client."""
+        if logger.isEnabledFor(logging.DEBUG):
+            self.log_response(output)
+        self.push((output + LINE_TERMINATOR).encode(ENCODING))
+
+    def log_response(self, output):
         logger.debug(u'Output to [%s]:%s: %s', self.client_address,
             self.client_port, indent(output))
-        output = u'%s%s' % (output, LINE_TERMINATOR)
-        data = output.encode(ENCODING)
-        self.push(data)
 
     def check_password(self, request):
         """
@@ -10,9 +10,10 @@ class MpdThread(BaseThread):
     def __init__(self, core_queue):
         super(MpdThread, self).__init__(core_queue)
         self.name = u'MpdThread'
+        self.server = None
 
     def run_inside_try(self):
         logger.debug(u'Starting MPD server thread')
-        server = MpdServer(self.core_queue)
-        server.start()
+        self.server = MpdServer(self.core_queue)
+        self.server.start()
         asyncore.loop()
@@ -1,3 +1,4 @@
+import itertools
 import os
 import re
 
@@ -35,32 +36,68 @@ def track_to_mpd_format(track, position=None, cpid=None):
             track.track_no, track.album.num_tracks)))
     else:
         result.append(('Track', track.track_no))
+    if track.genre is not None:
+        result.append(('Genre', track.genre))
     if track.album is not None and track.album.artists:
         artists = artists_to_mpd_format(track.album.artists)
         result.append(('AlbumArtist', artists))
-    if position is not None and cpid is not None:
-        result.append(('Pos', position))
-        result.append(('Id', cpid))
     if track.album is not None and track.album.musicbrainz_id is not None:
         result.append(('MUSICBRAINZ_ALBUMID', track.album.musicbrainz_id))
     # FIXME don't use first and best artist?
-    # FIXME don't duplicate following code?
-    if track.album is not None and track.album.artists:
-        artists = filter(lambda a: a.musicbrainz_id is not None,
-            track.album.artists)
-        if artists:
-            result.append(
-                ('MUSICBRAINZ_ALBUMARTISTID', artists[0].musicbrainz_id))
-    if track.artists:
-        artists = filter(lambda a: a.musicbrainz_id is not None, track.artists)
-        if artists:
-            result.append(('MUSICBRAINZ_ARTISTID', artists[0].musicbrainz_id))
+    if track.album is not None:
+        musicbrainz_id = _first_musicbrainz_id(track.album.artists)
+        if musicbrainz_id is not None:
+            result.append(('MUSICBRAINZ_ALBUMARTISTID', musicbrainz_id))
+    musicbrainz_id = _first_musicbrainz_id(track.artists)
+    if musicbrainz_id is not None:
+        result.append(('MUSICBRAINZ_ARTISTID', musicbrainz_id))
     if track.musicbrainz_id is not None:
         result.append(('MUSICBRAINZ_TRACKID', track.musicbrainz_id))
+    if position is not None and cpid is not None:
+        result.append(('Pos', position))
+        result.append(('Id', cpid))
     return result
 
+def _first_musicbrainz_id(artists):
+    for artist in artists:
+        if artist.musicbrainz_id is not None:
+            return artist.musicbrainz_id
+
+#: The maximum number of tracks :func:`track_to_mpd_lines` keeps formatted.
+TRACK_CACHE_SIZE = 20000
+
+_track_cache = {}
+
+def track_to_mpd_lines(track, position=None, cpid=None):
+    """
+    Format track for output to MPD client, as lines of the response.
+
+    Gives the same response as :func:`track_to_mpd_format`. As tracks are
+    immutable, the lines of recently formatted tracks are cached, so only
+    the position and CPID have to be formatted when a track is sent again.
+
+    :param track: the track
+    :type track: :class:`mopidy.models.Track`
+    :param position: track's position in playlist
+    :type position: integer
+    :param cpid: track's CPID (current playlist ID)
+    :type cpid: integer
+    :rtype: list of strings
+    """
+    try:
+        lines = _track_cache[track]
+    except KeyError:
+        if len(_track_cache) >= TRACK_CACHE_SIZE:
+            _track_cache.clear()
+        lines = _track_cache[track] = [u'%s: %s' % line
+            for line in track_to_mpd_format(track)]
+    if position is not None and cpid is not None:
+        return lines + [u'Pos: %d' % position, u'Id: %d' % cpid]
+    return lines[:]
+
 MPD_KEY_ORDER = '''
-    key file Time Artist AlbumArtist Title Album Track Date MUSICBRAINZ_ALBUMID
+    key file Time Artist AlbumArtist Title Album Track Date Genre
+    MUSICBRAINZ_ALBUMID
     MUSICBRAINZ_ALBUMARTISTID MUSICBRAINZ_ARTISTID MUSICBRAINZ_TRACKID mtime
 '''.split()
 
@@ -84,8 +121,7 @@ def artists_to_mpd_format(artists):
     :type track: array of :class:`mopidy.models.Artist`
     :rtype: string
     """
-    artists.sort(key=lambda a: a.name)
-    return u', '.join([a.name for a in artists if a.name])
+    return u', '.join(sorted([a.name for a in artists if a.name]))
 
 def tracks_to_mpd_format(tracks, start=0, end=None, cpids=None):
     """
@@ -99,18 +135,36 @@ def tracks_to_mpd_format(tracks, start=0, end=None, cpids=None):
     :type start: int (positive or negative)
     :param end: position after last track to include in output
     :type end: int (positive or negative) or :class:`None` for end of list
-    :rtype: list of lists of two-tuples
+    :rtype: list of lists of strings, as from :func:`track_to_mpd_lines`
     """
-    if end is None:
-        end = len(tracks)
+    (start, end, _) = slice(start, end).indices(len(tracks))
     tracks = tracks[start:end]
-    positions = range(start, end)
-    cpids = cpids and cpids[start:end] or [None for _ in tracks]
+    positions = xrange(start, max(start, end))
+    cpids = cpids and cpids[start:end] or [None] * len(tracks)
     assert len(tracks) == len(positions) == len(cpids)
-    result = []
-    for track, position, cpid in zip(tracks, positions, cpids):
-        result.append(track_to_mpd_format(track, position, cpid))
-    return result
+    return [track_to_mpd_lines(track, position, cpid)
+        for (track, position, cpid) in zip(tracks, positions, cpids)]
+
+def track_iter_to_mpd_format(tracks, start=0, end=None):
+    """
+    Format tracks from an iterator for output to MPD client.
+
+    Optionally limit output to the slice ``[start:end]`` of the tracks. Only
+    the tracks up to ``end`` are taken from the iterator, and only the tracks
+    in the slice are formatted.
+
+    :param tracks: the tracks
+    :type tracks: iterator over :class:`mopidy.models.Track`
+    :param start: position of first track to include in output
+    :type start: positive int
+    :param end: position after last track to include in output
+    :type end: positive int or :class:`None` for all tracks
+    :rtype: list of lists of strings, as from :func:`track_to_mpd_lines`
+    """
+    if end is not None and end < start:
+        return []
+    return [track_to_mpd_lines(track)
+        for track in itertools.islice(tracks, start, end)]
 
 def playlist_to_mpd_format(playlist, *args, **kwargs):
     """
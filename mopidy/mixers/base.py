@@ -34,6 +34,8 @@ class BaseMixer(object):
         elif volume > 100:
             volume = 100
         self._set_volume(volume)
+        if self.backend is not None:
+            self.backend.notify_subsystem_changed('mixer')
 
     def destroy(self):
         pass
@@ -10,4 +10,5 @@ class GStreamerSoftwareMixer(BaseMixer):
         return self.backend.output.get_volume()
 
     def _set_volume(self, volume):
-        self.backend.output.set_volume(volume)
+        self.backend.output.send_commands(
+            [{'command': 'set_volume', 'volume': volume}])
@@ -2,6 +2,37 @@ from copy import copy
 
 from mopidy.frontends.mpd import translator
 
+class ImmutableObjectType(type):
+    """
+    Metaclass for :class:`ImmutableObject`.
+
+    The public class attributes of a model are its fields, and their values
+    are the fields' defaults. They are replaced with ``__slots__``, together
+    with any private slots the model declares itself, so that instances do not
+    need a ``__dict__``. The slots of :class:`ImmutableObject` itself are not
+    fields.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        defaults = {}
+        for base in reversed(bases):
+            defaults.update(getattr(base, '_defaults', {}))
+        own_defaults = dict((key, value)
+            for (key, value) in namespace.items()
+            if not key.startswith('_') and not hasattr(value, '__get__'))
+        for key in own_defaults:
+            del namespace[key]
+        defaults.update(own_defaults)
+        slots = tuple(own_defaults) + tuple(namespace.get('__slots__', ()))
+        namespace['__slots__'] = slots
+        namespace['_defaults'] = defaults
+        if not any(isinstance(base, ImmutableObjectType) for base in bases):
+            slots = ()
+        namespace['_fields'] = getattr(bases[0], '_fields', ()) + slots
+        return super(ImmutableObjectType, mcs).__new__(
+            mcs, name, bases, namespace)
+
+
 class ImmutableObject(object):
     """
     Superclass for immutable objects whose fields can only be modified via the
@@ -11,29 +42,50 @@ class ImmutableObject(object):
     :type kwargs: any
     """
 
+    __metaclass__ = ImmutableObjectType
+
+    # The hash is cached, as models are used as keys in e.g. the MPD
+    # frontend's cache of formatted tracks
+    __slots__ = ('_hash',)
+
     def __init__(self, *args, **kwargs):
-        for key, value in kwargs.items():
-            if not hasattr(self, key):
+        for key in kwargs:
+            if key not in self._defaults:
                 raise TypeError('__init__() got an unexpected keyword ' + \
                     'argument \'%s\'' % key)
-            self.__dict__[key] = value
+        for key, default in self._defaults.iteritems():
+            object.__setattr__(self, key, kwargs.get(key, default))
 
     def __setattr__(self, name, value):
         if name.startswith('_'):
             return super(ImmutableObject, self).__setattr__(name, value)
         raise AttributeError('Object is immutable.')
 
+    def __getstate__(self):
+        return dict((key, getattr(self, key)) for key in self._fields)
+
+    def __setstate__(self, state):
+        for key, value in state.iteritems():
+            object.__setattr__(self, key, value)
+
     def __hash__(self):
-        hash_sum = 0
-        for key, value in self.__dict__.items():
-            hash_sum += hash(key) + hash(value)
-        return hash_sum
+        try:
+            return self._hash
+        except AttributeError:
+            hash_sum = 0
+            for key in self._fields:
+                hash_sum += hash(key) + hash(getattr(self, key))
+            self._hash = hash_sum
+            return hash_sum
 
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return False
 
-        return self.__dict__ == other.__dict__
+        for key in self._fields:
+            if getattr(self, key) != getattr(other, key):
+                return False
+        return True
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -54,15 +106,12 @@ class ImmutableObject(object):
         :rtype: new instance of the model being copied
         """
         data = {}
-        for key in self.__dict__.keys():
+        for key in self._fields:
             public_key = key.lstrip('_')
-            data[public_key] = values.pop(public_key, self.__dict__[key])
-        for key in values.keys():
-            if hasattr(self, key):
-                data[key] = values.pop(key)
+            data[public_key] = values.pop(public_key, getattr(self, key))
         if values:
             raise TypeError("copy() got an unexpected keyword argument '%s'"
-                % key)
+                % values.keys()[0])
         return self.__class__(**data)
 
 class Artist(ImmutableObject):
@@ -111,6 +160,8 @@ class Album(ImmutableObject):
     #: The MusicBrainz ID of the album. Read-only.
     musicbrainz_id = None
 
+    __slots__ = ('_artists',)
+
     def __init__(self, *args, **kwargs):
         self._artists = frozenset(kwargs.pop('artists', []))
         super(Album, self).__init__(*args, **kwargs)
@@ -135,6 +186,8 @@ class Track(ImmutableObject):
     :type track_no: integer
     :param date: track release date
     :type date: :class:`datetime.date`
+    :param genre: track genre
+    :type genre: string
     :param length: track length in milliseconds
     :type length: integer
     :param bitrate: bitrate in kbit/s
@@ -158,6 +211,9 @@ class Track(ImmutableObject):
     #: The track release date. Read-only.
     date = None
 
+    #: The track genre. Read-only.
+    genre = None
+
     #: The track length in milliseconds. Read-only.
     length = None
 
@@ -167,6 +223,8 @@ class Track(ImmutableObject):
     #: The MusicBrainz ID of the track. Read-only.
     musicbrainz_id = None
 
+    __slots__ = ('_artists',)
+
     def __init__(self, *args, **kwargs):
         self._artists = frozenset(kwargs.pop('artists', []))
         super(Track, self).__init__(*args, **kwargs)
@@ -203,6 +261,8 @@ class Playlist(ImmutableObject):
     #: :class:`datetime.datetime`, or :class:`None` if unknown.
     last_modified = None
 
+    __slots__ = ('_tracks',)
+
     def __init__(self, *args, **kwargs):
         self._tracks = kwargs.pop('tracks', [])
         super(Playlist, self).__init__(*args, **kwargs)
@@ -1,8 +1,51 @@
+def run_command(target, command):
+    """
+    Run a command message, like ``{'command': 'set_state', 'state': 'READY'}``,
+    by calling the method of ``target`` with the command's name, with the
+    arguments given by :attr:`BaseOutput.COMMANDS`.
+
+    Raises :exc:`LookupError` if the command is unknown.
+
+    :param target: the object handling the command
+    :type target: an output or similar
+    :param command: the command message
+    :type command: dict
+    :rtype: the result of the command
+    """
+    try:
+        argument_keys = BaseOutput.COMMANDS[command['command']]
+    except KeyError:
+        raise LookupError('Unknown command: %s' % command['command'])
+    return getattr(target, command['command'])(
+        *[command[key] for key in argument_keys])
+
+
 class BaseOutput(object):
     """
     Base class for audio outputs.
     """
 
+    #: The commands which may be sent with :meth:`send_commands`, mapped to
+    #: the message keys of their arguments, in order.
+    COMMANDS = {
+        'deliver_data': ('caps', 'data'),
+        'end_of_data_stream': (),
+        'get_position': (),
+        'get_volume': (),
+        'play_uri': ('uri',),
+        'set_next_uri': ('uri',),
+        'set_position': ('position',),
+        'set_state': ('state',),
+        'set_volume': ('volume',),
+    }
+
+    #: Number of times the position has been changed by :meth:`play_uri` or
+    #: :meth:`set_position`. Outputs which send ``time_position`` messages to
+    #: the core include the number the position was read under as
+    #: ``serial``, so that the core can ignore positions from before the last
+    #: change.
+    position_serial = 0
+
     def __init__(self, core_queue):
         self.core_queue = core_queue
 
@@ -30,6 +73,23 @@ class BaseOutput(object):
         """
         raise NotImplementedError
 
+    def send_commands(self, commands):
+        """
+        Run several commands, in order, without waiting for them to finish.
+        The commands are sent to the output together, e.g. to change state,
+        load, and change state again in one go.
+
+        *MUST be implemented by subclass.*
+
+        :param commands: command messages, like
+            ``{'command': 'set_state', 'state': 'READY'}``, see
+            :attr:`COMMANDS`
+        :type commands: list of dicts
+        :rtype: :class:`mopidy.utils.process.Future` for the list of the
+            commands' results
+        """
+        raise NotImplementedError
+
     def play_uri(self, uri):
         """
         Play URI.
@@ -61,6 +121,19 @@ class BaseOutput(object):
         """
         raise NotImplementedError
 
+    def set_next_uri(self, uri):
+        """
+        Set the URI to play at the end of the current URI. If the output
+        starts playing it by itself, it should send an ``end_of_track``
+        message with ``next_uri`` set to the URI it started to the core.
+
+        *MAY be implemented by subclass.*
+
+        :param uri: the URI to play next, or :class:`None` for no URI
+        :type uri: string or :class:`None`
+        """
+        pass
+
     def get_position(self):
         """
         Get position in milliseconds.
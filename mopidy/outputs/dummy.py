@@ -1,4 +1,5 @@
-from mopidy.outputs.base import BaseOutput
+from mopidy.outputs.base import BaseOutput, run_command
+from mopidy.utils.process import Future
 
 class DummyOutput(BaseOutput):
     """
@@ -20,6 +21,9 @@ class DummyOutput(BaseOutput):
     #: For testing. Contains the last URI passed to :meth:`play_uri`.
     uri = None
 
+    #: For testing. Contains the last URI passed to :meth:`set_next_uri`.
+    next_uri = None
+
     #: For testing. Contains the last capabilities passed to
     #: :meth:`deliver_data`.
     capabilities = None
@@ -49,10 +53,19 @@ class DummyOutput(BaseOutput):
     def process_message(self, message):
         self.messages.append(message)
 
+    def send_commands(self, commands):
+        future = Future()
+        future.send([run_command(self, command) for command in commands])
+        return future
+
     def play_uri(self, uri):
+        self.position_serial += 1
         self.uri = uri
         return True
 
+    def set_next_uri(self, uri):
+        self.next_uri = uri
+
     def deliver_data(self, capabilities, data):
         self.capabilities = capabilities
         self.data = data
@@ -64,6 +77,7 @@ class DummyOutput(BaseOutput):
         return self.position
 
     def set_position(self, position):
+        self.position_serial += 1
         self.position = position
         return True
 
@@ -3,11 +3,13 @@ pygst.require('0.10')
 import gst
 
 import logging
-import multiprocessing
+import Queue
+import threading
+import time
 
 from mopidy import settings
-from mopidy.outputs.base import BaseOutput
-from mopidy.utils.process import (BaseThread, pickle_connection,
+from mopidy.outputs.base import BaseOutput, run_command
+from mopidy.utils.process import (BaseThread, Future, ReplyChannel,
     unpickle_connection)
 
 logger = logging.getLogger('mopidy.outputs.gstreamer')
@@ -21,13 +23,21 @@ class GStreamerOutput(BaseOutput):
     **Settings:**
 
     - :attr:`mopidy.settings.GSTREAMER_AUDIO_SINK`
+    - :attr:`mopidy.settings.GSTREAMER_GAPLESS`
+
+    The player thread runs in the same process, so messages are passed to it
+    through an in-process queue without pickling. Methods returning a result
+    wait for the reply on a :class:`mopidy.utils.process.ReplyChannel` which
+    is kept for each calling thread, while :meth:`send_commands` returns a
+    :class:`mopidy.utils.process.Future` at once.
     """
 
     def __init__(self, *args, **kwargs):
         super(GStreamerOutput, self).__init__(*args, **kwargs)
-        self.output_queue = multiprocessing.Queue()
+        self.output_queue = Queue.Queue()
         self.player_thread = GStreamerPlayerThread(self.core_queue,
             self.output_queue)
+        self._local = threading.local()
 
     def start(self):
         self.player_thread.start()
@@ -40,20 +50,43 @@ class GStreamerOutput(BaseOutput):
             u'Message recipient must be "output".'
         self.output_queue.put(message)
 
+    def _get_reply_channel(self):
+        channel = getattr(self._local, 'reply_channel', None)
+        if channel is None:
+            channel = self._local.reply_channel = ReplyChannel()
+        return channel
+
     def _send_recv(self, message):
-        (my_end, other_end) = multiprocessing.Pipe()
+        channel = self._get_reply_channel()
         message['to'] = 'output'
-        message['reply_to'] = pickle_connection(other_end)
+        message['reply_to'] = channel
         self.process_message(message)
-        my_end.poll(None)
-        return my_end.recv()
+        return channel.recv()
 
     def _send(self, message):
         message['to'] = 'output'
         self.process_message(message)
 
+    def _add_position_serial(self, message):
+        if message['command'] in ('play_uri', 'set_position'):
+            self.position_serial += 1
+            message['serial'] = self.position_serial
+        return message
+
+    def send_commands(self, commands):
+        future = Future()
+        commands = [self._add_position_serial(dict(command))
+            for command in commands]
+        self._send({'command': 'batch', 'commands': commands,
+            'reply_to': future})
+        return future
+
     def play_uri(self, uri):
-        return self._send_recv({'command': 'play_uri', 'uri': uri})
+        return self._send_recv(self._add_position_serial(
+            {'command': 'play_uri', 'uri': uri}))
+
+    def set_next_uri(self, uri):
+        return self._send({'command': 'set_next_uri', 'uri': uri})
 
     def deliver_data(self, capabilities, data):
         return self._send({
@@ -69,8 +102,8 @@ class GStreamerOutput(BaseOutput):
         return self._send_recv({'command': 'get_position'})
 
     def set_position(self, position):
-        return self._send_recv({'command': 'set_position',
-            'position': position})
+        return self._send_recv(self._add_position_serial(
+            {'command': 'set_position', 'position': position}))
 
     def set_state(self, state):
         return self._send_recv({'command': 'set_state', 'state': state})
@@ -95,35 +128,85 @@ class GStreamerPlayerThread(BaseThread):
     parent process, and not some other thread. If not, we can get into the
     problems described at
     http://jameswestby.net/weblog/tech/14-caution-python-multiprocessing-and-glib-dont-mix.html.
+
+    If :attr:`mopidy.settings.GSTREAMER_GAPLESS` is set, the local backend's
+    URIs are played with ``playbin2``. When the current URI is about to
+    finish, ``playbin2`` switches to the URI given to :meth:`set_next_uri`
+    without stopping the audio sink, and ``end_of_track`` is sent to the core
+    with ``next_uri`` set when the first data of the next URI
+    reaches the sink.
+
+    While playing, the thread also sends the position of the current URI to
+    the core every :attr:`POSITION_REPORT_INTERVAL` seconds, along with the
+    wall time it was read at, so that the core can keep its own position in
+    step with GStreamer without asking for it.
     """
 
+    #: The ``playbin2`` flag for playing audio only.
+    PLAY_FLAG_AUDIO = 0x02
+
+    #: Seconds between position reports to the core while playing.
+    POSITION_REPORT_INTERVAL = 1.0
+
     def __init__(self, core_queue, output_queue):
         super(GStreamerPlayerThread, self).__init__(core_queue)
         self.name = u'GStreamerPlayerThread'
         self.output_queue = output_queue
         self.gst_pipeline = None
+        self.gst_uri_bin = None
+        self.gst_volume = None
+        self.next_uri = None
+        self.started_uri = None
+        self.state_name = 'NULL'
+        self.next_position_report = None
+        self.position_serial = 0
 
     def run_inside_try(self):
         self.setup()
         while True:
-            message = self.output_queue.get()
-            self.process_mopidy_message(message)
+            try:
+                message = self.output_queue.get(timeout=self.get_timeout())
+            except Queue.Empty:
+                message = None
+            if message is not None:
+                self.process_mopidy_message(message)
+            if (self.state_name == 'PLAYING'
+                    and time.time() >= self.next_position_report):
+                self.report_position()
+
+    def get_timeout(self):
+        """
+        Seconds to wait for the next message before reporting the position,
+        or :class:`None` to wait for a message.
+        """
+        if self.state_name == 'PLAYING':
+            return max(0, self.next_position_report - time.time())
 
     def setup(self):
         logger.debug(u'Setting up GStreamer pipeline')
 
-        self.gst_pipeline = gst.parse_launch(' ! '.join([
+        output_description = ' ! '.join([
             'audioconvert name=convert',
             'volume name=volume',
             settings.GSTREAMER_AUDIO_SINK,
-        ]))
+        ])
+        local = settings.BACKENDS[0] == 'mopidy.backends.local.LocalBackend'
+
+        if local and settings.GSTREAMER_GAPLESS:
+            self.setup_playbin(output_description)
+            self.setup_bus()
+            return
+
+        self.gst_pipeline = gst.parse_launch(output_description)
+        self.gst_volume = self.gst_pipeline.get_by_name('volume')
 
         pad = self.gst_pipeline.get_by_name('convert').get_pad('sink')
 
-        if settings.BACKENDS[0] == 'mopidy.backends.local.LocalBackend':
+        if local:
             uri_bin = gst.element_factory_make('uridecodebin', 'uri')
             uri_bin.connect('pad-added', self.process_new_pad, pad)
             self.gst_pipeline.add(uri_bin)
+            self.gst_uri_bin = uri_bin
         else:
             app_src = gst.element_factory_make('appsrc', 'appsrc')
             app_src_caps = gst.Caps("""
@@ -138,7 +221,21 @@ class GStreamerPlayerThread(BaseThread):
             self.gst_pipeline.add(app_src)
             app_src.get_pad('src').link(pad)
 
-        # Setup bus and message processor
+        self.setup_bus()
+
+    def setup_playbin(self, output_description):
+        output_bin = gst.parse_bin_from_description(output_description, True)
+        output_bin.get_pad('sink').add_event_probe(self.process_output_event)
+        self.gst_volume = output_bin.get_by_name('volume')
+
+        self.gst_pipeline = gst.element_factory_make('playbin2')
+        self.gst_pipeline.set_property('flags', self.PLAY_FLAG_AUDIO)
+        self.gst_pipeline.set_property('audio-sink', output_bin)
+        self.gst_pipeline.connect('about-to-finish',
+            self.process_about_to_finish)
+        self.gst_uri_bin = self.gst_pipeline
+
+    def setup_bus(self):
         gst_bus = self.gst_pipeline.get_bus()
         gst_bus.add_signal_watch()
         gst_bus.connect('message', self.process_gst_message)
@@ -146,38 +243,65 @@ class GStreamerPlayerThread(BaseThread):
     def process_new_pad(self, source, pad, target_pad):
         pad.link(target_pad)
 
+    def process_about_to_finish(self, playbin):
+        """
+        Switch to the next URI, if any. Called from a GStreamer streaming
+        thread when the current URI has been read to the end.
+        """
+        uri = self.next_uri
+        if uri is not None:
+            self.next_uri = None
+            self.started_uri = uri
+            playbin.set_property('uri', uri)
+
+    def process_output_event(self, pad, event):
+        """
+        Tell the core when the next URI has started playing. Called from a
+        GStreamer streaming thread for each event reaching the audio sink.
+        """
+        uri = self.started_uri
+        if event.type == gst.EVENT_NEWSEGMENT and uri is not None:
+            self.started_uri = None
+            logger.debug(u'GStreamer started playing the next URI. '
+                'Sending end_of_track to core_queue ...')
+            self.core_queue.put({'command': 'end_of_track', 'next_uri': uri})
+        return True
+
     def process_mopidy_message(self, message):
-        """Process messages from the rest of Mopidy."""
-        if message['command'] == 'play_uri':
-            response = self.play_uri(message['uri'])
-            connection = unpickle_connection(message['reply_to'])
-            connection.send(response)
-        elif message['command'] == 'deliver_data':
-            self.deliver_data(message['caps'], message['data'])
-        elif message['command'] == 'end_of_data_stream':
-            self.end_of_data_stream()
-        elif message['command'] == 'set_state':
-            response = self.set_state(message['state'])
-            connection = unpickle_connection(message['reply_to'])
-            connection.send(response)
-        elif message['command'] == 'get_volume':
-            volume = self.get_volume()
-            connection = unpickle_connection(message['reply_to'])
-            connection.send(volume)
-        elif message['command'] == 'set_volume':
-            response = self.set_volume(message['volume'])
-            connection = unpickle_connection(message['reply_to'])
-            connection.send(response)
-        elif message['command'] == 'set_position':
-            response = self.set_position(message['position'])
-            connection = unpickle_connection(message['reply_to'])
-            connection.send(response)
-        elif message['command'] == 'get_position':
-            response = self.get_position()
-            connection = unpickle_connection(message['reply_to'])
-            connection.send(response)
-        else:
+        """
+        Process messages from the rest of Mopidy.
+
+        A message is either one of the commands in
+        :attr:`mopidy.outputs.base.BaseOutput.COMMANDS`, or a ``batch`` of
+        such commands. If the message has a ``reply_to``, the result is sent
+        to it. It may be a :class:`mopidy.utils.process.ReplyChannel` or a
+        :class:`mopidy.utils.process.Future` from the same process, or a
+        pickled connection.
+        """
+        try:
+            if message['command'] == 'batch':
+                response = [self.process_command(command)
+                    for command in message['commands']]
+            else:
+                response = self.process_command(message)
+        except LookupError:
             logger.warning(u'Cannot handle message: %s', message)
+            response = None
+        reply_to = message.get('reply_to')
+        if isinstance(reply_to, basestring):
+            reply_to = unpickle_connection(reply_to)
+        if reply_to is not None:
+            reply_to.send(response)
+
+    def process_command(self, command):
+        """
+        Run a single command. Commands changing the position carry the new
+        :attr:`mopidy.outputs.base.BaseOutput.position_serial`, which is
+        included in the position reports.
+        """
+        if 'serial' in command:
+            self.position_serial = command['serial']
+        return run_command(self, command)
 
     def process_gst_message(self, bus, message):
         """Process messages from GStreamer."""
@@ -195,9 +319,14 @@ class GStreamerPlayerThread(BaseThread):
     def play_uri(self, uri):
         """Play audio at URI"""
         self.set_state('READY')
-        self.gst_pipeline.get_by_name('uri').set_property('uri', uri)
+        self.started_uri = None
+        self.gst_uri_bin.set_property('uri', uri)
         return self.set_state('PLAYING')
 
+    def set_next_uri(self, uri):
+        """Set URI to play at the end of the current URI"""
+        self.next_uri = uri
+
     def deliver_data(self, caps_string, data):
         """Deliver audio data to be played"""
         app_src = self.gst_pipeline.get_by_name('appsrc')
@@ -240,17 +369,17 @@ class GStreamerPlayerThread(BaseThread):
             return False
         else:
             logger.debug('Setting GStreamer state to %s: OK', state_name)
+            self.state_name = state_name
+            self.schedule_position_report()
             return True
 
     def get_volume(self):
         """Get volume in range [0..100]"""
-        gst_volume = self.gst_pipeline.get_by_name('volume')
-        return int(gst_volume.get_property('volume') * 100)
+        return int(self.gst_volume.get_property('volume') * 100)
 
     def set_volume(self, volume):
         """Set volume in range [0..100]"""
-        gst_volume = self.gst_pipeline.get_by_name('volume')
-        gst_volume.set_property('volume', volume / 100.0)
+        self.gst_volume.set_property('volume', volume / 100.0)
         return True
 
     def set_position(self, position):
@@ -258,12 +387,39 @@ class GStreamerPlayerThread(BaseThread):
         handeled = self.gst_pipeline.seek_simple(gst.Format(gst.FORMAT_TIME),
             gst.SEEK_FLAG_FLUSH, position * gst.MSECOND)
         self.gst_pipeline.get_state() # block until seek is done
+        self.schedule_position_report()
         return handeled
 
     def get_position(self):
+        position = self.query_position()
+        if position is None:
+            logger.error('time_position failed')
+            return 0
+        return position
+
+    def query_position(self):
+        """
+        Get the position of the current URI in milliseconds, or :class:`None`
+        if GStreamer does not know it.
+        """
         try:
             position = self.gst_pipeline.query_position(gst.FORMAT_TIME)[0]
             return position // gst.MSECOND
-        except gst.QueryError, e:
-            logger.error('time_position failed: %s', e)
-            return 0
+        except gst.QueryError:
+            return None
+
+    def schedule_position_report(self):
+        self.next_position_report = time.time() + self.POSITION_REPORT_INTERVAL
+
+    def report_position(self):
+        """Send the position of the current URI to the core."""
+        self.schedule_position_report()
+        position = self.query_position()
+        if position is not None:
+            self.core_queue.put({
+                'command': 'time_position',
+                'position': position,
+                'time': int(time.time() * 1000),
+                'serial': self.position_serial,
+            })
+
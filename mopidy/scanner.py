@@ -6,8 +6,13 @@ pygst.require('0.10')
 import gst
 
 import datetime
+import multiprocessing
+import optparse
+import os
+import sys
 
-from mopidy.utils.path import path_to_uri, find_files
+from mopidy import settings
+from mopidy.utils.path import path_to_uri, find_files, mtime as get_mtime
 from mopidy.models import Track, Artist, Album
 
 def translator(data):
@@ -35,6 +40,9 @@ def translator(data):
     if 'title' in data:
         track_kwargs['name'] = data['title']
 
+    if 'genre' in data:
+        track_kwargs['genre'] = data['genre']
+
     if 'track-number' in data:
         track_kwargs['track_no'] = data['track-number']
 
@@ -65,11 +73,69 @@ def translator(data):
 
 
 class Scanner(object):
-    def __init__(self, folder, data_callback, error_callback=None):
-        self.uris = [path_to_uri(f) for f in find_files(folder)]
+    """
+    Scans the files in ``folder`` for metadata.
+
+    ``data_callback`` is called with the tags of each file, and
+    ``error_callback`` with the URI and error of each file which could not be
+    scanned. ``jobs`` is the number of GStreamer pipelines which scan files at
+    the same time. The callbacks are always called from the thread running
+    :meth:`start`.
+
+    If ``mtimes`` is given, it should map file URIs to the modification times
+    of the files when they were last scanned. Files which have not been
+    modified since are not scanned again, and their URIs are added to
+    :attr:`unchanged_uris` instead.
+    """
+
+    def __init__(self, folder, data_callback, error_callback=None, jobs=1,
+            mtimes=None):
+        self.uris = []
+        self.unchanged_uris = set()
+        for path in find_files(folder):
+            uri = path_to_uri(path)
+            if mtimes and mtimes.get(uri) == get_mtime(path):
+                self.unchanged_uris.add(uri)
+            else:
+                self.uris.append(uri)
         self.data_callback = data_callback
         self.error_callback = error_callback
         self.loop = gobject.MainLoop()
+        self.pipelines = [ScannerPipeline(self) for _ in range(max(jobs, 1))]
+        self.busy_pipelines = set()
+
+    def next_uri(self, pipeline):
+        if not self.uris:
+            pipeline.stop()
+            self.busy_pipelines.discard(pipeline)
+            if not self.busy_pipelines:
+                self.loop.quit()
+            return
+
+        self.busy_pipelines.add(pipeline)
+        pipeline.scan(self.uris.pop())
+
+    def start(self):
+        if not self.uris:
+            return
+        for pipeline in self.pipelines:
+            if self.uris:
+                self.next_uri(pipeline)
+        self.loop.run()
+
+    def stop(self):
+        for pipeline in self.pipelines:
+            pipeline.stop()
+        self.busy_pipelines.clear()
+        self.loop.quit()
+
+
+class ScannerPipeline(object):
+    """A single GStreamer pipeline scanning one file at a time for a
+    :class:`Scanner`."""
+
+    def __init__(self, scanner):
+        self.scanner = scanner
 
         caps = gst.Caps('audio/x-raw-int')
         fakesink = gst.element_factory_make('fakesink')
@@ -92,19 +158,23 @@ class Scanner(object):
         pad.link(target_pad)
 
     def process_tags(self, bus, message):
+        if self not in self.scanner.busy_pipelines:
+            return
         data = message.parse_tag()
         data = dict([(k, data[k]) for k in data.keys()])
         data['uri'] = unicode(self.uribin.get_property('uri'))
         data['duration'] = self.get_duration()
-        self.data_callback(data)
-        self.next_uri()
+        self.scanner.data_callback(data)
+        self.scanner.next_uri(self)
 
     def process_error(self, bus, message):
-        if self.error_callback:
+        if self not in self.scanner.busy_pipelines:
+            return
+        if self.scanner.error_callback:
             uri = self.uribin.get_property('uri')
             errors = message.parse_error()
-            self.error_callback(uri, errors)
-        self.next_uri()
+            self.scanner.error_callback(uri, errors)
+        self.scanner.next_uri(self)
 
     def get_duration(self):
         self.pipe.get_state()
@@ -114,20 +184,83 @@ class Scanner(object):
         except gst.QueryError:
             return None
 
-    def next_uri(self):
-        if not self.uris:
-            return self.stop()
-
+    def scan(self, uri):
         self.pipe.set_state(gst.STATE_NULL)
-        self.uribin.set_property('uri', self.uris.pop())
+        self.uribin.set_property('uri', uri)
         self.pipe.set_state(gst.STATE_PAUSED)
 
-    def start(self):
-        if not self.uris:
-            return
-        self.next_uri()
-        self.loop.run()
-
     def stop(self):
         self.pipe.set_state(gst.STATE_NULL)
-        self.loop.quit()
+
+
+def main():
+    """
+    Scan :attr:`mopidy.settings.LOCAL_MUSIC_PATH` and write a tag cache to
+    ``stdout``. Used by :command:`mopidy-scan`.
+    """
+    from mopidy.backends.local.translator import iter_mpd_tag_cache
+    from mopidy.frontends.mpd.translator import tracks_to_tag_cache_format
+
+    parser = optparse.OptionParser()
+    parser.add_option('-j', '--jobs',
+        type='int', dest='jobs', default=multiprocessing.cpu_count(),
+        help='number of files to scan at the same time '
+            '(default: number of CPUs, %default)')
+    parser.add_option('-u', '--update',
+        action='store_true', dest='update',
+        help='only scan new and modified files, and reuse the rest of the '
+            'tag cache at LOCAL_TAG_CACHE_FILE')
+    parser.add_option('-p', '--path',
+        dest='path', default=None,
+        help='only scan the files below PATH relative to LOCAL_MUSIC_PATH, '
+            'and reuse the rest of the tag cache at LOCAL_TAG_CACHE_FILE')
+    options = parser.parse_args()[0]
+
+    tracks = []
+    old_tracks = {}
+    mtimes = None
+    folder = settings.LOCAL_MUSIC_PATH
+    if options.path:
+        folder = os.path.join(folder, options.path.decode('utf-8'))
+
+    if options.update or options.path:
+        mtimes = {}
+        for track in iter_mpd_tag_cache(settings.LOCAL_TAG_CACHE_FILE,
+                settings.LOCAL_MUSIC_PATH, mtimes):
+            old_tracks[track.uri] = track
+        if not options.update:
+            mtimes = None
+
+    def store(data):
+        track = translator(data)
+        tracks.append(track)
+        print >> sys.stderr, 'Added %s' % track.uri
+
+    def debug(uri, error):
+        print >> sys.stderr, 'Failed %s: %s' % (uri, error)
+
+    print >> sys.stderr, 'Scanning %s' % folder
+
+    scanner = Scanner(folder, store, debug, options.jobs, mtimes)
+    scanner.start()
+
+    # With --path, the tracks outside the scanned folder are kept as they are
+    folder_uri = path_to_uri(folder).rstrip('/')
+    outside_folder = lambda uri: options.path and not (
+        uri == folder_uri or uri.startswith(folder_uri + '/'))
+    unchanged = [track for (uri, track) in old_tracks.iteritems()
+        if uri in scanner.unchanged_uris or outside_folder(uri)]
+    removed = set(old_tracks) - set(track.uri for track in unchanged) - set(
+        track.uri for track in tracks)
+    print >> sys.stderr, 'Done: %d scanned, %d unchanged, %d removed' % (
+        len(tracks), len(unchanged), len(removed))
+    tracks.extend(unchanged)
+
+    for a in tracks_to_tag_cache_format(tracks):
+        if len(a) == 1:
+            print (u'%s' % a).encode('utf-8')
+        else:
+            print (u'%s: %s' % a).encode('utf-8')
+
+if __name__ == '__main__':
+    main()
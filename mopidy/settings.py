@@ -61,6 +61,15 @@ FRONTENDS = (
 #:     GSTREAMER_AUDIO_SINK = u'autoaudiosink'
 GSTREAMER_AUDIO_SINK = u'autoaudiosink'
 
+#: Whether :mod:`mopidy.outputs.gstreamer` should play tracks from the local
+#: backend without gaps, by starting on the next track before the current
+#: track has ended.
+#:
+#: Default::
+#:
+#:     GSTREAMER_GAPLESS = False
+GSTREAMER_GAPLESS = False
+
 #: Your `Last.fm <http://www.last.fm/>`_ username.
 #:
 #: Used by :mod:`mopidy.frontends.lastfm`.
@@ -164,6 +173,12 @@ OUTPUT = u'mopidy.outputs.gstreamer.GStreamerOutput'
 #:     Listens on all interfaces, both IPv4 and IPv6.
 MPD_SERVER_HOSTNAME = u'127.0.0.1'
 
+#: The maximum number of client connections waiting to be accepted by the MPD
+#: server. Connected clients are not limited by this setting.
+#:
+#: Default: 32
+MPD_SERVER_LISTEN_BACKLOG = 32
+
 #: The password required for connecting to the MPD server.
 #:
 #: Default: :class:`None`, which means no password required.
@@ -4,11 +4,12 @@ import sys
 
 logger = logging.getLogger('mopidy.utils')
 
-def flatten(the_list):
-    result = []
+def flatten(the_list, result=None):
+    if result is None:
+        result = []
     for element in the_list:
         if isinstance(element, list):
-            result.extend(flatten(element))
+            flatten(element, result)
         else:
             result.append(element)
     return result
@@ -43,7 +43,4 @@ def indent(string, places=4, linebreak='\n'):
     lines = string.split(linebreak)
     if len(lines) == 1:
         return string
-    result = u''
-    for line in lines:
-        result += linebreak + ' ' * places + line
-    return result
+    return u''.join(linebreak + ' ' * places + line for line in lines)
@@ -1,8 +1,11 @@
+import itertools
 import logging
 import multiprocessing
 import multiprocessing.dummy
 from multiprocessing.reduction import reduce_connection
 import pickle
+import Queue
+import threading
 
 import gobject
 gobject.threads_init()
@@ -19,6 +22,99 @@ def unpickle_connection(pickled_connection):
     (func, args) = pickle.loads(pickled_connection)
     return func(*args)
 
+_reply_channel_ids = itertools.count(1)
+_reply_channels = {}
+
+def get_reply_channel(channel_id):
+    """
+    Get the :class:`ReplyChannel` with the given ID.
+
+    :param channel_id: the :attr:`ReplyChannel.id` of the channel
+    :type channel_id: int
+    :rtype: :class:`ReplyChannel`
+    """
+    return _reply_channels[channel_id]
+
+class ReplyChannel(object):
+    """
+    A reusable channel for receiving replies from another thread in the same
+    process.
+
+    Only the channel's :attr:`id` is passed along with the messages put on the
+    core queue, and the receiver looks up the channel using
+    :func:`get_reply_channel`. Thus, no pipe or socket is created and pickled
+    for each message, as with :func:`pickle_connection`.
+
+    :param on_send: called in the sending thread after each response is sent,
+        so that the owner of the channel can avoid blocking in :meth:`recv`
+    :type on_send: callable without arguments or :class:`None`
+    """
+
+    def __init__(self, on_send=None):
+        #: Integer identifying the channel. Pass it as ``reply_to`` in
+        #: messages.
+        self.id = _reply_channel_ids.next()
+        self.on_send = on_send
+        self._queue = Queue.Queue()
+        _reply_channels[self.id] = self
+
+    def send(self, response):
+        """Send a response to the owner of the channel."""
+        self._queue.put(response)
+        if self.on_send is not None:
+            self.on_send()
+
+    def poll(self):
+        """
+        Check if a response is waiting. Only reliable when there is a single
+        receiving thread.
+
+        :rtype: :class:`True` if :meth:`recv` will not block
+        """
+        return not self._queue.empty()
+
+    def recv(self):
+        """Wait for and return the next response sent to the channel."""
+        return self._queue.get()
+
+    def close(self):
+        """Unregister the channel. It can not be looked up after this."""
+        _reply_channels.pop(self.id, None)
+
+
+class Future(object):
+    """
+    The response to a single message handled by another thread in the same
+    process.
+
+    Pass the future itself as ``reply_to`` in the message. The receiver
+    replies by calling :meth:`send`, just like with a connection, and the
+    sender may continue with other work and call :meth:`get` when it needs
+    the response.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._response = None
+
+    def send(self, response):
+        """Set the response, and wake up any thread waiting for it."""
+        self._response = response
+        self._event.set()
+
+    def done(self):
+        """
+        Check if the response has been sent.
+
+        :rtype: :class:`True` if :meth:`get` will not block
+        """
+        return self._event.is_set()
+
+    def get(self):
+        """Wait for and return the response."""
+        self._event.wait()
+        return self._response
+
 class BaseProcess(multiprocessing.Process):
     def __init__(self, core_queue):
         super(BaseProcess, self).__init__()
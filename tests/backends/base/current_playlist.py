@@ -48,6 +48,60 @@ class CurrentPlaylistControllerTest(object):
         cp_track = self.controller.cp_tracks[1]
         self.assertEqual(cp_track, self.controller.get(cpid=cp_track[0]))
 
+    @populate_playlist
+    def test_get_by_cpid_and_uri(self):
+        cp_track = self.controller.cp_tracks[1]
+        self.assertEqual(cp_track, self.controller.get(
+            cpid=cp_track[0], uri=cp_track[1].uri))
+        test = lambda: self.controller.get(
+            cpid=cp_track[0], uri=self.tracks[0].uri)
+        self.assertRaises(LookupError, test)
+
+    @populate_playlist
+    def test_get_by_cpid_of_removed_track(self):
+        cp_track = self.controller.cp_tracks[1]
+        self.controller.remove(cpid=cp_track[0])
+        test = lambda: self.controller.get(cpid=cp_track[0])
+        self.assertRaises(LookupError, test)
+
+    @populate_playlist
+    def test_index(self):
+        for (position, cp_track) in enumerate(self.controller.cp_tracks):
+            self.assertEqual(position, self.controller.index(cp_track))
+
+    @populate_playlist
+    def test_index_of_track_not_in_playlist(self):
+        cp_track = self.controller.cp_tracks[1]
+        self.controller.remove(cpid=cp_track[0])
+        self.assertRaises(ValueError, self.controller.index, cp_track)
+        self.assertRaises(ValueError, self.controller.index,
+            (cp_track[0] + 100, cp_track[1]))
+        self.assertRaises(ValueError, self.controller.index,
+            (self.controller.cp_tracks[0][0], Track(uri='unknown')))
+
+    @populate_playlist
+    def test_index_follows_changes_to_playlist(self):
+        def check():
+            for (position, cp_track) in enumerate(self.controller.cp_tracks):
+                self.assertEqual(position, self.controller.index(cp_track))
+        check()
+        self.controller.add(Track(uri='a'), 0)
+        check()
+        self.controller.append([Track(uri='b'), Track(uri='c')])
+        check()
+        self.controller.move(0, 2, 3)
+        check()
+        self.controller.remove(uri='b')
+        check()
+        self.controller.shuffle()
+        check()
+        self.controller.remove_slice(1, 3)
+        check()
+        self.controller.clear()
+        check()
+        self.controller.append(self.tracks)
+        check()
+
     @populate_playlist
     def test_get_by_uri(self):
         cp_track = self.controller.cp_tracks[1]
@@ -128,6 +182,34 @@ class CurrentPlaylistControllerTest(object):
         self.controller.append([])
         self.assertEqual(self.controller.version, version)
 
+    def test_append_increases_version_once(self):
+        version = self.controller.version
+        self.controller.append([Track(uri='a'), Track(uri='b')])
+        self.assertEqual(self.controller.version, version + 1)
+
+    def test_append_returns_cp_tracks_with_unique_cpids(self):
+        cp_tracks = self.controller.append([Track(uri='a'), Track(uri='b')])
+        cp_tracks += self.controller.append([Track(uri='c')])
+        self.assertEqual(cp_tracks, list(self.controller.cp_tracks))
+        self.assertEqual(len(set(cpid for (cpid, _) in cp_tracks)), 3)
+
+    @populate_playlist
+    def test_append_at_position(self):
+        version = self.controller.version
+        self.controller.append([Track(uri='a'), Track(uri='b')], 1)
+        self.assertEqual(self.controller.version, version + 1)
+        self.assertEqual(self.controller.tracks[0], self.tracks[0])
+        self.assertEqual(self.controller.tracks[1].uri, 'a')
+        self.assertEqual(self.controller.tracks[2].uri, 'b')
+        self.assertEqual(self.controller.tracks[3], self.tracks[1])
+        self.assertEqual([1, 2, 3, 4],
+            self.controller.changed_positions(version))
+
+    @populate_playlist
+    def test_append_at_position_outside_of_playlist(self):
+        test = lambda: self.controller.append(self.tracks, len(self.tracks)+2)
+        self.assertRaises(AssertionError, test)
+
     @populate_playlist
     def test_append_preserves_playing_state(self):
         self.playback.play()
@@ -181,9 +263,28 @@ class CurrentPlaylistControllerTest(object):
         self.assertRaises(AssertionError, test)
 
     def test_tracks_attribute_is_immutable(self):
-        tracks1 = self.controller.tracks
-        tracks2 = self.controller.tracks
-        self.assertNotEqual(id(tracks1), id(tracks2))
+        tracks = self.controller.tracks
+        def test():
+            tracks[0] = Track()
+        self.assertRaises(TypeError, test)
+
+    @populate_playlist
+    def test_cp_tracks_attribute_is_immutable(self):
+        cp_tracks = self.controller.cp_tracks
+        def test():
+            cp_tracks[0] = (100, Track())
+        self.assertRaises(TypeError, test)
+
+    @populate_playlist
+    def test_tracks_are_not_copied_until_playlist_is_changed(self):
+        cp_tracks = self.controller.cp_tracks
+        tracks = self.controller.tracks
+        self.assert_(cp_tracks is self.controller.cp_tracks)
+        self.assert_(tracks is self.controller.tracks)
+        self.controller.append([Track()])
+        self.assert_(cp_tracks is not self.controller.cp_tracks)
+        self.assert_(tracks is not self.controller.tracks)
+        self.assertEqual(len(self.controller.tracks), len(tracks) + 1)
 
     @populate_playlist
     def test_remove(self):
@@ -195,6 +296,27 @@ class CurrentPlaylistControllerTest(object):
         self.assert_(track1 not in self.controller.tracks)
         self.assertEqual(track2, self.controller.tracks[1])
 
+    @populate_playlist
+    def test_remove_slice(self):
+        version = self.controller.version
+        cp_tracks = self.controller.cp_tracks
+        removed = self.controller.remove_slice(0, 2)
+        self.assertEqual(removed, list(cp_tracks[:2]))
+        self.assertEqual(self.controller.cp_tracks, cp_tracks[2:])
+        self.assertEqual(self.controller.version, version + 1)
+
+    @populate_playlist
+    def test_remove_slice_to_end_of_playlist(self):
+        removed = self.controller.remove_slice(1)
+        self.assertEqual([ct[1] for ct in removed], self.tracks[1:])
+        self.assertEqual(list(self.controller.tracks), self.tracks[:1])
+
+    @populate_playlist
+    def test_remove_slice_outside_of_playlist(self):
+        version = self.controller.version
+        self.assertEqual(self.controller.remove_slice(5, 7), [])
+        self.assertEqual(self.controller.version, version)
+
     @populate_playlist
     def test_removing_track_that_does_not_exist(self):
         test = lambda: self.controller.remove(uri='/nonexistant')
@@ -256,3 +378,40 @@ class CurrentPlaylistControllerTest(object):
         version = self.controller.version
         self.controller.append([Track()])
         self.assert_(version < self.controller.version)
+
+    @populate_playlist
+    def test_changed_positions_after_append(self):
+        version = self.controller.version
+        self.controller.append([Track()])
+        self.assertEqual([3], self.controller.changed_positions(version))
+
+    @populate_playlist
+    def test_changed_positions_after_remove(self):
+        version = self.controller.version
+        self.controller.remove(cpid=self.controller.cp_tracks[1][0])
+        self.assertEqual([1], self.controller.changed_positions(version))
+
+    @populate_playlist
+    def test_changed_positions_after_move(self):
+        version = self.controller.version
+        self.controller.move(0, 1, 1)
+        self.assertEqual([0, 1], self.controller.changed_positions(version))
+
+    @populate_playlist
+    def test_changed_positions_after_clear(self):
+        version = self.controller.version
+        self.controller.clear()
+        self.assertEqual([], self.controller.changed_positions(version))
+
+    @populate_playlist
+    def test_changed_positions_combines_changes(self):
+        version = self.controller.version
+        self.controller.move(2, 3, 1)
+        self.controller.append([Track()])
+        self.assertEqual([1, 2, 3],
+            self.controller.changed_positions(version))
+
+    @populate_playlist
+    def test_changed_positions_for_current_version_is_empty(self):
+        self.assertEqual([],
+            self.controller.changed_positions(self.controller.version))
@@ -69,6 +69,21 @@ class LibraryControllerTest(object):
         result = self.library.find_exact(album=['album2'])
         self.assertEqual(result, Playlist(tracks=self.tracks[1:2]))
 
+    def test_find_exact_multiple_fields(self):
+        result = self.library.find_exact(artist=['artist2'], track=['track2'])
+        self.assertEqual(result, Playlist(tracks=self.tracks[1:2]))
+
+        result = self.library.find_exact(artist=['artist2'], track=['track1'])
+        self.assertEqual(result, Playlist())
+
+    def test_iter_find_exact(self):
+        result = self.library.iter_find_exact(artist=['artist2'])
+        self.assertEqual(list(result), self.tracks[1:2])
+
+    def test_iter_find_exact_wrong_type(self):
+        test = lambda: self.library.iter_find_exact(wrong=['test'])
+        self.assertRaises(LookupError, test)
+
     def test_find_exact_wrong_type(self):
         test = lambda: self.library.find_exact(wrong=['test'])
         self.assertRaises(LookupError, test)
@@ -137,6 +152,17 @@ class LibraryControllerTest(object):
         result = self.library.search(any=['RI1'])
         self.assertEqual(result, Playlist(tracks=self.tracks[:1]))
 
+    def test_search_multiple_fields(self):
+        result = self.library.search(artist=['Tist1'], album=['Bum1'])
+        self.assertEqual(result, Playlist(tracks=self.tracks[:1]))
+
+        result = self.library.search(artist=['Tist1'], album=['Bum2'])
+        self.assertEqual(result, Playlist())
+
+    def test_iter_search(self):
+        result = self.library.iter_search(track=['Rack1'])
+        self.assertEqual(list(result), self.tracks[:1])
+
     def test_search_wrong_type(self):
         test = lambda: self.library.search(wrong=['test'])
         self.assertRaises(LookupError, test)
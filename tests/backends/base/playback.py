@@ -304,7 +304,7 @@ class PlaybackControllerTest(object):
         self.playback.random = True
         self.assertEqual(self.playback.track_at_next, self.tracks[2])
         self.backend.current_playlist.append(self.tracks[:1])
-        self.assertEqual(self.playback.track_at_next, self.tracks[1])
+        self.assertEqual(self.playback.track_at_next, self.tracks[2])
 
     @populate_playlist
     def test_end_of_track(self):
@@ -433,7 +433,7 @@ class PlaybackControllerTest(object):
         self.playback.random = True
         self.assertEqual(self.playback.track_at_next, self.tracks[2])
         self.backend.current_playlist.append(self.tracks[:1])
-        self.assertEqual(self.playback.track_at_next, self.tracks[1])
+        self.assertEqual(self.playback.track_at_next, self.tracks[2])
 
     @populate_playlist
     def test_previous_track_before_play(self):
@@ -516,9 +516,9 @@ class PlaybackControllerTest(object):
     def test_on_current_playlist_change_gets_called(self):
         callback = self.playback.on_current_playlist_change
 
-        def wrapper():
+        def wrapper(*args, **kwargs):
             wrapper.called = True
-            return callback()
+            return callback(*args, **kwargs)
         wrapper.called = False
 
         self.playback.on_current_playlist_change = wrapper
@@ -739,7 +739,27 @@ class PlaybackControllerTest(object):
     def test_time_position_when_stopped_with_playlist(self):
         self.assertEqual(self.playback.time_position, 0)
 
-    @SkipTest # Uses sleep and does not work with LocalBackend+DummyOutput
+    def test_total_play_time_when_stopped(self):
+        self.assertEqual(self.playback.total_play_time, 0)
+
+    @populate_playlist
+    def test_total_play_time_is_kept_when_paused_and_stopped(self):
+        self.playback.play()
+        self.playback._total_play_time_started -= 2000
+        self.playback.pause()
+        paused = self.playback.total_play_time
+        self.assert_(paused >= 2000, paused)
+        self.playback.stop()
+        self.assertEqual(self.playback.total_play_time, paused)
+
+    @populate_playlist
+    def test_total_play_time_is_kept_when_changing_track(self):
+        self.playback.play()
+        self.playback._total_play_time_started -= 2000
+        self.playback.next()
+        self.assert_(self.playback.total_play_time >= 2000)
+
+    @SkipTest # Uses sleep
     @populate_playlist
     def test_time_position_when_playing(self):
         self.playback.play()
@@ -759,6 +779,44 @@ class PlaybackControllerTest(object):
         second = self.playback.time_position
         self.assertEqual(first, second)
 
+    @populate_playlist
+    def test_time_position_follows_reported_position(self):
+        self.playback.play()
+        self.playback.on_time_position(1000, int(time.time() * 1000))
+        self.assert_(1000 <= self.playback.time_position < 1500)
+
+    @populate_playlist
+    def test_time_position_reported_before_seek_is_ignored(self):
+        self.playback.play()
+        reported_at = int(time.time() * 1000) - 1000
+        self.playback.seek(2000)
+        self.playback.on_time_position(1000, reported_at)
+        self.assert_(self.playback.time_position >= 2000)
+
+    @populate_playlist
+    def test_time_position_reported_with_old_serial_is_ignored(self):
+        self.playback.play()
+        serial = self.backend.output.position_serial
+        self.playback.seek(2000)
+        self.playback.on_time_position(1000, int(time.time() * 1000), serial)
+        self.assert_(self.playback.time_position >= 2000)
+
+    @populate_playlist
+    def test_time_position_reported_with_current_serial_is_used(self):
+        self.playback.play()
+        self.playback.seek(2000)
+        serial = self.backend.output.position_serial
+        self.playback.on_time_position(1000, int(time.time() * 1000), serial)
+        self.assert_(1000 <= self.playback.time_position < 1500)
+
+    @populate_playlist
+    def test_time_position_reported_when_paused_is_ignored(self):
+        self.playback.play()
+        self.playback.pause()
+        position = self.playback.time_position
+        self.playback.on_time_position(3000, int(time.time() * 1000))
+        self.assertEqual(self.playback.time_position, position)
+
     @populate_playlist
     def test_play_with_consume(self):
         self.playback.consume = True
@@ -856,6 +914,40 @@ class PlaybackControllerTest(object):
             played.append(self.playback.current_track)
             self.playback.next()
 
+    @populate_playlist
+    def test_random_plays_appended_tracks_once(self):
+        self.playback.random = True
+        self.playback.play()
+        played = [self.playback.current_cp_track]
+        self.playback.next()
+        self.current_playlist.append(self.tracks)
+        while self.playback.current_cp_track is not None:
+            self.assert_(self.playback.current_cp_track not in played)
+            played.append(self.playback.current_cp_track)
+            self.playback.next()
+        self.assertEqual(len(played), len(self.tracks) * 2)
+        self.assertEqual(sorted(played), sorted(self.current_playlist.cp_tracks))
+
+    @populate_playlist
+    def test_random_does_not_play_removed_tracks(self):
+        self.playback.random = True
+        self.playback.play()
+        removed = self.current_playlist.remove_slice(1)
+        self.playback.next()
+        self.assert_(self.playback.current_cp_track not in removed)
+
+    @populate_playlist
+    def test_random_with_repeat_plays_all_tracks_again(self):
+        self.playback.random = True
+        self.playback.repeat = True
+        self.playback.play()
+        played = []
+        for _ in range(len(self.tracks) * 2):
+            played.append(self.playback.current_cp_track)
+            self.playback.next()
+        self.assertEqual(sorted(played[:len(self.tracks)]),
+            sorted(played[len(self.tracks):]))
+
     @populate_playlist
     def test_playing_track_that_isnt_in_playlist(self):
         test = lambda: self.playback.play((17, Track()))
@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from mopidy.backends.base.shuffle import ShuffleOrder
+
+class ShuffleOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.order = ShuffleOrder(range(10))
+
+    def take_all(self):
+        items = []
+        while self.order:
+            items.append(self.order.next)
+            self.order.discard(self.order.next)
+        return items
+
+    def test_empty(self):
+        order = ShuffleOrder()
+        self.assertEqual(len(order), 0)
+        self.assertEqual(order.next, None)
+
+    def test_len(self):
+        self.assertEqual(len(self.order), 10)
+
+    def test_contains(self):
+        self.assert_(3 in self.order)
+        self.assert_(10 not in self.order)
+
+    def test_same_order_as_random_shuffle(self):
+        random.seed(1)
+        expected = range(10)
+        random.shuffle(expected)
+        random.seed(1)
+        self.order = ShuffleOrder(range(10))
+        self.assertEqual(self.take_all(), expected)
+
+    def test_all_items_are_given_once(self):
+        self.assertEqual(sorted(self.take_all()), range(10))
+
+    def test_add(self):
+        self.order.add(10)
+        self.assert_(10 in self.order)
+        self.assertEqual(sorted(self.take_all()), range(11))
+
+    def test_add_item_twice(self):
+        self.order.add(3)
+        self.assertEqual(len(self.order), 10)
+
+    def test_add_to_empty_order(self):
+        order = ShuffleOrder()
+        order.add(1)
+        self.assertEqual(order.next, 1)
+
+    def test_add_does_not_change_next(self):
+        next_item = self.order.next
+        for item in range(10, 100):
+            self.order.add(item)
+        self.assertEqual(self.order.next, next_item)
+
+    def test_discard(self):
+        self.order.discard(3)
+        self.assert_(3 not in self.order)
+        self.assertEqual(sorted(self.take_all()), [0, 1, 2, 4, 5, 6, 7, 8, 9])
+
+    def test_discard_unknown_item(self):
+        self.order.discard(10)
+        self.assertEqual(len(self.order), 10)
+
+    def test_discard_does_not_change_next(self):
+        next_item = self.order.next
+        for item in range(10):
+            if item != next_item:
+                self.order.discard(item)
+        self.assertEqual(self.order.next, next_item)
+        self.assertEqual(len(self.order), 1)
+
+    def test_discard_next(self):
+        next_item = self.order.next
+        self.order.discard(next_item)
+        self.assertNotEqual(self.order.next, next_item)
+        self.assertEqual(len(self.order), 9)
@@ -0,0 +1,53 @@
+import unittest
+
+from mopidy.backends.dummy import DummyBackend
+from mopidy.mixers.dummy import DummyMixer
+from mopidy.models import Track
+
+class SubsystemChangedEventsTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = DummyBackend(mixer_class=DummyMixer)
+
+    def changed_subsystems(self):
+        return [m['subsystem']
+            for m in self.backend.core_queue.received_messages
+            if m['command'] == 'subsystem_changed']
+
+    def test_current_playlist_change_notifies_playlist_changed(self):
+        self.backend.current_playlist.append([Track()])
+        self.assert_(u'playlist' in self.changed_subsystems())
+
+    def test_playback_state_change_notifies_player_changed(self):
+        self.backend.current_playlist.append([Track()])
+        self.backend.core_queue.received_messages = []
+        self.backend.playback.play()
+        self.assert_(u'player' in self.changed_subsystems())
+
+    def test_seek_notifies_player_changed(self):
+        self.backend.current_playlist.append([Track(length=40000)])
+        self.backend.playback.play()
+        self.backend.core_queue.received_messages = []
+        self.backend.playback.seek(1000)
+        self.assert_(u'player' in self.changed_subsystems())
+
+    def test_changing_options_notifies_options_changed(self):
+        for option in ('consume', 'random', 'repeat', 'single'):
+            self.backend.core_queue.received_messages = []
+            setattr(self.backend.playback, option, True)
+            self.assertEqual([u'options'], self.changed_subsystems())
+
+    def test_changing_volume_notifies_mixer_changed(self):
+        self.backend.mixer.volume = 50
+        self.assertEqual([u'mixer'], self.changed_subsystems())
+
+    def test_creating_stored_playlist_notifies_stored_playlist_changed(self):
+        self.backend.stored_playlists.create(u'foo')
+        self.assertEqual([u'stored_playlist'], self.changed_subsystems())
+
+    def test_library_update_notifies_update_changed(self):
+        self.backend.library.update()
+        self.assert_(u'update' in self.changed_subsystems())
+
+    def test_library_refresh_notifies_database_changed(self):
+        self.backend.library.refresh()
+        self.assertEqual([u'database'], self.changed_subsystems())
@@ -0,0 +1,203 @@
+import datetime
+import unittest
+
+from mopidy.backends.local.index import DirectoryTree, LibraryIndex
+from mopidy.models import Track, Artist, Album
+
+class LibraryIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tracks = [
+            Track(name='Foo Song', uri='file:///foo.mp3', length=1000,
+                artists=[Artist(name='Some Artist')],
+                album=Album(name='First Album')),
+            Track(name='Bar Song', uri='file:///bar.mp3', length=2000,
+                artists=[Artist(name='Other Artist'),
+                    Artist(name='Some Artist')],
+                album=Album(name='Second Album')),
+            Track(name='Baz', uri='file:///baz.mp3', length=4000,
+                date=datetime.date(2006, 1, 1), genre='Rock'),
+        ]
+        self.index = LibraryIndex(self.tracks)
+
+    def test_len(self):
+        self.assertEqual(len(self.index), 3)
+
+    def test_all(self):
+        self.assertEqual(self.index.all(), set([0, 1, 2]))
+
+    def test_tracks_are_returned_in_insertion_order(self):
+        self.assertEqual(self.index.tracks(set([2, 0])),
+            [self.tracks[0], self.tracks[2]])
+
+    def test_iter_tracks_yields_tracks_in_insertion_order(self):
+        tracks = self.index.iter_tracks(set([2, 0]))
+        self.assertEqual(tracks.next(), self.tracks[0])
+        self.assertEqual(list(tracks), [self.tracks[2]])
+
+    def test_find_exact_track(self):
+        self.assertEqual(self.index.find_exact('track', 'Baz'), set([2]))
+
+    def test_find_exact_album(self):
+        self.assertEqual(
+            self.index.find_exact('album', 'Second Album'), set([1]))
+
+    def test_find_exact_artist_matches_any_of_the_artists(self):
+        self.assertEqual(
+            self.index.find_exact('artist', 'Some Artist'), set([0, 1]))
+
+    def test_find_exact_uri(self):
+        self.assertEqual(
+            self.index.find_exact('uri', 'file:///foo.mp3'), set([0]))
+
+    def test_find_exact_is_case_sensitive(self):
+        self.assertEqual(self.index.find_exact('track', 'baz'), set())
+
+    def test_find_exact_any(self):
+        self.assertEqual(self.index.find_exact('any', 'Baz'), set([2]))
+
+    def test_find_exact_invalid_field(self):
+        self.assertRaises(LookupError, self.index.find_exact, 'wrong', 'Baz')
+
+    def test_search_is_case_insensitive(self):
+        self.assertEqual(self.index.search('track', 'SONG'), set([0, 1]))
+
+    def test_search_substring(self):
+        self.assertEqual(self.index.search('album', 'cond alb'), set([1]))
+
+    def test_search_short_query(self):
+        self.assertEqual(self.index.search('track', 'ba'), set([1, 2]))
+
+    def test_search_with_matching_trigrams_but_no_substring(self):
+        index = LibraryIndex([Track(name='abab')])
+        self.assertEqual(index.search('track', 'ababab'), set())
+
+    def test_search_no_hits(self):
+        self.assertEqual(self.index.search('artist', 'unknown'), set())
+
+    def test_search_any(self):
+        self.assertEqual(self.index.search('any', 'baz'), set([2]))
+        self.assertEqual(self.index.search('any', 'artist'), set([0, 1]))
+
+    def test_search_invalid_field(self):
+        self.assertRaises(LookupError, self.index.search, 'wrong', 'baz')
+
+    def test_count(self):
+        self.assertEqual(self.index.count('artist', 'Some Artist'), (2, 3000))
+        self.assertEqual(self.index.count('track', 'Baz'), (1, 4000))
+
+    def test_count_no_hits(self):
+        self.assertEqual(self.index.count('album', 'Unknown'), (0, 0))
+
+    def test_count_invalid_field(self):
+        self.assertRaises(LookupError, self.index.count, 'any', 'Baz')
+
+    def test_count_values(self):
+        self.assertEqual(self.index.count_values('artist'), 2)
+        self.assertEqual(self.index.count_values('album'), 2)
+        self.assertEqual(self.index.count_values('track'), 3)
+
+    def test_find_exact_genre(self):
+        self.assertEqual(self.index.find_exact('genre', 'Rock'), set([2]))
+
+    def test_find_exact_date(self):
+        self.assertEqual(
+            self.index.find_exact('date', '2006-01-01'), set([2]))
+
+    def test_search_genre(self):
+        self.assertEqual(self.index.search('genre', 'rO'), set([2]))
+
+    def test_search_date(self):
+        self.assertEqual(self.index.search('date', '2006'), set([2]))
+        self.assertEqual(self.index.search('date', '2007'), set())
+
+    def test_count_genre(self):
+        self.assertEqual(self.index.count('genre', 'Rock'), (1, 4000))
+
+    def test_values(self):
+        self.assertEqual(self.index.values('artist'),
+            ['Other Artist', 'Some Artist'])
+        self.assertEqual(self.index.values('genre'), ['Rock'])
+
+    def test_values_of_tracks(self):
+        self.assertEqual(self.index.values('album', set([1, 2])),
+            ['Second Album'])
+        self.assertEqual(self.index.values('date', set([0, 2])),
+            ['2006-01-01'])
+
+    def test_values_are_updated_when_adding_tracks(self):
+        self.assertEqual(self.index.values('genre'), ['Rock'])
+        self.index.add(Track(genre='Pop'))
+        self.assertEqual(self.index.values('genre'), ['Pop', 'Rock'])
+
+    def test_values_invalid_field(self):
+        self.assertRaises(LookupError, self.index.values, 'wrong')
+
+    def test_playtime(self):
+        self.assertEqual(self.index.playtime, 7000)
+
+    def test_results_can_be_modified_without_changing_the_index(self):
+        self.index.search('track', 'song').clear()
+        self.index.find_exact('artist', 'Some Artist').clear()
+        self.assertEqual(self.index.search('track', 'song'), set([0, 1]))
+        self.assertEqual(
+            self.index.find_exact('artist', 'Some Artist'), set([0, 1]))
+
+
+class DirectoryTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.tracks = [
+            Track(uri='file:///music/b.mp3'),
+            Track(uri='file:///music/a.mp3'),
+            Track(uri='file:///music/artist/album/c.mp3'),
+            Track(uri='file:///music/artist/d.mp3'),
+            Track(uri='file:///music/other/e.mp3'),
+        ]
+        self.tree = DirectoryTree(u'/music', self.tracks)
+
+    def test_browse_root(self):
+        self.assertEqual(self.tree.browse(u''), ([u'artist', u'other'],
+            [self.tracks[1], self.tracks[0]]))
+
+    def test_browse_root_with_slash(self):
+        self.assertEqual(self.tree.browse(u'/'), self.tree.browse(u''))
+
+    def test_browse_subdirectory(self):
+        self.assertEqual(self.tree.browse(u'artist'),
+            ([u'artist/album'], [self.tracks[3]]))
+        self.assertEqual(self.tree.browse(u'artist/album'),
+            ([], [self.tracks[2]]))
+
+    def test_browse_unknown_directory(self):
+        self.assertRaises(LookupError, self.tree.browse, u'unknown')
+        self.assertRaises(LookupError, self.tree.browse, u'artist/unknown')
+
+    def test_browse_without_music_folder(self):
+        tree = DirectoryTree(tracks=[Track(uri='file:///music/a.mp3')])
+        self.assertEqual(tree.browse(u''), ([u'music'], []))
+        self.assertEqual(tree.browse(u'music'),
+            ([], [Track(uri='file:///music/a.mp3')]))
+
+    def test_music_folder_with_trailing_slash(self):
+        tree = DirectoryTree(u'/music/', self.tracks)
+        self.assertEqual(tree.browse(u''), self.tree.browse(u''))
+
+    def test_add(self):
+        track = Track(uri='file:///music/new/f.mp3')
+        self.tree.add(track)
+        self.assertEqual(self.tree.browse(u'new'), ([], [track]))
+
+    def test_remove(self):
+        self.tree.remove(self.tracks[3])
+        self.assertEqual(self.tree.browse(u'artist'), ([u'artist/album'], []))
+
+    def test_remove_prunes_empty_directories(self):
+        self.tree.remove(self.tracks[2])
+        self.assertEqual(self.tree.browse(u'artist'), ([], [self.tracks[3]]))
+        self.assertRaises(LookupError, self.tree.browse, u'artist/album')
+        self.tree.remove(self.tracks[4])
+        self.assertEqual(self.tree.browse(u'')[0], [u'artist'])
+
+    def test_remove_unknown_track(self):
+        self.tree.remove(Track(uri='file:///music/unknown/g.mp3'))
+        self.tree.remove(Track(uri='file:///music/h.mp3'))
+        self.assertEqual(len(self.tree.browse(u'')[1]), 2)
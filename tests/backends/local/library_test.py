@@ -1,3 +1,7 @@
+import logging
+import os
+import shutil
+import tempfile
 import unittest
 
 # FIXME Our Windows build server does not support GStreamer yet
@@ -7,7 +11,8 @@ if sys.platform == 'win32':
     raise SkipTest
 
 from mopidy import settings
-from mopidy.backends.local import LocalBackend
+from mopidy.backends.local import LocalBackend, LocalLibraryUpdater
+from mopidy.models import Playlist
 
 from tests import data_folder
 from tests.backends.base.library import LibraryControllerTest
@@ -26,3 +31,146 @@ class LocalLibraryControllerTest(LibraryControllerTest, unittest.TestCase):
         settings.runtime.clear()
 
         super(LocalLibraryControllerTest, self).tearDown()
+
+    def test_refresh_drops_removed_tracks(self):
+        settings.LOCAL_TAG_CACHE_FILE = data_folder('empty_tag_cache')
+        self.library.refresh()
+        self.assertRaises(LookupError, self.library.lookup, self.tracks[0].uri)
+        self.assertEqual(Playlist(), self.library.search(uri=['uri1']))
+
+    def test_count(self):
+        self.assertEqual(self.library.count(artist=['artist1']),
+            {'songs': 1, 'playtime': 4000})
+
+    def test_count_uri(self):
+        self.assertEqual(self.library.count(uri=[self.tracks[0].uri]),
+            {'songs': 1, 'playtime': 4000})
+
+    def test_count_any(self):
+        self.assertEqual(self.library.count(any=['artist1']),
+            {'songs': 1, 'playtime': 4000})
+        self.assertEqual(self.library.count(any=['unknown']),
+            {'songs': 0, 'playtime': 0})
+
+    def test_count_invalid_field(self):
+        self.assertRaises(LookupError, self.library.count, wrong=['artist1'])
+
+    def test_count_with_several_fields(self):
+        self.assertEqual(
+            self.library.count(artist=['artist1'], album=['album1']),
+            {'songs': 1, 'playtime': 4000})
+        self.assertEqual(
+            self.library.count(artist=['artist1'], album=['album2']),
+            {'songs': 0, 'playtime': 0})
+
+    def test_list_values(self):
+        self.assertEqual(self.library.list_values('artist'),
+            ['artist1', 'artist2', 'artist3'])
+
+    def test_list_values_with_query(self):
+        self.assertEqual(self.library.list_values('album', artist=['artist2']),
+            ['album2'])
+        self.assertEqual(self.library.list_values('album', artist=['none']),
+            [])
+
+    def test_list_and_find_dates_from_tag_cache(self):
+        settings.LOCAL_TAG_CACHE_FILE = data_folder('simple_tag_cache')
+        self.library.refresh()
+        self.assertEqual(self.library.list_values('date'), ['2006-01-01'])
+        self.assertEqual(
+            len(self.library.find_exact(date=['2006-01-01']).tracks), 1)
+        self.assertEqual(self.library.count(date=['2006-01-01']),
+            {'songs': 1, 'playtime': 4000})
+
+    def test_stats(self):
+        stats = self.library.stats()
+        self.assertEqual(stats['artists'], 3)
+        self.assertEqual(stats['albums'], 3)
+        self.assertEqual(stats['songs'], 3)
+        self.assertEqual(stats['playtime'], 12000)
+        self.assert_(stats['updated'] > 0)
+
+    def test_browse_root(self):
+        (directories, tracks) = self.library.browse('')
+        self.assertEqual(directories, [])
+        self.assertEqual(tracks[:2], self.tracks[:2])
+
+    def test_browse_unknown_directory(self):
+        self.assertRaises(LookupError, self.library.browse, 'unknown')
+
+    def test_update_unknown_path(self):
+        self.assertRaises(LookupError, self.library.update, u'unknown')
+
+    def test_update_path_outside_music_folder(self):
+        self.assertRaises(LookupError, self.library.update, u'../..')
+
+    def test_update_unknown_path_does_not_start_job(self):
+        self.assertRaises(LookupError, self.library.update, u'unknown')
+        self.assertEqual(self.library._update_job_id, 0)
+
+    def test_update_while_updating_does_not_start_job(self):
+        class RunningUpdater(object):
+            def is_alive(self):
+                return True
+        self.library.provider._updater = RunningUpdater()
+        self.assertEqual(self.library.update(), 0)
+        self.assertEqual(self.library.update(), 0)
+
+    def test_refresh_removes_tracks_from_directories(self):
+        settings.LOCAL_TAG_CACHE_FILE = data_folder('empty_tag_cache')
+        self.library.refresh()
+        self.assertEqual(self.library.browse(''), ([], []))
+
+
+class LocalLibraryUpdaterTest(unittest.TestCase):
+    def test_update_only_scans_modified_files(self):
+        command = LocalLibraryUpdater(None).get_command()
+        self.assert_('--update' in command)
+
+    def test_rescan_scans_all_files(self):
+        command = LocalLibraryUpdater(None, rescan=True).get_command()
+        self.assert_('--update' not in command)
+
+    def test_update_path_only_scans_path(self):
+        command = LocalLibraryUpdater(None, path=u'artist').get_command()
+        self.assertEqual(command[-2:], ['--path', 'artist'])
+
+    def test_update_without_path_scans_all_folders(self):
+        command = LocalLibraryUpdater(None).get_command()
+        self.assert_('--path' not in command)
+
+    def test_failure_to_replace_tag_cache_is_logged(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            # A directory can not be replaced by the new tag cache
+            settings.LOCAL_TAG_CACHE_FILE = os.path.join(temp_dir, 'tag_cache')
+            os.mkdir(settings.LOCAL_TAG_CACHE_FILE)
+            updater = LocalLibraryUpdater(None)
+            updater.get_command = lambda: [sys.executable, '-c', 'pass']
+            updater.run_inside_try()
+            self.assert_(os.path.isdir(settings.LOCAL_TAG_CACHE_FILE))
+        finally:
+            shutil.rmtree(temp_dir)
+            settings.runtime.clear()
+
+    def test_failed_update_logs_scanner_output(self):
+        messages = []
+        handler = logging.Handler()
+        handler.emit = lambda record: messages.append(record.getMessage())
+        logger = logging.getLogger('mopidy.backends.local')
+        logger.addHandler(handler)
+        temp_dir = tempfile.mkdtemp()
+        try:
+            settings.LOCAL_TAG_CACHE_FILE = os.path.join(temp_dir, 'tag_cache')
+            updater = LocalLibraryUpdater(None)
+            updater.get_command = lambda: [sys.executable, '-c',
+                'import sys; sys.stderr.write("No such folder\\n"); '
+                'sys.exit(2)']
+            updater.run_inside_try()
+            self.assert_(any('status 2' in m and 'No such folder' in m
+                for m in messages))
+            self.assertEqual(os.listdir(temp_dir), [])
+        finally:
+            logger.removeHandler(handler)
+            shutil.rmtree(temp_dir)
+            settings.runtime.clear()
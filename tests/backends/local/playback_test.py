@@ -12,6 +12,7 @@ from mopidy.models import Track
 from mopidy.utils.path import path_to_uri
 
 from tests import data_folder
+from tests.backends.base import populate_playlist
 from tests.backends.base.playback import PlaybackControllerTest
 from tests.backends.local import generate_song
 
@@ -53,3 +54,65 @@ class LocalPlaybackControllerTest(PlaybackControllerTest, unittest.TestCase):
         self.add_track('blank.flac')
         self.playback.play()
         self.assertEqual(self.playback.state, self.playback.PLAYING)
+
+    @populate_playlist
+    def test_play_sets_next_uri(self):
+        self.playback.play()
+        self.assertEqual(self.output.next_uri, self.tracks[1].uri)
+
+    @populate_playlist
+    def test_next_uri_is_updated_when_current_playlist_changes(self):
+        self.playback.play()
+        self.current_playlist.remove(cpid=1)
+        self.assertEqual(self.output.next_uri, self.tracks[2].uri)
+
+    @populate_playlist
+    def test_next_uri_is_updated_when_repeat_changes(self):
+        self.playback.play(self.current_playlist.cp_tracks[-1])
+        self.assertEqual(self.output.next_uri, None)
+        self.playback.repeat = True
+        self.assertEqual(self.output.next_uri, self.tracks[0].uri)
+
+    @populate_playlist
+    def test_next_uri_is_cleared_on_stop(self):
+        self.playback.play()
+        self.playback.stop()
+        self.assertEqual(self.output.next_uri, None)
+
+    @populate_playlist
+    def test_end_of_track_when_next_track_started(self):
+        self.playback.play()
+        self.playback.on_end_of_track(next_uri=self.tracks[1].uri)
+        self.assertEqual(self.playback.current_track, self.tracks[1])
+        self.assertEqual(self.playback.state, self.playback.PLAYING)
+        self.assertEqual(self.output.uri, self.tracks[0].uri)
+        self.assertEqual(self.output.next_uri, self.tracks[2].uri)
+
+    @populate_playlist
+    def test_end_of_track_when_next_track_started_with_repeat_and_single(self):
+        self.playback.repeat = True
+        self.playback.single = True
+        self.playback.play()
+        self.output.next_uri = None
+        self.playback.on_end_of_track(next_uri=self.tracks[0].uri)
+        self.assertEqual(self.playback.current_track, self.tracks[0])
+        self.assertEqual(self.output.next_uri, self.tracks[0].uri)
+
+    @populate_playlist
+    def test_end_of_track_when_next_track_started_but_removed(self):
+        self.playback.play()
+        self.playback.on_end_of_track(next_uri=self.tracks[1].uri)
+        self.current_playlist.remove(cpid=2)
+        self.playback.on_end_of_track(next_uri=self.tracks[2].uri)
+        self.assertEqual(self.playback.current_track, None)
+        self.assertEqual(self.playback.state, self.playback.STOPPED)
+
+    @populate_playlist
+    def test_end_of_track_when_other_uri_than_next_track_started(self):
+        self.playback.play()
+        # The next track is changed after the output started playing it
+        self.current_playlist.move(1, 2, 2)
+        self.playback.on_end_of_track(next_uri=self.tracks[1].uri)
+        self.assertEqual(self.playback.current_track, self.tracks[2])
+        self.assertEqual(self.playback.state, self.playback.PLAYING)
+        self.assertEqual(self.output.uri, self.tracks[2].uri)
@@ -1,11 +1,15 @@
 # encoding: utf-8
 
+import datetime
 import os
 import tempfile
 import unittest
 
-from mopidy.utils.path import path_to_uri
-from mopidy.backends.local.translator import parse_m3u, parse_mpd_tag_cache
+from mopidy import settings
+from mopidy.utils.path import mtime, path_to_uri
+from mopidy.backends.local.translator import (parse_m3u,
+    parse_mpd_tag_cache, iter_mpd_tag_cache)
+from mopidy.frontends.mpd.translator import tracks_to_tag_cache_format
 from mopidy.models import Track, Artist, Album
 
 from tests import SkipTest, data_folder
@@ -78,12 +82,13 @@ class URItoM3UTest(unittest.TestCase):
 expected_artists = [Artist(name='name')]
 expected_albums = [Album(name='albumname', artists=expected_artists,
     num_tracks=2)]
+expected_date = datetime.date(2006, 1, 1)
 expected_tracks = []
 
 def generate_track(path, ident):
     uri = path_to_uri(data_folder(path))
     track = Track(name='trackname', artists=expected_artists, track_no=1,
-        album=expected_albums[0], length=4000, uri=uri)
+        album=expected_albums[0], length=4000, uri=uri, date=expected_date)
     expected_tracks.append(track)
 
 generate_track('song1.mp3', 6)
@@ -96,6 +101,17 @@ generate_track('subdir2/song7.mp3', 5)
 generate_track('subdir1/subsubdir/song8.mp3', 0)
 generate_track('subdir1/subsubdir/song9.mp3', 1)
 
+def write_tag_cache(tracks):
+    """Write a tag cache like mopidy-scan does, and return its path."""
+    (fd, path) = tempfile.mkstemp()
+    with os.fdopen(fd, 'w') as tag_cache:
+        for line in tracks_to_tag_cache_format(tracks):
+            if len(line) == 1:
+                tag_cache.write((u'%s\n' % line).encode('utf-8'))
+            else:
+                tag_cache.write((u'%s: %s\n' % line).encode('utf-8'))
+    return path
+
 class MPDTagCacheToTracksTest(unittest.TestCase):
     def test_emtpy_cache(self):
         tracks = parse_mpd_tag_cache(data_folder('empty_tag_cache'),
@@ -107,7 +123,8 @@ class MPDTagCacheToTracksTest(unittest.TestCase):
             data_folder(''))
         uri = path_to_uri(data_folder('song1.mp3'))
         track = Track(name='trackname', artists=expected_artists, track_no=1,
-            album=expected_albums[0], length=4000, uri=uri)
+            album=expected_albums[0], length=4000, uri=uri,
+            date=expected_date)
         self.assertEqual(set([track]), tracks)
 
     def test_advanced_cache(self):
@@ -159,5 +176,82 @@ class MPDTagCacheToTracksTest(unittest.TestCase):
         artist = Artist(name='albumartistname')
         album = expected_albums[0].copy(artists=[artist])
         track = Track(name='trackname', artists=expected_artists, track_no=1,
-            album=album, length=4000, uri=uri)
+            album=album, length=4000, uri=uri, date=expected_date)
         self.assertEqual(track, list(tracks)[0])
+
+    def test_genre_tag_cache(self):
+        tracks = parse_mpd_tag_cache(data_folder('genre_tag_cache'),
+            data_folder(''))
+        self.assertEqual(u'Rock', list(tracks)[0].genre)
+
+    def test_date_tag_cache(self):
+        tracks = parse_mpd_tag_cache(data_folder('simple_tag_cache'),
+            data_folder(''))
+        self.assertEqual(datetime.date(2006, 1, 1), list(tracks)[0].date)
+
+    def test_missing_cache(self):
+        tracks = parse_mpd_tag_cache(data_folder('does_not_exist'),
+            data_folder(''))
+        self.assertEqual(set(), tracks)
+
+
+class MPDTagCacheIteratorTest(unittest.TestCase):
+    def test_yields_tracks_in_tag_cache_order(self):
+        tracks = iter_mpd_tag_cache(data_folder('advanced_tag_cache'),
+            data_folder(''))
+        self.assertFalse(isinstance(tracks, (list, set)))
+        uris = [track.uri for track in tracks]
+        first_uri = path_to_uri(data_folder('subdir1/subsubdir/song8.mp3'))
+        self.assertEqual(first_uri, uris[0])
+        self.assertEqual(len(expected_tracks), len(uris))
+
+    def test_equal_artists_and_albums_are_shared(self):
+        tracks = list(iter_mpd_tag_cache(data_folder('advanced_tag_cache'),
+            data_folder('')))
+        self.assertTrue(tracks[0].album is tracks[1].album)
+        self.assertTrue(list(tracks[0].artists)[0] is
+            list(tracks[1].artists)[0])
+        self.assertTrue(tracks[0]._artists is tracks[1]._artists)
+
+    def test_mtimes_are_collected(self):
+        mtimes = {}
+        list(iter_mpd_tag_cache(data_folder('simple_tag_cache'),
+            data_folder(''), mtimes))
+        uri = path_to_uri(data_folder('song1.mp3'))
+        self.assertEqual({uri: 1272319626}, mtimes)
+
+
+class TagCacheRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        settings.LOCAL_MUSIC_PATH = data_folder('')
+        mtime.set_fake_time(1272319626)
+
+    def tearDown(self):
+        settings.runtime.clear()
+        mtime.undo_fake()
+
+    def test_dates_with_month_and_day(self):
+        tag_cache = write_tag_cache([
+            Track(uri=path_to_uri(data_folder('song1.mp3')),
+                date=datetime.date(2006, 2, 3)),
+            Track(uri=path_to_uri(data_folder('song2.mp3')))])
+        try:
+            tracks = list(iter_mpd_tag_cache(tag_cache, data_folder('')))
+        finally:
+            os.remove(tag_cache)
+        self.assertEqual(datetime.date(2006, 2, 3), tracks[0].date)
+        self.assertEqual(None, tracks[1].date)
+
+    def test_unchanged_tracks_keep_their_date_when_updating(self):
+        # An incremental update writes the unchanged tracks from the old tag
+        # cache back to the new one
+        old_tracks = list(iter_mpd_tag_cache(
+            data_folder('advanced_tag_cache'), data_folder('')))
+        tag_cache = write_tag_cache(old_tracks)
+        try:
+            tracks = list(iter_mpd_tag_cache(tag_cache, data_folder('')))
+        finally:
+            os.remove(tag_cache)
+        self.assertEqual(set(expected_tracks), set(tracks))
+        for track in tracks:
+            self.assertEqual(expected_date, track.date)
@@ -124,6 +124,14 @@ class CurrentPlaylistHandlerTest(unittest.TestCase):
         self.assertEqual(len(self.b.current_playlist.tracks), 3)
         self.assert_(u'OK' in result)
 
+    def test_delete_range_increases_version_once(self):
+        self.b.current_playlist.append(
+            [Track(), Track(), Track(), Track(), Track()])
+        version = self.b.current_playlist.version
+        result = self.h.handle_request(u'delete "1:4"')
+        self.assertEqual(self.b.current_playlist.version, version + 1)
+        self.assert_(u'OK' in result)
+
     def test_delete_range_out_of_bounds(self):
         self.b.current_playlist.append(
             [Track(), Track(), Track(), Track(), Track()])
@@ -358,6 +366,18 @@ class CurrentPlaylistHandlerTest(unittest.TestCase):
         self.assert_(u'Title: c' in result)
         self.assert_(u'OK' in result)
 
+    def test_plchanges_only_returns_changed_tracks(self):
+        self.b.current_playlist.append(
+            [Track(name='a'), Track(name='b'), Track(name='c')])
+        version = self.b.current_playlist.version
+        self.b.current_playlist.append([Track(name='d')])
+        result = self.h.handle_request(u'plchanges "%d"' % version)
+        self.assert_(u'Title: a' not in result)
+        self.assert_(u'Title: c' not in result)
+        self.assert_(u'Title: d' in result)
+        self.assert_(u'Pos: 3' in result)
+        self.assert_(u'OK' in result)
+
     def test_plchangesposid(self):
         self.b.current_playlist.append([Track(), Track(), Track()])
         result = self.h.handle_request(u'plchangesposid "0"')
@@ -372,6 +392,30 @@ class CurrentPlaylistHandlerTest(unittest.TestCase):
             in result)
         self.assert_(u'OK' in result)
 
+    def test_plchangesposid_only_returns_changed_tracks(self):
+        self.b.current_playlist.append([Track(), Track(), Track()])
+        version = self.b.current_playlist.version
+        self.b.current_playlist.move(2, 3, 1)
+        result = self.h.handle_request(u'plchangesposid "%d"' % version)
+        self.assert_(u'cpos: 0' not in result)
+        self.assert_(u'cpos: 1' in result)
+        self.assert_(u'Id: %d' % self.b.current_playlist.cp_tracks[1][0]
+            in result)
+        self.assert_(u'cpos: 2' in result)
+        self.assert_(u'OK' in result)
+
+    def test_plchangesposid_returns_all_when_change_log_is_exhausted(self):
+        self.b.current_playlist.append([Track(), Track()])
+        version = self.b.current_playlist.version
+        for _ in range(self.b.current_playlist.CHANGE_LOG_SIZE + 1):
+            self.b.current_playlist.move(0, 1, 1)
+        self.assertEqual(None,
+            self.b.current_playlist.changed_positions(version))
+        result = self.h.handle_request(u'plchangesposid "%d"' % version)
+        self.assert_(u'cpos: 0' in result)
+        self.assert_(u'cpos: 1' in result)
+        self.assert_(u'OK' in result)
+
     def test_shuffle_without_range(self):
         self.b.current_playlist.append([
             Track(name='a'), Track(name='b'), Track(name='c'),
@@ -1,3 +1,4 @@
+import re
 import unittest
 
 from mopidy.backends.dummy import DummyBackend
@@ -47,3 +48,25 @@ class MpdDispatcherTest(unittest.TestCase):
         result = self.h.handle_request('known request')
         self.assert_(u'OK' in result)
         self.assert_(expected in result)
+
+    def test_finding_handler_for_known_command_with_bad_args_raises_arg_error(self):
+        try:
+            self.h.find_handler('status "with args"')
+            self.fail('Should raise exception')
+        except MpdAckError as e:
+            self.assertEqual(e.get_mpd_ack(),
+                u'ACK [2@0] {status} incorrect arguments')
+
+    def test_finding_handler_matches_linear_scan_of_all_patterns(self):
+        requests = [u'', u'status', u'play', u'playid "1"', u'playlistid',
+            u'playlistid "3"', u'update', u'rescan "foo"', u'list "artist"',
+            u'find album "foo"', u'sticker list "song" "foo"', u'idle player']
+        for request in requests:
+            expected = None
+            for pattern in request_handlers:
+                matches = re.match(pattern, request)
+                if matches is not None:
+                    expected = request_handlers[pattern]
+                    break
+            (handler, _) = self.h.find_handler(request)
+            self.assertEqual(handler, expected)
@@ -3,6 +3,7 @@ import unittest
 from mopidy.backends.dummy import DummyBackend
 from mopidy.frontends.mpd import dispatcher
 from mopidy.mixers.dummy import DummyMixer
+from mopidy.models import Playlist, Track
 
 class MusicDatabaseHandlerTest(unittest.TestCase):
     def setUp(self):
@@ -15,17 +16,136 @@ class MusicDatabaseHandlerTest(unittest.TestCase):
         self.assert_(u'playtime: 0' in result)
         self.assert_(u'OK' in result)
 
+    def test_count_with_library(self):
+        self.b.library.provider.count = lambda **query: {
+            'songs': len(query['artist']), 'playtime': 61000}
+        result = self.h.handle_request(u'count "artist" "needle"')
+        self.assert_(u'songs: 1' in result)
+        self.assert_(u'playtime: 61' in result)
+        self.assert_(u'OK' in result)
+
+    def test_count_with_unknown_tag(self):
+        def count(**query):
+            raise LookupError
+        self.b.library.provider.count = count
+        result = self.h.handle_request(u'count "unknown" "needle"')
+        self.assertEqual(result[0], u'ACK [2@0] {count} incorrect arguments')
+
+    def test_count_any(self):
+        self.b.library.provider.count = lambda **query: {
+            'songs': len(query['any']), 'playtime': 0}
+        result = self.h.handle_request(u'count "any" "needle"')
+        self.assert_(u'songs: 1' in result)
+        self.assert_(u'OK' in result)
+
+    def test_count_filename_is_counted_by_uri(self):
+        self.b.library.provider.count = lambda **query: {
+            'songs': len(query['uri']), 'playtime': 0}
+        result = self.h.handle_request(u'count "filename" "file:///a.mp3"')
+        self.assert_(u'songs: 1' in result)
+        self.assert_(u'OK' in result)
+
+    def test_find_filename_is_found_by_uri(self):
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(name=query['uri'][0])])
+        result = self.h.handle_request(u'find "filename" "file:///a.mp3"')
+        self.assert_(u'Title: file:///a.mp3' in result)
+        self.assert_(u'OK' in result)
+
     def test_findadd(self):
         result = self.h.handle_request(u'findadd "album" "what"')
         self.assert_(u'OK' in result)
 
+    def test_findadd_appends_results_to_current_playlist(self):
+        self.b.current_playlist.append([Track(name='a')])
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(name='b'), Track(name='c')])
+        version = self.b.current_playlist.version
+        result = self.h.handle_request(u'findadd "album" "what"')
+        self.assertEqual(result, [u'OK'])
+        self.assertEqual([t.name for t in self.b.current_playlist.tracks],
+            ['a', 'b', 'c'])
+        self.assertEqual(self.b.current_playlist.version, version + 1)
+
+    def test_searchadd_appends_results_to_current_playlist(self):
+        self.b.library.provider.search = lambda **query: Playlist(
+            tracks=[Track(name='b'), Track(name='c')])
+        version = self.b.current_playlist.version
+        result = self.h.handle_request(u'searchadd "any" "what"')
+        self.assertEqual(result, [u'OK'])
+        self.assertEqual([t.name for t in self.b.current_playlist.tracks],
+            ['b', 'c'])
+        self.assertEqual(self.b.current_playlist.version, version + 1)
+
+    def test_searchadd_without_results(self):
+        version = self.b.current_playlist.version
+        result = self.h.handle_request(u'searchadd "any" "what"')
+        self.assertEqual(result, [u'OK'])
+        self.assertEqual(self.b.current_playlist.version, version)
+
+    def _browse(self, path):
+        directories = {
+            u'': ([u'a'], [Track(uri='file:///music/x.mp3', name='x')]),
+            u'a': ([u'a/b'], []),
+            u'a/b': ([], [Track(uri='file:///music/a/b/y.mp3', name='y')]),
+        }
+        try:
+            return directories[path.strip(u'/')]
+        except KeyError:
+            raise LookupError
+
     def test_listall(self):
+        self.b.library.provider.browse = self._browse
+        result = self.h.handle_request(u'listall')
+        self.assertEqual(result, [u'directory: a', u'directory: a/b',
+            u'file: file:///music/a/b/y.mp3', u'file: file:///music/x.mp3',
+            u'OK'])
+
+    def test_listall_with_uri(self):
+        self.b.library.provider.browse = self._browse
+        result = self.h.handle_request(u'listall "a"')
+        self.assertEqual(result, [u'directory: a/b',
+            u'file: file:///music/a/b/y.mp3', u'OK'])
+
+    def test_listall_unknown_uri(self):
         result = self.h.handle_request(u'listall "file:///dev/urandom"')
-        self.assert_(u'ACK [0@0] {} Not implemented' in result)
+        self.assertEqual(result[0],
+            u'ACK [50@0] {listall} directory or file not found')
 
     def test_listallinfo(self):
+        self.b.library.provider.browse = self._browse
+        result = self.h.handle_request(u'listallinfo')
+        self.assert_(u'directory: a/b' in result)
+        self.assert_(u'Title: x' in result)
+        self.assert_(u'Title: y' in result)
+        self.assert_(u'OK' in result)
+
+    def test_listallinfo_unknown_uri(self):
         result = self.h.handle_request(u'listallinfo "file:///dev/urandom"')
-        self.assert_(u'ACK [0@0] {} Not implemented' in result)
+        self.assertEqual(result[0],
+            u'ACK [50@0] {listallinfo} directory or file not found')
+
+    def test_lsinfo_with_path(self):
+        self.b.library.provider.browse = self._browse
+        result = self.h.handle_request(u'lsinfo "a/b"')
+        self.assert_(u'directory: a/b' not in result)
+        self.assert_(u'file: file:///music/a/b/y.mp3' in result)
+        self.assert_(u'Title: y' in result)
+        self.assert_(u'OK' in result)
+
+    def test_lsinfo_for_root_includes_directories_tracks_and_playlists(self):
+        self.b.library.provider.browse = self._browse
+        self.b.stored_playlists.playlists = [Playlist(name='a')]
+        result = self.h.handle_request(u'lsinfo')
+        self.assertEqual(result[0], u'directory: a')
+        self.assert_(u'Title: x' in result)
+        self.assert_(u'playlist: a' in result)
+        self.assert_(result.index(u'Title: x') < result.index(u'playlist: a'))
+
+    def test_lsinfo_unknown_path(self):
+        result = self.h.handle_request(u'lsinfo "unknown"')
+        self.assertEqual(result[0],
+            u'ACK [50@0] {lsinfo} directory or file not found')
 
     def test_lsinfo_without_path_returns_same_as_listplaylists(self):
         lsinfo_result = self.h.handle_request(u'lsinfo')
@@ -45,22 +165,39 @@ class MusicDatabaseHandlerTest(unittest.TestCase):
     def test_update_without_uri(self):
         result = self.h.handle_request(u'update')
         self.assert_(u'OK' in result)
-        self.assert_(u'updating_db: 0' in result)
+        self.assert_(u'updating_db: 1' in result)
 
     def test_update_with_uri(self):
         result = self.h.handle_request(u'update "file:///dev/urandom"')
         self.assert_(u'OK' in result)
-        self.assert_(u'updating_db: 0' in result)
+        self.assert_(u'updating_db: 1' in result)
+
+    def test_update_with_unknown_uri(self):
+        def update(uri, rescan):
+            raise LookupError('%s not found.' % uri)
+        self.b.library.provider.update = update
+        result = self.h.handle_request(u'update "unknown"')
+        self.assertEqual(result[0],
+            u'ACK [50@0] {update} directory or file not found')
+        result = self.h.handle_request(u'rescan "unknown"')
+        self.assertEqual(result[0],
+            u'ACK [50@0] {rescan} directory or file not found')
+        self.assertEqual(self.b.library._update_job_id, 0)
+
+    def test_update_returns_new_job_id_each_time(self):
+        self.h.handle_request(u'update')
+        result = self.h.handle_request(u'update')
+        self.assert_(u'updating_db: 2' in result)
 
     def test_rescan_without_uri(self):
         result = self.h.handle_request(u'rescan')
         self.assert_(u'OK' in result)
-        self.assert_(u'updating_db: 0' in result)
+        self.assert_(u'updating_db: 1' in result)
 
     def test_rescan_with_uri(self):
         result = self.h.handle_request(u'rescan "file:///dev/urandom"')
         self.assert_(u'OK' in result)
-        self.assert_(u'updating_db: 0' in result)
+        self.assert_(u'updating_db: 1' in result)
 
 
 class MusicDatabaseFindTest(unittest.TestCase):
@@ -114,6 +251,58 @@ class MusicDatabaseFindTest(unittest.TestCase):
             u'find album "album_what" artist "artist_what"')
         self.assert_(u'OK' in result)
 
+    def test_find_date(self):
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(name=query['date'][0])])
+        result = self.h.handle_request(u'find Date "2006-01-01"')
+        self.assert_(u'Title: 2006-01-01' in result)
+        self.assert_(u'OK' in result)
+
+    def test_find_with_window(self):
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(name='a'), Track(name='b'), Track(name='c')])
+        result = self.h.handle_request(u'find "title" "what" window 1:2')
+        self.assert_(u'Title: a' not in result)
+        self.assert_(u'Title: b' in result)
+        self.assert_(u'Title: c' not in result)
+        self.assert_(u'OK' in result)
+
+    def test_find_with_window_stops_at_end_of_window(self):
+        tracks = iter([Track(name='a'), Track(name='b'), Track(name='c')])
+        self.b.library.provider.iter_find_exact = lambda **query: tracks
+        result = self.h.handle_request(u'find "title" "what" window 0:1')
+        self.assert_(u'Title: a' in result)
+        self.assertEqual(tracks.next(), Track(name='b'))
+
+    def test_find_with_window_without_end(self):
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(name='a'), Track(name='b'), Track(name='c')])
+        result = self.h.handle_request(u'find "title" "what" window "1:"')
+        self.assert_(u'Title: a' not in result)
+        self.assert_(u'Title: b' in result)
+        self.assert_(u'Title: c' in result)
+        self.assert_(u'OK' in result)
+
+    def test_find_with_window_past_the_end(self):
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(name='a')])
+        result = self.h.handle_request(u'find "title" "what" window 5:10')
+        self.assertEqual(result, [u'OK'])
+
+    def test_find_with_empty_window(self):
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(name='a'), Track(name='b'), Track(name='c')])
+        result = self.h.handle_request(u'find "title" "what" window 0:0')
+        self.assertEqual(result, [u'OK'])
+
+    def test_find_with_window_start_after_end(self):
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(name='a'), Track(name='b'), Track(name='c')])
+        result = self.h.handle_request(u'find "title" "what" window 2:1')
+        self.assertEqual(result, [u'OK'])
+        result = self.h.handle_request(u'find "title" "what" window 1:1')
+        self.assertEqual(result, [u'OK'])
+
 
 class MusicDatabaseListTest(unittest.TestCase):
     def setUp(self):
@@ -305,6 +494,21 @@ class MusicDatabaseListTest(unittest.TestCase):
             u'list "genre" "artist" "anartist" "album" "analbum"')
         self.assert_(u'OK' in result)
 
+    def test_list_returns_values_from_library_in_order(self):
+        def list_values(field, **query):
+            self.assertEqual(field, u'album')
+            self.assertEqual(query, {'artist': [u'anartist']})
+            return [u'a', u'b']
+        self.b.library.provider.list_values = list_values
+        result = self.h.handle_request(u'list "album" "anartist"')
+        self.assertEqual(result, [u'Album: a', u'Album: b', u'OK'])
+
+    def test_list_genre_from_library(self):
+        self.b.library.provider.find_exact = lambda **query: Playlist(
+            tracks=[Track(genre='Rock'), Track(genre='Pop'), Track()])
+        result = self.h.handle_request(u'list "genre"')
+        self.assertEqual(result, [u'Genre: Pop', u'Genre: Rock', u'OK'])
+
 
 class MusicDatabaseSearchTest(unittest.TestCase):
     def setUp(self):
@@ -367,4 +571,25 @@ class MusicDatabaseSearchTest(unittest.TestCase):
         result = self.h.handle_request(u'search "sometype" "something"')
         self.assertEqual(result[0], u'ACK [2@0] {search} incorrect arguments')
 
+    def test_search_with_window(self):
+        self.b.library.provider.search = lambda **query: Playlist(
+            tracks=[Track(name='a'), Track(name='b'), Track(name='c')])
+        result = self.h.handle_request(u'search "any" "what" window 0:2')
+        self.assert_(u'Title: a' in result)
+        self.assert_(u'Title: b' in result)
+        self.assert_(u'Title: c' not in result)
+        self.assert_(u'OK' in result)
+
+    def test_search_with_empty_window(self):
+        self.b.library.provider.search = lambda **query: Playlist(
+            tracks=[Track(name='a'), Track(name='b'), Track(name='c')])
+        result = self.h.handle_request(u'search "any" "what" window 0:0')
+        self.assertEqual(result, [u'OK'])
+
+    def test_search_with_window_start_after_end(self):
+        self.b.library.provider.search = lambda **query: Playlist(
+            tracks=[Track(name='a'), Track(name='b'), Track(name='c')])
+        result = self.h.handle_request(u'search "any" "what" window 3:0')
+        self.assertEqual(result, [u'OK'])
+
 
@@ -66,6 +66,11 @@ class TrackMpdFormatTest(unittest.TestCase):
         self.assert_(('Id', 122) in result)
         self.assertEqual(len(result), 10)
 
+    def test_track_to_mpd_format_genre(self):
+        track = self.track.copy(genre='Rock')
+        result = translator.track_to_mpd_format(track)
+        self.assert_(('Genre', 'Rock') in result)
+
     def test_track_to_mpd_format_musicbrainz_trackid(self):
         track = self.track.copy(musicbrainz_id='foo')
         result = translator.track_to_mpd_format(track)
@@ -90,6 +95,38 @@ class TrackMpdFormatTest(unittest.TestCase):
         result = translator.track_to_mpd_format(track)
         self.assert_(('MUSICBRAINZ_ARTISTID', 'foo') in result)
 
+    def test_track_to_mpd_format_puts_position_and_cpid_last(self):
+        result = translator.track_to_mpd_format(
+            self.track.copy(musicbrainz_id='foo'), position=9, cpid=122)
+        self.assertEqual([('Pos', 9), ('Id', 122)], result[-2:])
+
+    def test_track_to_mpd_lines(self):
+        result = translator.track_to_mpd_lines(
+            self.track, position=9, cpid=122)
+        self.assertEqual([u'%s: %s' % line for line in
+            translator.track_to_mpd_format(self.track, 9, 122)], result)
+
+    def test_track_to_mpd_lines_without_position(self):
+        result = translator.track_to_mpd_lines(self.track)
+        self.assertEqual(8, len(result))
+        self.assert_(u'Title: a name' in result)
+
+    def test_track_to_mpd_lines_reuses_cached_lines(self):
+        translator.track_to_mpd_lines(self.track, position=1, cpid=1)
+        self.assert_(self.track in translator._track_cache)
+        result = translator.track_to_mpd_lines(self.track, position=2, cpid=3)
+        self.assertEqual([u'Pos: 2', u'Id: 3'], result[-2:])
+        self.assert_(u'Pos: 1' not in result)
+
+    def test_track_to_mpd_lines_result_can_be_modified(self):
+        translator.track_to_mpd_lines(self.track).append(u'OK')
+        self.assert_(u'OK' not in translator.track_to_mpd_lines(self.track))
+
+    def test_artists_to_mpd_format_does_not_modify_artists(self):
+        artists = [Artist(name=u'Beatles'), Artist(name=u'ABBA')]
+        translator.artists_to_mpd_format(artists)
+        self.assertEqual(u'Beatles', artists[0].name)
+
     def test_artists_to_mpd_format(self):
         artists = [Artist(name=u'ABBA'), Artist(name=u'Beatles')]
         translated = translator.artists_to_mpd_format(artists)
@@ -113,7 +150,26 @@ class PlaylistMpdFormatTest(unittest.TestCase):
             Track(track_no=1), Track(track_no=2), Track(track_no=3)])
         result = translator.playlist_to_mpd_format(playlist, 1, 2)
         self.assertEqual(len(result), 1)
-        self.assertEqual(dict(result[0])['Track'], 2)
+        self.assert_(u'Track: 2' in result[0])
+
+
+class TrackIterMpdFormatTest(unittest.TestCase):
+    def test_mpd_format(self):
+        tracks = iter([Track(track_no=1), Track(track_no=2)])
+        result = translator.track_iter_to_mpd_format(tracks)
+        self.assertEqual(len(result), 2)
+
+    def test_mpd_format_with_range(self):
+        tracks = iter([Track(track_no=1), Track(track_no=2),
+            Track(track_no=3), Track(track_no=4)])
+        result = translator.track_iter_to_mpd_format(tracks, 1, 2)
+        self.assertEqual(len(result), 1)
+        self.assert_(u'Track: 2' in result[0])
+        self.assertEqual(tracks.next().track_no, 3)
+
+    def test_mpd_format_with_end_before_start(self):
+        tracks = iter([Track(track_no=1), Track(track_no=2)])
+        self.assertEqual(translator.track_iter_to_mpd_format(tracks, 2, 1), [])
 
 
 class TracksToTagCacheFormatTest(unittest.TestCase):
@@ -1,7 +1,10 @@
 import unittest
 
 from mopidy import settings
+from mopidy.backends.dummy import DummyQueue
 from mopidy.frontends.mpd import server
+from mopidy.frontends.mpd.protocol.status import SUBSYSTEMS
+from mopidy.frontends.mpd.session import ResponseProducer
 
 class MpdServerTest(unittest.TestCase):
     def setUp(self):
@@ -23,8 +26,89 @@ class MpdSessionTest(unittest.TestCase):
         self.session = server.MpdSession(None, None, (None, None), None)
 
     def tearDown(self):
+        self.session.reply_channel.close()
         settings.runtime.clear()
 
+    def test_requests_are_passed_on_one_at_a_time(self):
+        self.session.core_queue = DummyQueue()
+        self.session.handle_request(u'status')
+        self.session.handle_request(u'currentsong')
+        self.assertEqual(1, len(self.session.core_queue.received_messages))
+        self.assertEqual(u'status',
+            self.session.core_queue.received_messages[0]['request'])
+        self.assertEqual([u'currentsong'], list(self.session.pending_requests))
+
+    def test_next_request_is_passed_on_when_reply_is_handled(self):
+        woken_up = []
+        responses = []
+        self.session.server = FakeServer(woken_up)
+        self.session.core_queue = DummyQueue()
+        self.session.connected = True
+        self.session.handle_response = responses.append
+        self.session.handle_request(u'status')
+        self.session.handle_request(u'currentsong')
+        self.session.reply_channel.send([u'OK'])
+        self.assertEqual([self.session.handle_replies], woken_up)
+        self.session.handle_replies()
+        self.assertEqual([[u'OK']], responses)
+        self.assertEqual(2, len(self.session.core_queue.received_messages))
+        self.assertEqual(u'currentsong',
+            self.session.core_queue.received_messages[1]['request'])
+        self.assertTrue(self.session.waiting_for_reply)
+
+    def test_idle_is_not_passed_on_to_core(self):
+        self.session.core_queue = DummyQueue()
+        self.session.handle_request(u'idle')
+        self.assertEqual(0, len(self.session.core_queue.received_messages))
+        self.assertEqual(set(SUBSYSTEMS), self.session.idle_subsystems)
+
+    def test_idle_returns_when_subscribed_subsystem_changes(self):
+        responses = []
+        self.session.send_response = responses.append
+        self.session.handle_request(u'idle mixer player')
+        self.session.on_subsystem_changed(u'playlist')
+        self.assertEqual([], responses)
+        self.session.on_subsystem_changed(u'player')
+        self.assertEqual([u'changed: player\nOK'], responses)
+        self.assertEqual(None, self.session.idle_subsystems)
+
+    def test_idle_returns_at_once_if_subsystem_changed_before_idle(self):
+        responses = []
+        self.session.send_response = responses.append
+        self.session.on_subsystem_changed(u'mixer')
+        self.session.on_subsystem_changed(u'playlist')
+        self.session.handle_request(u'idle')
+        self.assertEqual([u'changed: playlist\nchanged: mixer\nOK'],
+            responses)
+
+    def test_idle_with_unknown_subsystem_fails(self):
+        responses = []
+        self.session.send_response = responses.append
+        self.session.handle_request(u'idle foo')
+        self.assertEqual(
+            [u'ACK [2@0] {idle} Unrecognized idle event: foo'], responses)
+        self.assertEqual(None, self.session.idle_subsystems)
+
+    def test_noidle_ends_idle_without_changes(self):
+        responses = []
+        self.session.send_response = responses.append
+        self.session.handle_request(u'idle playlist')
+        self.session.on_subsystem_changed(u'mixer')
+        self.session.handle_request(u'noidle')
+        self.assertEqual([u'OK'], responses)
+        self.assertEqual(None, self.session.idle_subsystems)
+
+    def test_requests_after_idle_are_handled_after_noidle(self):
+        responses = []
+        self.session.core_queue = DummyQueue()
+        self.session.send_response = responses.append
+        self.session.handle_request(u'idle')
+        self.session.handle_request(u'noidle')
+        self.session.handle_request(u'status')
+        self.assertEqual([u'OK'], responses)
+        self.assertEqual(u'status',
+            self.session.core_queue.received_messages[0]['request'])
+
     def test_found_terminator_catches_decode_error(self):
         # Pressing Ctrl+C in a telnet session sends a 0xff byte to the server.
         self.session.input_buffer = ['\xff']
@@ -79,3 +163,37 @@ class MpdSessionTest(unittest.TestCase):
         authed, response = self.session.check_password(u'ping')
         self.assertFalse(authed)
         self.assertEqual(None, response)
+
+
+class ResponseProducerTest(unittest.TestCase):
+    def produce(self, producer):
+        chunks = []
+        chunk = producer.more()
+        while chunk:
+            chunks.append(chunk)
+            chunk = producer.more()
+        return chunks
+
+    def test_lines_are_terminated_and_encoded(self):
+        producer = ResponseProducer([u'Title: \xe6\xf8\xe5', u'OK'])
+        self.assertEqual(['Title: \xc3\xa6\xc3\xb8\xc3\xa5\nOK\n'],
+            self.produce(producer))
+
+    def test_large_responses_are_produced_in_chunks(self):
+        lines = [u'Id: %d' % i for i in range(1000)] + [u'OK']
+        producer = ResponseProducer(lines)
+        producer.lines_per_chunk = 100
+        chunks = self.produce(producer)
+        self.assertEqual(11, len(chunks))
+        self.assertEqual('\n'.join(lines) + '\n', ''.join(chunks))
+
+    def test_empty_response_produces_nothing(self):
+        self.assertEqual([], self.produce(ResponseProducer([])))
+
+
+class FakeServer(object):
+    def __init__(self, woken_up):
+        self.woken_up = woken_up
+
+    def wake_up(self, callback):
+        self.woken_up.append(callback)
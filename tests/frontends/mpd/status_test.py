@@ -67,6 +67,21 @@ class StatusHandlerTest(unittest.TestCase):
         self.assert_('playtime' in result)
         self.assert_(int(result['playtime']) >= 0)
 
+    def test_stats_method_with_library(self):
+        self.b.library.provider.stats = lambda: {'artists': 2, 'albums': 3,
+            'songs': 4, 'playtime': 5500, 'updated': 1234567890}
+        result = dispatcher.status.stats(self.h)
+        self.assertEqual(int(result['artists']), 2)
+        self.assertEqual(int(result['albums']), 3)
+        self.assertEqual(int(result['songs']), 4)
+        self.assertEqual(int(result['db_playtime']), 5)
+        self.assertEqual(int(result['db_update']), 1234567890)
+
+    def test_stats_uptime(self):
+        self.h.start_time -= 10
+        result = dispatcher.status.stats(self.h)
+        self.assert_(int(result['uptime']) >= 10)
+
     def test_status_command(self):
         result = self.h.handle_request(u'status')
         self.assert_(u'OK' in result)
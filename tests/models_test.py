@@ -1,4 +1,5 @@
 import datetime as dt
+import pickle
 import unittest
 
 from mopidy.models import Artist, Album, Track, Playlist
@@ -49,6 +50,30 @@ class GenericCopyTets(unittest.TestCase):
         test = lambda: Track().copy(invalid_key=True)
         self.assertRaises(TypeError, test)
 
+class GenericStorageTest(unittest.TestCase):
+    def test_models_have_no_instance_dict(self):
+        for model in (Artist(), Album(), Track(), Playlist()):
+            self.assertFalse(hasattr(model, '__dict__'))
+
+    def test_missing_values_are_equal_to_defaults(self):
+        self.assertEqual(Track(), Track(name=None, track_no=0))
+        self.assertEqual(hash(Track()), hash(Track(name=None, track_no=0)))
+
+    def test_unexpected_keyword_argument(self):
+        test = lambda: Track(invalid_key=True)
+        self.assertRaises(TypeError, test)
+
+    def test_models_can_be_pickled(self):
+        artist = Artist(name=u'foo')
+        album = Album(name=u'bar', artists=[artist])
+        track = Track(name=u'baz', artists=[artist], album=album)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            self.assertEqual(track,
+                pickle.loads(pickle.dumps(track, protocol)))
+            playlist = pickle.loads(
+                pickle.dumps(Playlist(tracks=[track]), protocol))
+            self.assertEqual([track], playlist.tracks)
+
 class ArtistTest(unittest.TestCase):
     def test_uri(self):
         uri = u'an_uri'
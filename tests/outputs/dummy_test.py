@@ -0,0 +1,29 @@
+import multiprocessing
+import unittest
+
+from mopidy.outputs.dummy import DummyOutput
+
+class DummyOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.output = DummyOutput(multiprocessing.Queue())
+
+    def test_send_commands_runs_commands_in_order(self):
+        self.output.send_commands([
+            {'command': 'set_state', 'state': 'READY'},
+            {'command': 'play_uri', 'uri': 'file:///song.mp3'},
+            {'command': 'set_state', 'state': 'PLAYING'},
+        ])
+        self.assertEqual(self.output.uri, 'file:///song.mp3')
+        self.assertEqual(self.output.state, 'PLAYING')
+
+    def test_send_commands_returns_future_with_results(self):
+        future = self.output.send_commands([
+            {'command': 'set_volume', 'volume': 50},
+            {'command': 'get_volume'},
+        ])
+        self.assert_(future.done())
+        self.assertEqual(future.get(), [True, 50])
+
+    def test_send_unknown_command(self):
+        test = lambda: self.output.send_commands([{'command': 'unknown'}])
+        self.assertRaises(LookupError, test)
@@ -40,6 +40,17 @@ class GStreamerOutputTest(unittest.TestCase):
     def test_end_of_data_stream(self):
         pass # TODO
 
+    def test_send_commands(self):
+        future = self.output.send_commands([
+            {'command': 'set_volume', 'volume': 50},
+            {'command': 'get_volume'},
+        ])
+        self.assertEqual(future.get(), [True, 50])
+
+    def test_send_unknown_command(self):
+        future = self.output.send_commands([{'command': 'unknown'}])
+        self.assertEqual(future.get(), None)
+
     def test_default_get_volume_result(self):
         self.assertEqual(100, self.output.get_volume())
 
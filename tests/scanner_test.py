@@ -3,6 +3,7 @@ from datetime import date
 
 from mopidy.scanner import Scanner, translator
 from mopidy.models import Track, Artist, Album
+from mopidy.utils.path import path_to_uri, mtime
 
 from tests import data_folder
 
@@ -86,6 +87,11 @@ class TranslatorTest(unittest.TestCase):
         del self.track['name']
         self.check()
 
+    def test_genre(self):
+        self.data['genre'] = u'Rock'
+        self.track['genre'] = u'Rock'
+        self.check()
+
     def test_missing_track_musicbrainz_id(self):
         del self.data['musicbrainz-trackid']
         del self.track['musicbrainz_id']
@@ -131,9 +137,9 @@ class ScannerTest(unittest.TestCase):
         self.errors = {}
         self.data = {}
 
-    def scan(self, path):
+    def scan(self, path, jobs=1):
         scanner = Scanner(data_folder(path),
-            self.data_callback, self.error_callback)
+            self.data_callback, self.error_callback, jobs)
         scanner.start()
 
     def check(self, name, key, value):
@@ -184,3 +190,30 @@ class ScannerTest(unittest.TestCase):
     def test_other_media_is_ignored(self):
         self.scan('scanner/image')
         self.assert_(self.errors)
+
+    def test_all_files_are_scanned_with_multiple_jobs(self):
+        self.scan('scanner/advanced', jobs=3)
+        self.assertEqual(len(self.data), 9)
+        self.assert_(not self.errors)
+
+    def test_more_jobs_than_files(self):
+        self.scan('scanner/simple', jobs=4)
+        self.check('scanner/simple/song1.mp3', 'title', 'trackname')
+
+    def test_unmodified_files_are_not_scanned(self):
+        path = data_folder('scanner/simple/song1.mp3')
+        mtimes = {path_to_uri(path): mtime(path)}
+        scanner = Scanner(data_folder('scanner/simple'),
+            self.data_callback, self.error_callback, mtimes=mtimes)
+        scanner.start()
+        self.assert_(not self.data)
+        self.assertEqual(set([path_to_uri(path)]), scanner.unchanged_uris)
+
+    def test_modified_files_are_scanned(self):
+        path = data_folder('scanner/simple/song1.mp3')
+        mtimes = {path_to_uri(path): mtime(path) - 1}
+        scanner = Scanner(data_folder('scanner/simple'),
+            self.data_callback, self.error_callback, mtimes=mtimes)
+        scanner.start()
+        self.check('scanner/simple/song1.mp3', 'title', 'trackname')
+        self.assertEqual(set(), scanner.unchanged_uris)
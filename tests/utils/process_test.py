@@ -0,0 +1,65 @@
+import threading
+import unittest
+
+from mopidy.utils.process import Future, ReplyChannel, get_reply_channel
+
+class ReplyChannelTest(unittest.TestCase):
+    def setUp(self):
+        self.channel = ReplyChannel()
+
+    def tearDown(self):
+        self.channel.close()
+
+    def test_channels_get_unique_ids(self):
+        other = ReplyChannel()
+        self.assertNotEqual(self.channel.id, other.id)
+        other.close()
+
+    def test_get_reply_channel_returns_channel_with_id(self):
+        self.assertEqual(self.channel, get_reply_channel(self.channel.id))
+
+    def test_send_and_recv(self):
+        get_reply_channel(self.channel.id).send([u'OK'])
+        self.assertEqual([u'OK'], self.channel.recv())
+
+    def test_channel_is_reusable(self):
+        for i in range(3):
+            self.channel.send(i)
+            self.assertEqual(i, self.channel.recv())
+
+    def test_closed_channel_can_not_be_looked_up(self):
+        self.channel.close()
+        self.assertRaises(KeyError, get_reply_channel, self.channel.id)
+
+    def test_poll_is_true_when_response_is_waiting(self):
+        self.assertFalse(self.channel.poll())
+        self.channel.send(u'OK')
+        self.assertTrue(self.channel.poll())
+        self.channel.recv()
+        self.assertFalse(self.channel.poll())
+
+    def test_on_send_is_called_after_response_is_sent(self):
+        sent = []
+        self.channel.on_send = lambda: sent.append(self.channel.poll())
+        self.channel.send(u'OK')
+        self.assertEqual([True], sent)
+
+
+class FutureTest(unittest.TestCase):
+    def setUp(self):
+        self.future = Future()
+
+    def test_send_and_get(self):
+        self.future.send(u'OK')
+        self.assertEqual(u'OK', self.future.get())
+
+    def test_done_is_true_when_response_is_sent(self):
+        self.assertFalse(self.future.done())
+        self.future.send(None)
+        self.assertTrue(self.future.done())
+
+    def test_get_waits_for_response_from_other_thread(self):
+        thread = threading.Thread(target=self.future.send, args=(u'OK',))
+        thread.start()
+        self.assertEqual(u'OK', self.future.get())
+        thread.join()